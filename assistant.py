@@ -1,11 +1,21 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
 from pathlib import Path
 import logging
+import math
 import threading
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Sequence
 from util import strings as string
 from net.web import get_html
-from ml.llm import to_request, LLM
+from net.cache import HTTPCache
+from net.content import extract_content
+from net.text import html_to_text
+from ml.llm import to_request, user, LLM, Message
+from ml.prompt import AssembledPrompt, Section, assemble_messages
+from ml.tokens import COUNTER
 import re
-import html as htmlmod
 from defaults import PERSON, EXPERIENCE, SKILLS, SKILLS_CONSOLIDATED, LETTER_CONTENT
 
 
@@ -22,9 +32,73 @@ def thread_logger() -> logging.Logger:
     return logging.getLogger(name)
 
 
+@dataclass
+class StageLimits:
+    """Per-stage worker counts and queue depth for Assistant.generate_applications."""
+    fetch: int = 8
+    text: int = 2
+    llm: int = 4
+    queue_size: int = 16
+
+
+@dataclass
+class ApplicationResult:
+    url: str
+    output: Optional[str] = None
+    error: Optional[BaseException] = None
+
+
+_DONE = object()
+
+TERM = re.compile(r"[a-z][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+JOB_SIGNALS = ("responsibilit", "requirement", "qualification", "you will", "you'll", "experience with", "about the role", "what you")
+BOILERPLATE = (
+    "equal opportunity", "equal employment", "benefits", "privacy", "cookie", "accommodation",
+    "e-verify", "all rights reserved", "401(k)", "pay transparency", "background check",
+)
+
+
+def terms(text: str) -> set:
+    return set(TERM.findall(text.lower()))
+
+
+def normalize(scores: List[float]) -> List[float]:
+    top = max(scores, default=0.0) or 1.0
+    return [max(0.0, s) / top for s in scores]
+
+
+def split_paragraphs(text: str, max_chars: int = 1200) -> List[str]:
+    """Split job text into paragraphs; overly long ones are split further into sentences."""
+    out: List[str] = []
+    for para in filter(None, (p.strip() for p in text.split("\n"))):
+        out.extend([para] if len(para) <= max_chars else [s for s in re.split(r"(?<=[.!?])\s+", para) if s])
+    return out
+
+
+def paragraph_scores(paragraphs: List[str], vocab: set) -> List[float]:
+    """Favor paragraphs that mention candidate skills and role signals; penalize legal/benefits boilerplate."""
+    raw = []
+    for i, para in enumerate(paragraphs):
+        low = para.lower()
+        words = terms(low)
+        score = len(words & vocab) / math.sqrt(len(words) or 1)
+        score += 0.5 * sum(k in low for k in JOB_SIGNALS) - sum(k in low for k in BOILERPLATE)
+        raw.append(score / (1 + 0.02 * i))
+    return normalize(raw)
+
+
+def experience_scores(entries: List[dict], job_terms: set) -> List[float]:
+    raw = []
+    for entry in entries:
+        words = terms(" ".join([str(entry.get("role", "")), *map(str, entry.get("bullets", []))]))
+        raw.append(len(words & job_terms) / math.sqrt(len(words) or 1))
+    return normalize(raw)
+
+
 class Assistant:
-    def __init__(self, llm: LLM | None = None) -> None:
+    def __init__(self, llm: LLM | None = None, *, http_cache: HTTPCache | None = None) -> None:
         self.llm = llm
+        self.http_cache = http_cache
         
     @property
     def log(self) -> logging.Logger:
@@ -32,28 +106,48 @@ class Assistant:
 
     def fetch(self, url: str) -> str:
         self.log.info("fetching %s", url)
-        return get_html(url)
+        return get_html(url, cache=self.http_cache)
 
-    def ask(self, prompt: str, *, model: str | None = None, temperature: float | None = None, max_tokens: int | None = None) -> str:
+    def ask(self, prompt: str | Sequence[Message], *, model: str | None = None, temperature: float | None = None, max_tokens: int | None = None) -> str:
         req = to_request(prompt, model=model, temperature=temperature, max_tokens=max_tokens)
         res = self.llm.chat(req)  # type: ignore[union-attr]
+        self.log_usage(res)
+        return res.choices[0].message.content if res.choices else "No response"
+
+    def log_usage(self, res) -> None:
+        if (usage := getattr(res, "usage", None)) is not None:
+            self.log.info(
+                "tokens: prompt=%d (cached=%d) completion=%d",
+                usage.prompt_tokens, usage.cached_tokens, usage.completion_tokens,
+            )
+
+    def ask_stream(self, prompt: str | Sequence[Message], *, model: str | None = None, temperature: float | None = None, max_tokens: int | None = None) -> Iterator[str]:
+        """Yield the reply as it is generated; with ChatGPT the iterator also exposes `.response` once drained."""
+        req = to_request(prompt, model=model, temperature=temperature, max_tokens=max_tokens, stream=True)
+        return self.llm.chat_stream(req)  # type: ignore[union-attr]
+
+    async def ask_async(self, prompt: str | Sequence[Message], *, model: str | None = None, temperature: float | None = None, max_tokens: int | None = None) -> str:
+        req = to_request(prompt, model=model, temperature=temperature, max_tokens=max_tokens)
+        res = await self.llm.async_chat(req)  # type: ignore[union-attr]
+        self.log_usage(res)
         return res.choices[0].message.content if res.choices else "No response"
 
-    def to_text(self, html: str) -> str:
+    def to_text(self, html: str | bytes | Iterable[str | bytes]) -> str:
         if not html:
             return ""
-        text = re.sub(r"(?is)<(script|style)[^>]*>.*?</\1>", " ", html)
-        text = re.sub(r"(?i)<\s*br\s*/?>|</\s*p\s*>|</\s*div\s*>|</\s*h[1-6]\s*>|</\s*li\s*>", "\n", text)
-        text = re.sub(r"(?s)<[^>]+>", " ", text)
-        text = htmlmod.unescape(text)
-        text = re.sub(r"\s+", " ", text)
-        text = re.sub(r"(\s*\n\s*)+", "\n", text)
-        return text.strip()
-
-    def build_llm_data(self, html: str, *, include_raw_html: bool = False) -> dict:
+        return html_to_text(html)
+
+    def build_llm_data(self, html: str, *, url: str = "", main_content: bool = True, include_raw_html: bool = False) -> dict:
+        """Page text plus candidate data for the application prompt.
+
+        With `main_content`, the page is reduced to the job description and its title,
+        company and location (see net.content.extract_content) instead of every word on it.
+        """
         skills_all = list(dict.fromkeys(s for d in (SKILLS, SKILLS_CONSOLIDATED) for v in d.values() for s in v if s))
+        content = extract_content(html, url) if main_content and html else None
         return {
-            "page_text": self.to_text(html),
+            "page_text": content.as_text() if content else self.to_text(html),
+            "job": {"title": content.title, "company": content.company, "location": content.location} if content else {},
             "person": PERSON,
             "experience": EXPERIENCE,
             "skills": skills_all,
@@ -65,15 +159,21 @@ class Assistant:
         # IN PROGRESS: write cover letter/resume outputs and return file paths
         return {}
 
-    def generate_application(
-        self,
-        url: str,
-        *,
-        model: str | None = None,
-        temperature: float | None = 0.2,
-        max_tokens: int | None = 800,
-    ) -> str:
-        data = self.build_llm_data(self.fetch(url))
+    def count_tokens(self, text: str, model: str | None = None) -> int:
+        if self.llm is not None:
+            return self.llm.count_prompt_tokens([user(text)], model=model)
+        return COUNTER.count_text(text, model or "")
+
+    def assemble_application_prompt(self, data: dict, *, budget: int | None = None, model: str | None = None) -> AssembledPrompt:
+        """Build the application prompt as [system, user] messages, trimmed to `budget` tokens.
+
+        The system message holds the instructions and the fixed candidate block (person,
+        experience, skills, reference letter) and is byte-identical across postings, so
+        the provider's prompt-prefix cache can serve it; the job text comes last in the
+        user message. Trimming drops low-relevance job paragraphs first and only touches
+        experience/skills (which breaks prefix reuse for that posting) when the job text
+        alone cannot make room. The result lists what was dropped.
+        """
         letter_keys = list(LETTER_CONTENT.keys())
         ref_letter = "\n".join([LETTER_CONTENT.get(k, "") for k in letter_keys]).strip()
         base_words = max(80, len(ref_letter.split()))
@@ -88,10 +188,17 @@ class Assistant:
             '{"letter":' + letter_schema + ',"work_experience":[{"company":"...","role":"...","start":"...","end":"...","location":"...","bullets":["..."]}],"skills":["..."]}'
         )
 
+        page_text = data["page_text"]
+        job_terms = terms(page_text)
+        paragraphs = split_paragraphs(page_text)
+        experience = list(data["experience"])
+        skills = list(data["skills"])
+        vocab = terms(" ".join(skills)) | {t for e in experience for t in terms(" ".join(map(str, e.get("bullets", []))))}
+
         keys_list = ", ".join([f'"{k}"' for k in letter_keys])
-        prompt = (
+        candidate = [
             "You are assisting with a job application.\n"
-            "Use the provided candidate data and the plaintext job description to draft output.\n"
+            "Use the provided candidate data and the plaintext job description (in the user message) to draft output.\n"
             "Requirements:\n"
             f"- Cover letter must have exactly these 4 keys (in order): {keys_list}.\n"
             f"- Match the reference letter's tone and be between {min_words} and {max_words} words.\n"
@@ -102,10 +209,129 @@ class Assistant:
             "- Keep first-person voice, concise, professional.\n"
             "Output schema: return ONLY minified JSON (no markdown, no commentary).\n"
             f"{schema}\n\n"
-            f"Candidate: {data['person']}\n"
-            f"Experience: {data['experience']}\n"
-            f"Skills pool: {', '.join(data['skills'])}\n"
-            f"Reference letter content (structure/length guide):\n{ref_letter}\n\n"
-            f"Job description (plaintext):\n{data['page_text']}\n"
-        )
-        return self.ask(prompt, model=model, temperature=temperature, max_tokens=max_tokens)
+            f"Candidate: {data['person']}\n",
+            Section(
+                "experience", experience, lambda kept: f"Experience: {kept}\n",
+                experience_scores(experience, job_terms), keep=2, priority=1,
+            ),
+            Section(
+                "skills", skills, lambda kept: f"Skills pool: {', '.join(kept)}\n",
+                [1.0 if s.lower() in page_text.lower() else 0.2 for s in skills], weight=0.5, keep=skills_max, priority=1,
+            ),
+            f"Reference letter content (structure/length guide):\n{ref_letter}\n",
+        ]
+        job = [
+            Section(
+                "job_text", paragraphs, lambda kept: "Job description (plaintext):\n" + "\n".join(kept) + "\n",
+                paragraph_scores(paragraphs, vocab), keep=1,
+            ),
+        ]
+        return assemble_messages([("system", candidate), ("user", job)], budget, lambda text: self.count_tokens(text, model))
+
+    def application_messages(self, data: dict, *, budget: int | None = None, model: str | None = None) -> List[Message]:
+        assembled = self.assemble_application_prompt(data, budget=budget, model=model)
+        if not assembled.fits:
+            self.log.warning("prompt is %d tokens, over budget %s after trimming", assembled.tokens, budget)
+        if assembled.dropped:
+            self.log.info(
+                "prompt trimmed to %d tokens (budget %s); dropped %s",
+                assembled.tokens, budget, ", ".join(f"{d.section}[{d.index}]" for d in assembled.dropped),
+            )
+        return assembled.messages
+
+    def generate_application(
+        self,
+        url: str,
+        *,
+        model: str | None = None,
+        temperature: float | None = 0.2,
+        max_tokens: int | None = 800,
+        max_prompt_tokens: int | None = None,
+    ) -> str:
+        data = self.build_llm_data(self.fetch(url), url=url)
+        messages = self.application_messages(data, budget=max_prompt_tokens, model=model)
+        return self.ask(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+
+    async def generate_applications(
+        self,
+        urls: Iterable[str],
+        *,
+        concurrency: int | StageLimits | None = None,
+        model: str | None = None,
+        temperature: float | None = 0.2,
+        max_tokens: int | None = 800,
+        max_prompt_tokens: int | None = None,
+    ) -> AsyncIterator[ApplicationResult]:
+        """Run fetch -> text -> LLM as overlapping stages; yield results as each URL finishes.
+
+        Each stage has its own worker count and hands off through a bounded queue, so a
+        slow stage applies back-pressure instead of buffering every page in memory. An int
+        `concurrency` applies the same limit to every stage; None uses StageLimits()'s
+        defaults. Failures are yielded as
+        ApplicationResult(error=...) rather than raised, so one bad posting does not stop
+        the batch.
+        """
+        if concurrency is None:
+            limits = StageLimits()
+        else:
+            limits = concurrency if isinstance(concurrency, StageLimits) else StageLimits(concurrency, concurrency, concurrency)
+        results: asyncio.Queue = asyncio.Queue()
+        fetched: asyncio.Queue = asyncio.Queue(limits.queue_size)
+        prompts: asyncio.Queue = asyncio.Queue(limits.queue_size)
+        pending: asyncio.Queue = asyncio.Queue(limits.queue_size)
+
+        async def fetch(url: str, _: object) -> str:
+            return await asyncio.to_thread(self.fetch, url)
+
+        async def prompt(url: str, html: str) -> List[Message]:
+            return await asyncio.to_thread(
+                lambda: self.application_messages(self.build_llm_data(html, url=url), budget=max_prompt_tokens, model=model)
+            )
+
+        async def ask(_: str, messages: List[Message]) -> str:
+            return await self.ask_async(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+
+        async def stage(inbox: asyncio.Queue, outbox: asyncio.Queue, work, workers: int, downstream: int) -> None:
+            async def worker() -> None:
+                while (item := await inbox.get()) is not _DONE:
+                    url, value = item
+                    try:
+                        out = await work(url, value)
+                    except Exception as e:
+                        self.log.warning("application for %s failed: %s", url, e)
+                        await results.put(ApplicationResult(url, error=e))
+                        continue
+                    await outbox.put((url, out) if downstream else ApplicationResult(url, output=out))
+
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            for _ in range(downstream):
+                await outbox.put(_DONE)
+
+        async def feed() -> None:
+            for url in urls:
+                await pending.put((url, None))
+            for _ in range(fetchers):
+                await pending.put(_DONE)
+
+        async def finish(stages: list) -> None:
+            try:
+                await asyncio.gather(*stages)
+            finally:
+                results.put_nowait(_DONE)
+
+        fetchers, parsers, askers = (max(1, n) for n in (limits.fetch, limits.text, limits.llm))
+        tasks = [
+            asyncio.create_task(feed()),
+            asyncio.create_task(stage(pending, fetched, fetch, fetchers, parsers)),
+            asyncio.create_task(stage(fetched, prompts, prompt, parsers, askers)),
+            asyncio.create_task(stage(prompts, results, ask, askers, 0)),
+        ]
+        tasks.append(asyncio.create_task(finish(list(tasks))))
+        try:
+            while (result := await results.get()) is not _DONE:
+                yield result
+            await tasks[-1]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
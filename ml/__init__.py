@@ -14,4 +14,30 @@ from .llm import (
 from .openai import (
     ChatGPT,
     ChatGPTConfig,
+    ChatStream,
+    Timing,
+)
+
+from .cache import (
+    CachedLLM,
+    CacheStats,
+    ResponseCache,
+    request_key,
+)
+
+from .tokens import (
+    TokenCounter,
+    estimate_tokens,
+)
+
+from .batch import (
+    BatchError,
+    BatchJob,
+    BatchRunner,
+)
+
+from .ratelimit import (
+    RateLimitedLLM,
+    RateLimiter,
+    RetryPolicy,
 )
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from . import openai
+from .cache import request_key
+from .llm import ChatRequest, ChatResponse
+from .openai import ChatGPT
+
+
+BATCH_DIR = Path("target/batches")
+CHAT_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchError(Exception):
+    def __init__(self, custom_id: str, error: object) -> None:
+        super().__init__(f"{custom_id}: {error}")
+        self.custom_id = custom_id
+        self.error = error
+
+
+def custom_id(request: ChatRequest, model: Optional[str] = None) -> str:
+    """Stable ID for a request: identical requests map to the same ID across runs."""
+    return f"req-{request_key(request, model)[:32]}"
+
+
+@dataclass
+class BatchJob:
+    """A submitted batch; saved next to its JSONL input so a later run can resume polling."""
+    id: str
+    input_file_id: str
+    custom_ids: List[str]
+    input_path: str
+    status: str = "validating"
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+    created: float = field(default_factory=time.time)
+
+    @property
+    def state_path(self) -> Path:
+        return Path(self.input_path).with_suffix(".job.json")
+
+    def save(self) -> Path:
+        self.state_path.write_text(json.dumps(asdict(self), indent=2), encoding="utf-8")
+        return self.state_path
+
+    @classmethod
+    def load(cls, path: Union[Path, str]) -> "BatchJob":
+        return cls(**json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+class BatchRunner:
+    """Submit many ChatRequests as one asynchronous batch job and map results back.
+
+    Requests are serialized to JSONL with stable custom IDs, uploaded with
+    purpose=batch, submitted to /batches and polled until a terminal state; output
+    lines are parsed into ChatResponses via the client's parse_response.
+    """
+
+    def __init__(
+        self,
+        client: Optional[ChatGPT] = None,
+        *,
+        out_dir: Union[Path, str] = BATCH_DIR,
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+    ) -> None:
+        self.client = client or ChatGPT()
+        self.out_dir = Path(out_dir)
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    def _url(self, path: str) -> str:
+        return f"{openai.OPENAI_API_BASE}{path}"
+
+    def _call(self, method: str, path: str, *, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> bytes:
+        auth = {"Authorization": f"Bearer {self.client.config.api_key}"}
+        resp = self.client.pool.request(method, self._url(path), headers={**auth, **(headers or {})}, body=body)
+        return resp.raise_for_status().body
+
+    def to_jsonl(self, requests: Sequence[ChatRequest]) -> tuple[List[str], bytes]:
+        ids: List[str] = []
+        lines: Dict[str, str] = {}
+        for request in requests:
+            model = request.model or self.client.config.default_model
+            cid = custom_id(request, model)
+            ids.append(cid)
+            if cid not in lines:  # the batch API rejects duplicate custom_ids
+                body = self.client.build_payload(request, model)
+                body.pop("stream", None)
+                lines[cid] = json.dumps({"custom_id": cid, "method": "POST", "url": CHAT_ENDPOINT, "body": body})
+        return ids, ("\n".join(lines.values()) + "\n").encode("utf-8")
+
+    def upload(self, name: str, data: bytes) -> str:
+        boundary = uuid.uuid4().hex
+        body = b"".join([
+            f'--{boundary}\r\nContent-Disposition: form-data; name="purpose"\r\n\r\nbatch\r\n'.encode(),
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'.encode(),
+            b"Content-Type: application/jsonl\r\n\r\n", data, f"\r\n--{boundary}--\r\n".encode(),
+        ])
+        resp = self._call("POST", "/files", body=body, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+        return json.loads(resp)["id"]
+
+    def submit(self, requests: Sequence[ChatRequest], *, metadata: Optional[Dict[str, str]] = None) -> BatchJob:
+        ids, data = self.to_jsonl(requests)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        input_path = self.out_dir / f"batch_{time.strftime('%Y-%m-%d_%H-%M-%S')}_{uuid.uuid4().hex[:6]}.jsonl"
+        input_path.write_bytes(data)
+
+        file_id = self.upload(input_path.name, data)
+        payload = {"input_file_id": file_id, "endpoint": CHAT_ENDPOINT, "completion_window": self.completion_window}
+        if metadata:
+            payload["metadata"] = metadata
+        batch = json.loads(self._call(
+            "POST", "/batches", body=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}
+        ))
+        job = BatchJob(batch["id"], file_id, ids, str(input_path), batch.get("status", "validating"))
+        job.save()
+        return job
+
+    def refresh(self, job: BatchJob) -> BatchJob:
+        batch = json.loads(self._call("GET", f"/batches/{job.id}"))
+        job.status = batch.get("status", job.status)
+        job.output_file_id = batch.get("output_file_id") or job.output_file_id
+        job.error_file_id = batch.get("error_file_id") or job.error_file_id
+        job.save()
+        return job
+
+    def wait(self, job: BatchJob, *, timeout: Optional[float] = None) -> BatchJob:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.refresh(job).status not in TERMINAL_STATES:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"batch {job.id} still {job.status}")
+            time.sleep(self.poll_interval)
+        return job
+
+    def results(self, job: BatchJob) -> List[Union[ChatResponse, BatchError]]:
+        """Map a finished batch's output back to the submitted requests, in submission order."""
+        found: Dict[str, Union[ChatResponse, BatchError]] = {}
+        for file_id in filter(None, (job.output_file_id, job.error_file_id)):
+            for line in self._call("GET", f"/files/{file_id}/content").decode("utf-8").splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                cid = item.get("custom_id", "")
+                response = item.get("response") or {}
+                if item.get("error") or int(response.get("status_code", 0)) >= 400:
+                    found[cid] = BatchError(cid, item.get("error") or response.get("body"))
+                else:
+                    body = response.get("body") or {}
+                    found[cid] = self.client.parse_response(body, body.get("model", ""), int(job.created))
+        return [found.get(cid) or BatchError(cid, f"missing from batch ({job.status})") for cid in job.custom_ids]
+
+    def run(self, requests: Sequence[ChatRequest], *, timeout: Optional[float] = None) -> List[Union[ChatResponse, BatchError]]:
+        job = self.wait(self.submit(requests), timeout=timeout)
+        if job.status != "completed" and not job.output_file_id:
+            raise BatchError(job.id, f"batch ended {job.status}")
+        return self.results(job)
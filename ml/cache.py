@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+from util.store import LRUStore
+
+from .llm import LLM, ChatChoice, ChatRequest, ChatResponse, Message, Usage
+
+
+DEFAULT_CACHE_PATH = Path("target/cache/llm.sqlite")
+
+
+def request_key(request: ChatRequest, model: Optional[str] = None) -> str:
+    """Content hash of everything that determines a completion: messages, model, temperature, max_tokens."""
+    canonical = json.dumps(
+        {
+            "messages": [[m.role, m.content] for m in request.messages],
+            "model": request.model or model,
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def response_to_json(response: ChatResponse) -> str:
+    data = asdict(response)
+    data.pop("timing", None)
+    return json.dumps(data, ensure_ascii=False)
+
+
+def response_from_json(text: str) -> ChatResponse:
+    data = json.loads(text)
+    return ChatResponse(
+        id=data.get("id"),
+        model=data.get("model"),
+        choices=[
+            ChatChoice(index=c["index"], message=Message(**c["message"]), finish_reason=c.get("finish_reason"))
+            for c in data.get("choices", [])
+        ],
+        usage=Usage(**data["usage"]) if data.get("usage") else None,
+        created=data.get("created"),
+    )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """On-disk (sqlite) store of ChatResponses keyed by request_key, with size and age bounded LRU eviction."""
+
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH, *, max_bytes: int = 256 * 1024 * 1024, max_age: Optional[float] = 30 * 24 * 3600) -> None:
+        self.path = Path(path)
+        self.max_age = max_age
+        self.stats = CacheStats()
+        self._store = LRUStore(
+            self.path, "responses", "key",
+            "key TEXT PRIMARY KEY, body TEXT NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL",
+            self.stats, max_bytes=max_bytes,
+        )
+
+    @property
+    def max_bytes(self) -> int:
+        return self._store.max_bytes
+
+    def get(self, key: str) -> Optional[ChatResponse]:
+        now = time.time()
+        with self._store.lock:
+            row = self._store.execute("SELECT body, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.max_age is not None and now - row[1] > self.max_age:
+                self._store.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats.evictions += 1
+                self._store.refresh_totals()
+                row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._store.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.stats.hits += 1
+        return response_from_json(row[0])
+
+    def put(self, key: str, response: ChatResponse) -> None:
+        body = response_to_json(response)
+        now = time.time()
+        with self._store.lock:
+            self._store.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body.encode("utf-8")), now, now),
+            )
+            if self.max_age is not None:
+                self.stats.evictions += self._store.execute(
+                    "DELETE FROM responses WHERE created < ?", (now - self.max_age,)
+                ).rowcount
+            self._store.evict()
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def close(self) -> None:
+        self._store.close()
+
+
+class CachedLLM:
+    """LLM wrapper that answers repeated requests from a ResponseCache.
+
+    Only chat/async_chat are cached; everything else (token counting, pricing,
+    streaming) is delegated to the wrapped client unchanged.
+    """
+
+    def __init__(self, llm: LLM, cache: Optional[ResponseCache] = None) -> None:
+        self.llm = llm
+        self.cache = cache or ResponseCache()
+
+    def __getattr__(self, name: str):
+        return getattr(self.llm, name)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.cache.stats
+
+    def key(self, request: ChatRequest) -> str:
+        default_model = getattr(getattr(self.llm, "config", None), "default_model", None)
+        return request_key(request, default_model)
+
+    def chat(self, request: ChatRequest) -> ChatResponse:
+        key = self.key(request)
+        if (hit := self.cache.get(key)) is not None:
+            return hit
+        response = self.llm.chat(request)
+        if response.choices:
+            self.cache.put(key, response)
+        return response
+
+    async def async_chat(self, request: ChatRequest) -> ChatResponse:
+        key = self.key(request)
+        if (hit := self.cache.get(key)) is not None:
+            return hit
+        response = await self.llm.async_chat(request)
+        if response.choices:
+            self.cache.put(key, response)
+        return response
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List, Literal, Optional, Protocol, Sequence
+from typing import Any, Iterable, Iterator, List, Literal, Optional, Protocol, Sequence
 
 
 Role = Literal["system", "user", "assistant"]
@@ -27,6 +27,8 @@ class Usage:
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    # Prompt tokens served from the provider's prefix cache (a subset of prompt_tokens)
+    cached_tokens: int = 0
 
 
 @dataclass(slots=True)
@@ -43,6 +45,8 @@ class ChatResponse:
     choices: List[ChatChoice]
     usage: Optional[Usage] = None
     created: Optional[int] = None
+    # Transport timing reported by the client (util.http.Timing for ChatGPT); opaque to this module
+    timing: Optional[Any] = None
 
 
 class LLM(Protocol):
@@ -60,6 +64,10 @@ class LLM(Protocol):
         """
         ...
 
+    # Optional streaming interface; yields content deltas as they arrive
+    def chat_stream(self, request: ChatRequest) -> Iterator[str]:  # pragma: no cover
+        ...
+
     # Optional async interface; implement if the client supports it
     async def async_chat(self, request: ChatRequest) -> ChatResponse:  # pragma: no cover
         ...
@@ -3,13 +3,10 @@ from __future__ import annotations
 import json
 import os
 import time
-import urllib.request
-try:
-    import tiktoken  # type: ignore
-except Exception:  # optional dependency; used only for counting
-    tiktoken = None  # type: ignore
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence, Literal
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Literal
+
+from util.http import AsyncConnectionPool, ConnectionPool, StreamingResponse, Timing
 
 from .llm import (
     ChatChoice,
@@ -19,6 +16,7 @@ from .llm import (
     Message,
     Usage,
 )
+from .tokens import COUNTER, Prompt, TokenCounter
 
 
 OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1")
@@ -51,6 +49,10 @@ class ChatGPTConfig:
     default_model: str = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
     api_key: Optional[str] = os.environ.get(OPENAI_API_KEY_ENV)
     timeout: float = 60.0
+    max_in_flight: int = 32
+    # Keep-alive connections kept open per API host, and how long an idle one may live
+    pool_size: int = 8
+    idle_timeout: float = 30.0
 
 
 class _Message(Message):
@@ -85,6 +87,7 @@ class _Usage(Usage):
             prompt_tokens=int(data.get("prompt_tokens", 0)),
             completion_tokens=int(data.get("completion_tokens", 0)),
             total_tokens=int(data.get("total_tokens", 0)),
+            cached_tokens=int((data.get("prompt_tokens_details") or {}).get("cached_tokens", 0)),
         ) if data else None
 
 
@@ -94,8 +97,14 @@ Usage = _Usage
 
 
 class ChatGPT(LLM):
-    def __init__(self, config: Optional[ChatGPTConfig] = None) -> None:
+    def __init__(self, config: Optional[ChatGPTConfig] = None, tokens: TokenCounter = COUNTER) -> None:
         self.config = config or ChatGPTConfig()
+        self.tokens = tokens
+        cfg = self.config
+        self.pool = ConnectionPool(max_idle=cfg.pool_size, idle_timeout=cfg.idle_timeout, timeout=cfg.timeout)
+        self.async_pool = AsyncConnectionPool(
+            max_in_flight=cfg.max_in_flight, max_idle=cfg.pool_size, idle_timeout=cfg.idle_timeout, timeout=cfg.timeout
+        )
 
     def make_request_headers(self) -> Dict[str, str]:
         return {
@@ -112,11 +121,12 @@ class ChatGPT(LLM):
             "messages": [get_msg_dict(m) for m in request.messages],
             "temperature": request.temperature,
             "max_tokens": request.max_tokens,
-            "stream": False,
+            "stream": request.stream,
+            "stream_options": {"include_usage": True} if request.stream else None,
         }
         return {k: v for k, v in payload.items() if v is not None}
 
-    def parse_response(self, response_data: Dict, model: str, start_time: int) -> ChatResponse:
+    def parse_response(self, response_data: Dict, model: str, start_time: int, timing: Optional[Timing] = None) -> ChatResponse:
         choices = [
             ChatChoice.from_dict(ch, i)
             for i, ch in enumerate(response_data.get("choices", []))
@@ -130,42 +140,72 @@ class ChatGPT(LLM):
             choices=choices,
             usage=usage_obj,
             created=response_data.get("created", start_time),
+            timing=timing,
         )
 
     def chat(self, request: ChatRequest) -> ChatResponse:
+        if request.stream:
+            with self.chat_stream(request) as stream:
+                for _ in stream:
+                    pass
+            return stream.response  # type: ignore[return-value]
+
         model = request.model or self.config.default_model
-        url = f"{OPENAI_API_BASE}/chat/completions"
-        
-        headers = self.make_request_headers()
         payload = self.build_payload(request, model)
-        data = json.dumps(payload).encode("utf-8")
-        
-        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
         start_time = int(time.time())
-        
-        with urllib.request.urlopen(req, timeout=self.config.timeout) as resp:
-            response_data = json.loads(resp.read().decode("utf-8"))
-            
-        return self.parse_response(response_data, model, start_time)
+
+        resp = self.pool.request(
+            "POST",
+            f"{OPENAI_API_BASE}/chat/completions",
+            headers=self.make_request_headers(),
+            body=json.dumps(payload).encode("utf-8"),
+        )
+        return self.parse_response(resp.raise_for_status().json(), model, start_time, resp.timing)
+
+    def chat_stream(self, request: ChatRequest) -> "ChatStream":
+        """Start a streamed completion; iterate the result for content deltas as they arrive."""
+        model = request.model or self.config.default_model
+        payload = self.build_payload(replace(request, stream=True), model)
+        start_time = int(time.time())
+
+        resp = self.pool.open(
+            "POST",
+            f"{OPENAI_API_BASE}/chat/completions",
+            headers={**self.make_request_headers(), "Accept": "text/event-stream"},
+            body=json.dumps(payload).encode("utf-8"),
+        )
+        return ChatStream(resp.raise_for_status(), model, start_time)
 
     async def async_chat(self, request: ChatRequest) -> ChatResponse:
-        return self.chat(request)
+        model = request.model or self.config.default_model
+        payload = self.build_payload(replace(request, stream=False), model)
+        start_time = int(time.time())
+
+        resp = await self.async_pool.request(
+            "POST",
+            f"{OPENAI_API_BASE}/chat/completions",
+            headers=self.make_request_headers(),
+            body=json.dumps(payload).encode("utf-8"),
+        )
+        return self.parse_response(resp.raise_for_status().json(), model, start_time, resp.timing)
+
+    def close(self) -> None:
+        self.pool.close()
+
+    async def aclose(self) -> None:
+        await self.async_pool.aclose()
 
     def count_prompt_tokens(self, messages: Sequence[Message], model: Optional[str] = None) -> int:
-        model = model or self.config.default_model
-        if tiktoken is not None:  # type: ignore
-            try:
-                enc = tiktoken.encoding_for_model(model)  # type: ignore[attr-defined]
-            except Exception:
-                enc = tiktoken.get_encoding("cl100k_base")  # type: ignore[attr-defined]
-            return sum(len(enc.encode(getattr(m, "content", ""))) for m in messages)
-        # Fallback approximation: 1 token ~= 4 chars
-        text = " ".join(getattr(m, "content", "") for m in messages)
-        return max(1, len(text) // 4)
+        return self.tokens.count_messages(messages, model or self.config.default_model)
+
+    def count_prompt_tokens_batch(self, prompts: Iterable[Prompt], model: Optional[str] = None) -> List[int]:
+        return self.tokens.count_batch(prompts, model or self.config.default_model)
 
     def unit_price(self, model: str, kind: Literal["input", "cached_input", "output"]) -> float:
-        return float(rate.get(kind, rate)) if (rate := PROMPT_RATES.get(model)) is not None \
-            else float('nan')
+        if (rate := PROMPT_RATES.get(model)) is None:
+            return float('nan')
+        # Flat-rate models bill every kind at one rate; models without a cached rate bill cached input as input
+        return float(rate.get(kind, rate.get("input", float('nan')))) if isinstance(rate, dict) else float(rate)
 
     def price_tokens(self, token_count: int, model: Optional[str], kind: Literal["input", "cached_input", "output"]) -> float:
         model_name = model or self.config.default_model
@@ -180,6 +220,91 @@ class ChatGPT(LLM):
     def price_for_output_tokens(self, token_count: int, model: Optional[str] = None) -> float:
         return self.price_tokens(token_count, model, "output")
 
+    def price_for_usage(self, usage: Usage, model: Optional[str] = None) -> float:
+        """Price a completed call, billing cached prompt tokens at the cached-input rate."""
+        uncached = max(0, usage.prompt_tokens - usage.cached_tokens)
+        return (
+            self.price_for_prompt_tokens(uncached, model)
+            + self.price_for_cached_prompt_tokens(usage.cached_tokens, model)
+            + self.price_for_output_tokens(usage.completion_tokens, model)
+        )
+
     def price_for_prompt(self, messages: Sequence[Message], model: Optional[str] = None) -> float:
         prompt_token_count = self.count_prompt_tokens(messages, model=model)
         return self.price_for_prompt_tokens(prompt_token_count, model=model)
+
+
+def iter_sse_data(lines: Iterable[bytes]) -> Iterator[str]:
+    """Yield the `data` payload of each server-sent event."""
+    data: List[str] = []
+    for raw in lines:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield "\n".join(data)
+            data = []
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip(" "))
+    if data:
+        yield "\n".join(data)
+
+
+class ChatStream:
+    """Iterator of content deltas for a streamed completion.
+
+    Once the stream is exhausted, `response` holds the assembled ChatResponse
+    (including usage when the server reports it) and `first_token` the seconds
+    from request start to the first content delta.
+    """
+
+    def __init__(self, resp: StreamingResponse, model: str, start_time: int) -> None:
+        self.resp = resp
+        self.model = model
+        self.start_time = start_time
+        self.first_token: Optional[float] = None
+        self.response: Optional[ChatResponse] = None
+
+    def __enter__(self) -> "ChatStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.resp.close()
+
+    def __iter__(self) -> Iterator[str]:
+        meta: Dict = {}
+        contents: Dict[int, List[str]] = {}
+        finish: Dict[int, Optional[str]] = {}
+        usage = None
+        try:
+            for data in iter_sse_data(iter(self.resp.readline, b"")):
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                meta = meta or {k: chunk.get(k) for k in ("id", "model", "created")}
+                usage = chunk.get("usage") or usage
+                for ch in chunk.get("choices", []):
+                    index = ch.get("index", 0)
+                    finish[index] = ch.get("finish_reason") or finish.get(index)
+                    if delta := (ch.get("delta") or {}).get("content"):
+                        if self.first_token is None:
+                            self.first_token = time.perf_counter() - self.resp.started
+                        contents.setdefault(index, []).append(delta)
+                        if index == 0:
+                            yield delta
+            self.resp.read()  # drain the chunked terminator so the connection can be reused
+        finally:
+            self.close()
+        self.response = ChatResponse(
+            id=meta.get("id"),
+            model=meta.get("model") or self.model,
+            choices=[
+                ChatChoice(index=i, message=Message("assistant", "".join(contents.get(i, []))), finish_reason=finish.get(i))
+                for i in sorted(set(contents) | set(finish))
+            ],
+            usage=Usage.from_dict(usage or {}),
+            created=meta.get("created") or self.start_time,
+            timing=self.resp.timing,
+        )
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .llm import Message, Role
+
+
+@dataclass
+class Section:
+    """A trimmable block of a prompt.
+
+    `items` are the units that can be dropped (paragraphs, experience entries, ...),
+    `render` turns the kept items (in original order) into text, and `scores` rank
+    their value; the lowest `score * weight` is dropped first, and sections with a
+    higher `priority` are only touched once lower ones are down to `keep` items.
+    """
+    name: str
+    items: Sequence[object]
+    render: Callable[[List[object]], str]
+    scores: Optional[Sequence[float]] = None
+    weight: float = 1.0
+    keep: int = 0
+    priority: int = 0
+
+
+@dataclass
+class Dropped:
+    section: str
+    index: int
+    tokens: int
+    preview: str
+
+
+@dataclass
+class AssembledPrompt:
+    text: str
+    tokens: int
+    budget: Optional[int]
+    dropped: List[Dropped] = field(default_factory=list)
+    messages: List[Message] = field(default_factory=list)
+
+    @property
+    def fits(self) -> bool:
+        return self.budget is None or self.tokens <= self.budget
+
+
+Part = Union[str, Section]
+Block = Tuple[Role, Sequence[Part]]
+
+
+def render(parts: Sequence[Part], kept: Dict[str, List[int]]) -> str:
+    return "".join(
+        p if isinstance(p, str) else p.render([p.items[i] for i in kept[p.name]])
+        for p in parts
+    )
+
+
+def item_costs(section: Section, count: Callable[[str], int]) -> List[float]:
+    """Per-item token cost, scaled so the items add up to the section's rendered size (separators included)."""
+    empty = count(section.render([]))
+    raw = [max(0, count(section.render([item])) - empty) for item in section.items]
+    total = count(section.render(list(section.items))) - empty
+    scale = total / sum(raw) if sum(raw) else 1.0
+    return [c * scale for c in raw]
+
+
+def assemble_messages(blocks: Sequence[Block], budget: Optional[int], count: Callable[[str], int]) -> AssembledPrompt:
+    """Render one message per (role, parts) block, dropping the lowest-value section items
+    until the messages fit in `budget` tokens.
+
+    Item costs are counted once up front to pick a drop set; the whole prompt is
+    recounted whenever the running estimate fits, and trimming continues if the
+    estimate was optimistic.
+    """
+    sections = [p for _, parts in blocks for p in parts if isinstance(p, Section)]
+    kept = {s.name: list(range(len(s.items))) for s in sections}
+    dropped: List[Dropped] = []
+
+    def build() -> AssembledPrompt:
+        messages = [Message(role, render(parts, kept)) for role, parts in blocks]
+        tokens = sum(count(m.content) for m in messages)
+        return AssembledPrompt("".join(m.content for m in messages), tokens, budget, list(dropped), messages)
+
+    result = build()
+    if result.fits:
+        return result
+
+    trimmable = [s for s in sections if s.scores is not None]
+    costs = {s.name: item_costs(s, count) for s in trimmable}
+    candidates = sorted(
+        ((s.priority, s.weight * s.scores[i], s.name, i, s) for s in trimmable for i in range(len(s.items))),  # type: ignore[index]
+        key=lambda c: c[:2],
+    )
+    estimate: float = result.tokens
+    for _, _, name, index, section in candidates:
+        if len(kept[name]) <= section.keep:
+            continue
+        if estimate <= budget:  # type: ignore[operator]
+            result = build()
+            if result.fits:
+                return result
+            estimate = result.tokens
+        cost = costs[name][index]
+        kept[name].remove(index)
+        estimate -= cost
+        dropped.append(Dropped(name, index, round(cost), section.render([section.items[index]])[:80]))
+    return build()
+
+
+def assemble(parts: Sequence[Part], budget: Optional[int], count: Callable[[str], int]) -> AssembledPrompt:
+    """Single user-message form of assemble_messages."""
+    return assemble_messages([("user", parts)], budget, count)
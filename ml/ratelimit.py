@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, TypeVar
+
+from util.http import HTTPStatusError
+
+from .llm import LLM, ChatRequest, ChatResponse
+
+
+log = logging.getLogger(__name__)
+
+RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute`.
+
+    reserve() debits immediately (the balance may go negative) and returns how long
+    the caller must wait before using what it reserved, so sync and async callers
+    share the same bucket and are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= amount
+            return max(0.0, -self.level / self.rate) if self.rate > 0 else 0.0
+
+    def refund(self, amount: float) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute admission, plus a shared pause after a 429."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None) -> None:
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and `tokens` tokens; return the seconds to wait before sending."""
+        waits = [
+            self.requests.reserve(1) if self.requests else 0.0,
+            self.tokens.reserve(tokens) if self.tokens else 0.0,
+            self.paused_until - time.monotonic(),
+        ]
+        return max(0.0, *waits)
+
+    def settle(self, reserved: int, used: Optional[int]) -> None:
+        """Return the unused part of a token reservation once actual usage is known."""
+        if self.tokens and used is not None and used < reserved:
+            self.tokens.refund(reserved - used)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: int) -> None:
+        if (delay := self.reserve(tokens)) > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: int) -> None:
+        if (delay := self.reserve(tokens)) > 0:
+            await asyncio.sleep(delay)
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After (or retry-after-ms) header on an HTTPStatusError, if any."""
+    headers = getattr(exc, "headers", None) or {}
+    if (ms := headers.get("retry-after-ms")) is not None:
+        try:
+            return float(ms) / 1000.0
+        except ValueError:
+            pass
+    if (value := headers.get("retry-after")) is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retryable(exc: BaseException) -> bool:
+    if isinstance(exc, HTTPStatusError):
+        return exc.status in RETRY_STATUSES
+    return isinstance(exc, (ConnectionError, TimeoutError, asyncio.TimeoutError))
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, exc: BaseException) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        jitter = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(jitter, retry_after(exc) or 0.0)
+
+
+class SettledStream:
+    """Wraps a streamed completion so its token reservation is settled once the stream ends.
+
+    Usage is only known after the last chunk, so a stream that is closed early
+    (or whose server reports no usage) stays charged at its full reservation.
+    """
+
+    def __init__(self, stream, limiter: RateLimiter, reserved: int) -> None:
+        self.stream = stream
+        self.limiter = limiter
+        self.reserved = reserved
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+    def __enter__(self) -> "SettledStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if close := getattr(self.stream, "close", None):
+            close()
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.stream
+        response = getattr(self.stream, "response", None)
+        usage = response.usage if response else None
+        self.limiter.settle(self.reserved, usage.total_tokens if usage else None)
+
+
+class RateLimitedLLM:
+    """LLM wrapper that paces calls under RPM/TPM limits and retries 429/5xx with backoff.
+
+    Admission charges count_prompt_tokens + max_tokens against the TPM bucket and
+    refunds the difference once the response's usage is known (for streams, once
+    the stream is exhausted); a failed attempt gives its tokens back before the
+    retry reserves again. One limiter can be shared by several wrappers, threads
+    and event loops.
+    """
+
+    def __init__(
+        self,
+        llm: LLM,
+        limiter: Optional[RateLimiter] = None,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        default_max_tokens: int = 1024,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.llm = llm
+        self.limiter = limiter or RateLimiter()
+        self.retry = retry or RetryPolicy()
+        self.default_max_tokens = default_max_tokens
+        self.sleep = sleep
+
+    def __getattr__(self, name: str):
+        return getattr(self.llm, name)
+
+    def cost(self, request: ChatRequest) -> int:
+        return self.llm.count_prompt_tokens(request.messages, request.model) + (request.max_tokens or self.default_max_tokens)
+
+    def _failed(self, attempt: int, exc: BaseException) -> float:
+        if attempt >= self.retry.max_retries or not retryable(exc):
+            raise exc
+        delay = self.retry.delay(attempt, exc)
+        if isinstance(exc, HTTPStatusError) and exc.status == 429:
+            self.limiter.pause(delay)
+        log.warning("LLM call failed (%s); retry %d/%d in %.1fs", exc, attempt + 1, self.retry.max_retries, delay)
+        return delay
+
+    def _call(self, request: ChatRequest, send: Callable[[ChatRequest], T], tokens: int) -> T:
+        for attempt in range(self.retry.max_retries + 1):
+            if (delay := self.limiter.reserve(tokens)) > 0:
+                self.sleep(delay)
+            try:
+                return send(request)
+            except Exception as exc:
+                self.limiter.settle(tokens, 0)
+                self.sleep(self._failed(attempt, exc))
+        raise AssertionError("unreachable")
+
+    def chat(self, request: ChatRequest) -> ChatResponse:
+        tokens = self.cost(request)
+        result = self._call(request, self.llm.chat, tokens)
+        self.limiter.settle(tokens, result.usage.total_tokens if result.usage else None)
+        return result
+
+    def chat_stream(self, request: ChatRequest) -> SettledStream:
+        # Retries cover opening the stream; errors after the first delta surface to the caller
+        tokens = self.cost(request)
+        return SettledStream(self._call(request, self.llm.chat_stream, tokens), self.limiter, tokens)  # type: ignore[attr-defined]
+
+    async def async_chat(self, request: ChatRequest) -> ChatResponse:
+        tokens = self.cost(request)
+        for attempt in range(self.retry.max_retries + 1):
+            await self.limiter.acquire_async(tokens)
+            try:
+                result = await self.llm.async_chat(request)
+            except Exception as exc:
+                self.limiter.settle(tokens, 0)
+                await asyncio.sleep(self._failed(attempt, exc))
+                continue
+            self.limiter.settle(tokens, result.usage.total_tokens if result.usage else None)
+            return result
+        raise AssertionError("unreachable")
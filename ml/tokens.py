@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
+
+try:
+    import tiktoken  # type: ignore
+except Exception:  # optional dependency; the estimator is used without it
+    tiktoken = None  # type: ignore
+
+from .llm import Message
+
+
+FALLBACK_ENCODING = "cl100k_base"
+ESTIMATE = "estimate"
+
+# Approximates the GPT BPE pre-tokenizer: contractions, letter runs (with one leading
+# space/symbol), 1-3 digit groups, punctuation runs and whitespace. Most pieces are one
+# token; long letter runs split roughly every CHARS_PER_TOKEN characters.
+PIECES = re.compile(r"'(?:[sdmt]|ll|ve|re)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+")
+LONG_WORDS = re.compile(r"[^\W\d_]{9,}")
+CHARS_PER_TOKEN = 4.5
+
+Prompt = Union[str, Sequence[Message]]
+
+
+@lru_cache(maxsize=None)
+def encoder_for(model: str):
+    """Load (once per model) the tiktoken encoding for a model, or None without tiktoken."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)  # type: ignore[attr-defined]
+    except Exception:
+        return tiktoken.get_encoding(FALLBACK_ENCODING)  # type: ignore[attr-defined]
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast tiktoken-free estimate of BPE token count."""
+    if not text:
+        return 0
+    extra = sum(math.ceil(len(w) / CHARS_PER_TOKEN) - 1 for w in LONG_WORDS.findall(text))
+    return len(PIECES.findall(text)) + extra
+
+
+def prompt_texts(prompt: Prompt) -> List[str]:
+    return [prompt] if isinstance(prompt, str) else [getattr(m, "content", "") for m in prompt]
+
+
+class CacheInfo(NamedTuple):
+    """Like functools' CacheInfo: texts answered without encoding, texts encoded, and entry counts."""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class TokenCounter:
+    """Token counts with cached encoders and per-content memoization.
+
+    Counts are memoized by (encoding, content hash), so re-counting a conversation
+    where only the last message changed encodes just that message.
+    """
+
+    def __init__(self, *, max_entries: int = 100_000, workers: int = 8) -> None:
+        self.max_entries = max_entries
+        self.workers = workers
+        self._counts: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+
+    def _key(self, encoding: str, text: str) -> tuple:
+        return encoding, len(text), hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _remember(self, key: tuple, count: int) -> None:
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def _recall(self, key: tuple) -> Optional[int]:
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
+    def count_text(self, text: str, model: str) -> int:
+        return self.count_texts([text], model)[0]
+
+    def count_texts(self, texts: Sequence[str], model: str) -> List[int]:
+        """Count each text; unseen texts are encoded together (in worker threads when tiktoken is present)."""
+        enc = encoder_for(model)
+        name = enc.name if enc is not None else ESTIMATE
+        keys = [self._key(name, t) for t in texts]
+        counts = [self._recall(k) for k in keys]
+        missing = {k: t for k, t, c in zip(keys, texts, counts) if c is None}
+        with self._lock:
+            self._hits += len(texts) - len(missing)
+            self._misses += len(missing)
+        if missing:
+            todo = list(missing.values())
+            fresh = (
+                [len(tokens) for tokens in enc.encode_ordinary_batch(todo, num_threads=self.workers)]
+                if enc is not None
+                else [estimate_tokens(t) for t in todo]
+            )
+            for key, count in zip(missing, fresh):
+                self._remember(key, count)
+            found = dict(zip(missing, fresh))
+            counts = [found[k] if c is None else c for k, c in zip(keys, counts)]
+        return counts  # type: ignore[return-value]
+
+    def count_messages(self, messages: Sequence[Message], model: str) -> int:
+        return sum(self.count_texts(prompt_texts(messages), model))
+
+    def count_batch(self, prompts: Iterable[Prompt], model: str) -> List[int]:
+        """Token counts for many prompts (strings or message lists) in one call."""
+        texts_per_prompt = [prompt_texts(p) for p in prompts]
+        flat = [t for texts in texts_per_prompt for t in texts]
+        counts = iter(self.count_texts(flat, model))
+        return [sum(next(counts) for _ in texts) for texts in texts_per_prompt]
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.max_entries, len(self._counts))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._hits = self._misses = 0
+
+
+COUNTER = TokenCounter()
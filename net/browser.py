@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-from typing import List, Tuple, Dict
-from urllib.parse import urljoin
+import asyncio
+import atexit
+import re
+import threading
+import weakref
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Dict
+from urllib.parse import urljoin, urlsplit
 
+from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright
 from pathlib import Path
-from .web import collect_fields_from_page, build_payload, parse_submit_hints_from_html
+from .web import (
+    Readiness, collect_fields_from_page, collect_fields_from_page_async, build_payload, derive_base_filename, load_state,
+    parse_submit_hints_from_html, wait_until_ready, wait_until_ready_async,
+)
 from .form import values_from_defaults
 
 # Common selectors (DRY)
@@ -15,16 +26,462 @@ APPLY_SELECTOR = (
     "a:has-text('Submit'), a:has-text('Apply'), "
     f"{SUBMIT_SELECTOR}"
 )
-class Browser:
-    def __init__(self, *, headless: bool = True, engine: str = "chromium") -> None:
+LAUNCH_ARGS = ["--no-sandbox", "--disable-dev-shm-usage"]
+
+
+def field_selector(key: str) -> str:
+    """A visible input, textarea or select whose name, id or aria-label is `key`."""
+    return ",".join(
+        f":is(input:not([type=hidden]), textarea, select)[{attr}='{key}']" for attr in ("name", "id", "aria-label")
+    )
+
+
+def browser_memory_mb(browser) -> Optional[float]:
+    """Resident memory of a Chromium browser's processes (via CDP and /proc); None where unavailable."""
+    try:
+        session = browser.new_browser_cdp_session()
+        try:
+            processes = session.send("SystemInfo.getProcessInfo")["processInfo"]
+        finally:
+            session.detach()
+    except Exception:
+        return None
+    kb = 0
+    for process in processes:
+        try:
+            status = Path(f"/proc/{process['id']}/status").read_text()
+        except OSError:
+            continue
+        if m := re.search(r"VmRSS:\s+(\d+) kB", status):
+            kb += int(m.group(1))
+    return kb / 1024 if kb else None
+
+
+# Fills a {key: value} map in one round trip and returns {key: status}: "filled", "selected",
+# "checked"/"unchecked", "skipped" (no value, or a non-bool for a checkbox), "error: ...",
+# or "file"/"missing" for keys left to Playwright. Keys match the first visible control with
+# that name, id or aria-label, as field_selector() does. Values go through the native setter
+# with bubbling input/change events so React-style forms see them; checkboxes are clicked.
+FILL_SCRIPT = """values => {
+    const byKey = new Map();
+    for (const el of document.querySelectorAll("input:not([type=hidden]), textarea, select")) {
+        for (const attr of ["name", "id", "aria-label"]) {
+            const key = el.getAttribute(attr);
+            if (key !== null && !byKey.has(key)) byKey.set(key, el);
+        }
+    }
+    const setValue = (el, value) => {
+        const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), "value")?.set;
+        setter ? setter.call(el, value) : (el.value = value);
+        el.dispatchEvent(new Event("input", {bubbles: true}));
+        el.dispatchEvent(new Event("change", {bubbles: true}));
+    };
+    const report = {};
+    for (const [key, value] of Object.entries(values)) {
+        const el = byKey.get(key);
+        if (!el) { report[key] = "missing"; continue; }
+        const type = (el.getAttribute("type") || "").toLowerCase();
+        if (type === "file") { report[key] = "file"; continue; }
+        if (type === "checkbox" || type === "radio") {
+            if (typeof value !== "boolean") { report[key] = "skipped"; continue; }
+            if (el.checked !== value) el.click();
+            report[key] = el.checked === value ? (value ? "checked" : "unchecked") : "error: state did not change";
+            continue;
+        }
+        if (value === null) { report[key] = "skipped"; continue; }
+        const text = typeof value === "boolean" ? (value ? "True" : "False") : String(value);
+        if (el.tagName.toLowerCase() === "select") {
+            const options = Array.from(el.options);
+            const option = options.find(o => o.value === text) || options.find(o => o.label === text);
+            if (!option) { report[key] = `error: no option ${text}`; continue; }
+            setValue(el, option.value);
+            report[key] = "selected";
+            continue;
+        }
+        setValue(el, text);
+        report[key] = "filled";
+    }
+    return report;
+}"""
+
+
+def fill_payload(values: Dict[str, object]) -> Dict[str, object]:
+    """FILL_SCRIPT's argument: bools and None kept as they are, everything else as str()."""
+    return {k: v if v is None or isinstance(v, bool) else str(v) for k, v in values.items()}
+
+
+def file_paths(val: object) -> List[str]:
+    return [str(v) for v in val] if isinstance(val, (list, tuple)) else ([str(val)] if val else [])
+
+
+# Analytics, tag managers, session replay and chat widgets seen on ATS pages. Form
+# providers (HubSpot's hsforms.net, for one) stay off the list: they serve the forms.
+TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com", "facebook.net",
+    "connect.facebook.net", "hotjar.com", "segment.io", "segment.com", "fullstory.com", "clarity.ms", "mixpanel.com",
+    "amplitude.com", "heap.io", "heapanalytics.com", "newrelic.com", "nr-data.net", "sentry.io", "datadoghq.com",
+    "bat.bing.com", "ads.linkedin.com", "px.ads.linkedin.com", "snap.licdn.com",
+    "intercom.io", "intercomcdn.com", "drift.com", "driftt.com", "zdassets.com", "zopim.com", "livechatinc.com",
+    "hs-scripts.com", "hs-analytics.net", "qualified.com",
+)
+# Consent banners; some ATS pages keep their form disabled until one has loaded
+CONSENT_HOSTS = ("onetrust.com", "cookielaw.org", "cookiebot.com", "trustarc.com")
+HOST_GROUPS: Dict[str, Tuple[str, ...]] = {"tracker": TRACKER_HOSTS, "consent": CONSENT_HOSTS}
+# profile -> (blocked resource types, blocked HOST_GROUPS); "<profile>+consent" adds a group
+BLOCK_PROFILES: Dict[str, Tuple[frozenset, frozenset]] = {
+    "none": (frozenset(), frozenset()),
+    "forms-only": (frozenset({"image", "media", "font"}), frozenset({"tracker"})),
+    "text-only": (frozenset({"image", "media", "font", "stylesheet"}), frozenset({"tracker"})),
+}
+
+
+def host_group(url: str, groups=HOST_GROUPS) -> Optional[str]:
+    """The HOST_GROUPS name `url`'s host (or a parent domain) belongs to, if any."""
+    host = (urlsplit(url).hostname or "").lower()
+    for name, hosts in groups.items():
+        if any(host == h or host.endswith("." + h) for h in hosts):
+            return name
+    return None
+
+
+def is_tracker(url: str) -> bool:
+    return host_group(url) == "tracker"
+
+
+@dataclass
+class BlockStats:
+    allowed: int = 0
+    blocked: Dict[str, int] = field(default_factory=dict)  # by resource type or HOST_GROUPS name
+
+    @property
+    def total_blocked(self) -> int:
+        return sum(self.blocked.values())
+
+
+class RequestBlocker:
+    """Route handler aborting the requests a BLOCK_PROFILES profile excludes, counted by reason.
+
+    Allowed requests fall back to other routes (or the network), so it combines with HAR replay.
+    """
+
+    def __init__(self, profile: str) -> None:
+        name, *extra = profile.split("+")
+        if name not in BLOCK_PROFILES:
+            raise ValueError(f"unknown block profile {name!r}; expected one of {', '.join(BLOCK_PROFILES)}")
+        if unknown := [g for g in extra if g not in HOST_GROUPS]:
+            raise ValueError(f"unknown host group {unknown[0]!r}; expected one of {', '.join(HOST_GROUPS)}")
+        self.profile = profile
+        self.types, groups = BLOCK_PROFILES[name]
+        self.groups = {g: HOST_GROUPS[g] for g in groups | set(extra)}
+        self.stats = BlockStats()
+
+    def reason(self, request) -> Optional[str]:
+        if request.resource_type in self.types:
+            return request.resource_type
+        return host_group(request.url, self.groups) if self.groups else None
+
+    def _count(self, route) -> bool:
+        if (why := self.reason(route.request)) is None:
+            self.stats.allowed += 1
+            return False
+        self.stats.blocked[why] = self.stats.blocked.get(why, 0) + 1
+        return True
+
+    def route(self, route) -> None:
+        route.abort("blockedbyclient") if self._count(route) else route.fallback()
+
+    async def route_async(self, route) -> None:
+        await (route.abort("blockedbyclient") if self._count(route) else route.fallback())
+
+
+def blocker_for(profile: Optional[str]) -> Optional[RequestBlocker]:
+    return RequestBlocker(profile) if profile and profile != "none" else None
+
+
+HAR_DIR = Path("target/har")
+
+
+def har_path(url: str) -> Path:
+    """Default archive location for a page: target/har/<host>_<name>.har.zip."""
+    return HAR_DIR / f"{derive_base_filename(url)}.har.zip"
+
+
+@dataclass
+class Archive:
+    """A HAR archive of a browser session, including the XHR/API traffic SPA forms need.
+
+    "record" captures a live context into `path` (written when the context closes);
+    "replay" serves responses from it through route interception, so runs are offline
+    and repeatable. Requests missing from the archive are aborted, or sent to the
+    network with missing="fallback". Service workers are blocked so every request is
+    seen by the router.
+    """
+    path: Path
+    mode: str = "replay"
+    missing: str = "abort"
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        if self.mode not in ("record", "replay") or self.missing not in ("abort", "fallback"):
+            raise ValueError(f"bad archive mode {self.mode!r} / missing {self.missing!r}")
+        if self.mode == "replay" and not self.path.exists():
+            raise FileNotFoundError(f"no recorded archive at {self.path}")
+
+    def context_options(self) -> Dict[str, Any]:
+        if self.mode == "replay":
+            return {"service_workers": "block"}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return {
+            "record_har_path": str(self.path),
+            "record_har_mode": "full",
+            "record_har_content": "attach" if self.path.suffix == ".zip" else "embed",
+            "service_workers": "block",
+        }
+
+    def attach(self, context) -> None:
+        if self.mode == "replay":
+            context.route_from_har(self.path, not_found=self.missing)
+
+    async def attach_async(self, context) -> None:
+        if self.mode == "replay":
+            await context.route_from_har(self.path, not_found=self.missing)
+
+
+def archive_for(record: Optional[Path | str], replay: Optional[Path | str]) -> Optional[Archive]:
+    if record and replay:
+        raise ValueError("record and replay are exclusive")
+    return Archive(Path(record), "record") if record else (Archive(Path(replay)) if replay else None)
+
+
+@dataclass
+class BrowserPoolStats:
+    launched: int = 0
+    recycled: int = 0
+    leases: int = 0
+    pages: int = 0
+    peak_pages: int = 0
+
+
+@dataclass
+class _PooledBrowser:
+    browser: Any
+    uses: int = 0
+    leases: int = 0
+    retired: bool = False
+
+
+class BrowserLease:
+    """One job's share of a pooled browser: a fresh BrowserContext and its first page,
+    recording to or replaying from `archive`, with requests filtered by `blocker`."""
+
+    def __init__(
+        self,
+        pool: "BrowserPool",
+        entry: _PooledBrowser,
+        context_options: Dict[str, Any],
+        blocker: Optional[RequestBlocker] = None,
+        archive: Optional[Archive] = None,
+    ) -> None:
+        self.pool = pool
+        self.entry = entry
+        self.browser = entry.browser
+        self.blocker = blocker
+        self.archive = archive
+        self.context = entry.browser.new_context(**{**(archive.context_options() if archive else {}), **context_options})
+        self.pages = 0
+        try:
+            if archive is not None:
+                archive.attach(self.context)
+            # Routes registered later run first: the blocker falls back to the archive
+            if blocker is not None:
+                self.context.route("**/*", blocker.route)
+            self.page = self.new_page()
+        except BaseException:
+            self.context.close()
+            raise
+
+    def __enter__(self) -> "BrowserLease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def new_page(self):
+        self.pool._reserve_page()
+        try:
+            page = self.context.new_page()
+        except BaseException:
+            self.pool._unreserve_pages(1)
+            raise
+        self.pages += 1
+        return page
+
+    def release(self) -> None:
+        if self.context is None:
+            return
+        context, self.context = self.context, None
+        try:
+            context.close()
+        finally:
+            self.pool._release(self)
+
+
+class BrowserPool:
+    """A few long-lived browsers that hand out a fresh context and page per job.
+
+    Leases go to the least busy browser, launching a new one while fewer than `size`
+    are running. At most `max_pages` pages are open across all leases. A browser is
+    retired after `max_uses` leases, or once its processes exceed `max_memory_mb`
+    (Chromium on Linux), and closed when its last lease is released. `block` names a
+    BLOCK_PROFILES profile applied to every lease unless lease(block=...) overrides it.
+    Playwright's sync objects belong to the thread that created them, so use one pool
+    per thread (default_pool() does this).
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int = 2,
+        max_pages: int = 8,
+        max_uses: int = 50,
+        max_memory_mb: Optional[float] = 1536,
+        headless: bool = True,
+        engine: str = "chromium",
+        block: Optional[str] = None,
+    ) -> None:
+        blocker_for(block)  # reject unknown profiles up front
+        self.size = size
+        self.max_pages = max_pages
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.headless = headless
+        self.engine = engine
+        self.block = block
+        self.stats = BrowserPoolStats()
         self.playwright = sync_playwright().start()
-        launcher = getattr(self.playwright, engine, self.playwright.chromium)
+        self._browsers: List[_PooledBrowser] = []
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _launch(self) -> _PooledBrowser:
+        launcher = getattr(self.playwright, self.engine, self.playwright.chromium)
         try:
-            self.browser = launcher.launch(headless=headless, args=["--no-sandbox", "--disable-dev-shm-usage"])  
+            browser = launcher.launch(headless=self.headless, args=LAUNCH_ARGS)
         except Exception:
             # Fallback to WebKit in restricted environments
-            self.browser = self.playwright.webkit.launch(headless=headless)
-        self.page = self.browser.new_page()
+            browser = self.playwright.webkit.launch(headless=self.headless)
+        entry = _PooledBrowser(browser)
+        self._browsers.append(entry)
+        self.stats.launched += 1
+        return entry
+
+    def lease(self, *, block: Optional[str] = None, archive: Optional[Archive] = None, **context_options) -> BrowserLease:
+        """A new context (new_context options pass through) with one open page; release() when done."""
+        blocker = blocker_for(block or self.block)
+        if self.stats.pages >= self.max_pages:
+            raise RuntimeError(f"browser pool page limit reached ({self.max_pages})")
+        live = [b for b in self._browsers if not b.retired]
+        entry = min(live, key=lambda b: b.leases, default=None)
+        if entry is None or (entry.leases and len(live) < self.size):
+            entry = self._launch()
+        entry.uses += 1
+        entry.leases += 1
+        self.stats.leases += 1
+        try:
+            return BrowserLease(self, entry, context_options, blocker, archive)
+        except BaseException:
+            entry.uses -= 1
+            entry.leases -= 1
+            self.stats.leases -= 1
+            raise
+
+    def _reserve_page(self) -> None:
+        if self.stats.pages >= self.max_pages:
+            raise RuntimeError(f"browser pool page limit reached ({self.max_pages})")
+        self.stats.pages += 1
+        self.stats.peak_pages = max(self.stats.peak_pages, self.stats.pages)
+
+    def _unreserve_pages(self, count: int) -> None:
+        self.stats.pages -= count
+
+    def _release(self, lease: BrowserLease) -> None:
+        entry = lease.entry
+        entry.leases -= 1
+        self._unreserve_pages(lease.pages)
+        if not entry.retired:
+            over_memory = self.max_memory_mb is not None and (browser_memory_mb(entry.browser) or 0) > self.max_memory_mb
+            entry.retired = entry.uses >= self.max_uses or over_memory
+        if entry.retired and entry.leases == 0:
+            self._browsers.remove(entry)
+            self.stats.recycled += 1
+            suppress_errors(entry.browser.close)
+
+    def close(self) -> None:
+        browsers, self._browsers = self._browsers, []
+        try:
+            for entry in browsers:
+                suppress_errors(entry.browser.close)
+        finally:
+            self.playwright.stop()
+
+
+_pools = threading.local()
+
+
+def default_pool(*, headless: bool = True, engine: str = "chromium") -> BrowserPool:
+    """This thread's shared pool for the given launch options, started on first use.
+
+    Only the owning thread can close it: the main thread's pools are closed at exit,
+    and other threads call close_default_pools() before they finish.
+    """
+    pools = _pools.__dict__.setdefault("pools", {})
+    if (pool := pools.get((headless, engine))) is None:
+        pool = pools[(headless, engine)] = BrowserPool(headless=headless, engine=engine)
+    return pool
+
+
+def close_default_pools() -> None:
+    """Close the calling thread's default pools (their browsers and Playwright driver)."""
+    pools = _pools.__dict__.pop("pools", {})
+    for pool in pools.values():
+        suppress_errors(pool.close)
+
+
+# atexit runs on the main thread, so this closes the main thread's pools
+atexit.register(close_default_pools)
+
+
+class Browser:
+    """A page leased from a BrowserPool (the thread's default pool unless `pool` is given);
+    close() releases the lease and leaves the browser running for the next job. `block`
+    picks a request blocking profile ("forms-only", "text-only", "forms-only+consent"); see `blocker.stats`.
+    `record` / `replay` name a HAR archive to capture the session into or serve it from
+    (see Archive)."""
+
+    def __init__(
+        self,
+        *,
+        headless: bool = True,
+        engine: str = "chromium",
+        pool: Optional[BrowserPool] = None,
+        block: Optional[str] = None,
+        record: Optional[Path | str] = None,
+        replay: Optional[Path | str] = None,
+        **context_options,
+    ) -> None:
+        archive = archive_for(record, replay)
+        pool = pool or default_pool(headless=headless, engine=engine)
+        self.lease = pool.lease(block=block, archive=archive, **context_options)
+        self.blocker = self.lease.blocker
+        self.waits: List[Readiness] = []
+        self.playwright = pool.playwright
+        self.browser = self.lease.browser
+        self.context = self.lease.context
+        self.page = self.lease.page
 
     def __enter__(self) -> "Browser":
         return self
@@ -33,13 +490,19 @@ class Browser:
         self.close()
 
     def close(self) -> None:
-        try:
-            self.browser.close()
-        finally:
-            self.playwright.stop()
+        self.lease.release()
 
     def go_to(self, url: str, *, wait_until: str = "domcontentloaded", timeout_ms: int = 30_000) -> None:
-        self.page.goto(url, wait_until=wait_until, timeout=timeout_ms)
+        """Navigate; wait_until is a Playwright load state or "ready" (see wait_until_ready)."""
+        self.page.goto(url, wait_until=load_state(wait_until), timeout=timeout_ms)
+        if wait_until == "ready":
+            self.wait_until_ready(timeout_ms=timeout_ms)
+
+    def wait_until_ready(self, *, timeout_ms: int = 30_000, strategy: str = "ready", selector: Optional[str] = None) -> Readiness:
+        """net.web.wait_until_ready on this page; every wait is recorded in `waits`."""
+        readiness = wait_until_ready(self.page, timeout_ms=timeout_ms, strategy=strategy, selector=selector)
+        self.waits.append(readiness)
+        return readiness
 
     def save_html(self, path: Path = Path("target")) -> None:
         ((path / (self.page.url.split("?")[0].split("#")[0].split("/")[-1] + ".html"))
@@ -73,7 +536,7 @@ class Browser:
         url = self.get_link_containing(link_text, exact=exact)
         if not url:
             return ""
-        self.go_to(url, wait_until="networkidle", timeout_ms=timeout_ms)
+        self.go_to(url, wait_until="ready", timeout_ms=timeout_ms)
         return self.page.url
 
     # Backward-compatible alias
@@ -83,36 +546,54 @@ class Browser:
     def extract_labels(self) -> List[str]:
         return [t.strip() for t in self.page.locator("label").all_text_contents() if t.strip()]
 
-    def extract_inputs(self, *, timeout_ms: int = 30_000) -> List[Dict[str, str]]:
-        """Thin wrapper delegating to net.web.collect_fields_from_page."""
-        return collect_fields_from_page(self.page, timeout_ms=timeout_ms)
-
-    def fill_fields(self, values: Dict[str, object]) -> None:
-        for key, val in values.items():
-            sel = (
-                f":is(input:not([type=hidden]), textarea, select)[name='{key}'],"
-                f":is(input:not([type=hidden]), textarea, select)[id='{key}'],"
-                f":is(input:not([type=hidden]), textarea, select)[aria-label='{key}']"
-            )
-            locator = self.page.locator(sel)
-            if locator.count() == 0:
-                continue
-            loc = locator.first
-            tag = (loc.evaluate("e => e.tagName.toLowerCase()") or "").lower()
-            typ = (loc.get_attribute("type") or "").lower()
-
-            if typ == "file":
-                paths = [str(v) for v in val] if isinstance(val, (list, tuple)) else ([str(val)] if val else [])
-                if paths:
-                    loc.set_input_files(paths)
-                continue
-
-            if typ in ("checkbox", "radio"):
-                if isinstance(val, bool):
-                    suppress_errors(lambda: (loc.check if val else loc.uncheck)())
-                continue
-
-            (val is not None) and ((loc.select_option if tag == "select" else loc.fill)(str(val)))
+    def extract_inputs(self, *, timeout_ms: int = 30_000, wait: bool = True) -> List[Dict[str, str]]:
+        """Thin wrapper delegating to net.web.collect_fields_from_page, after a recorded ready wait."""
+        if wait:
+            self.wait_until_ready(timeout_ms=timeout_ms)
+        return collect_fields_from_page(self.page, timeout_ms=timeout_ms, wait=None)
+
+    def fill_fields(self, values: Dict[str, object], *, bulk: bool = True) -> Dict[str, str]:
+        """Fill fields by name, id or aria-label; returns a status per key (see FILL_SCRIPT).
+
+        bulk sets every value in one evaluate() and leaves only file inputs, and keys
+        not found in the light DOM, to Playwright (their errors are reported, not
+        raised). bulk=False fills field by field.
+        """
+        if not bulk:
+            return {key: self._fill_one(key, val) for key, val in values.items()}
+        report: Dict[str, str] = self.page.evaluate(FILL_SCRIPT, fill_payload(values))
+        for key, status in report.items():
+            if status in ("file", "missing"):
+                try:
+                    report[key] = self._fill_one(key, values[key])
+                except Exception as e:
+                    report[key] = f"error: {e}"
+        return report
+
+    def _fill_one(self, key: str, val: object) -> str:
+        locator = self.page.locator(field_selector(key))
+        if locator.count() == 0:
+            return "missing"
+        loc = locator.first
+        tag = (loc.evaluate("e => e.tagName.toLowerCase()") or "").lower()
+        typ = (loc.get_attribute("type") or "").lower()
+
+        if typ == "file":
+            paths = file_paths(val)
+            if paths:
+                loc.set_input_files(paths)
+            return "uploaded" if paths else "skipped"
+
+        if typ in ("checkbox", "radio"):
+            if not isinstance(val, bool):
+                return "skipped"
+            suppress_errors(lambda: (loc.check if val else loc.uncheck)())
+            return "checked" if val else "unchecked"
+
+        if val is None:
+            return "skipped"
+        (loc.select_option if tag == "select" else loc.fill)(str(val))
+        return "selected" if tag == "select" else "filled"
 
     
     def fill_with_defaults(self, *, timeout_ms: int = 60_000) -> Dict[str, object]:
@@ -128,19 +609,20 @@ class Browser:
         if submit.count() == 0:
             submit = self.page.locator(APPLY_SELECTOR)
         if submit.count() > 0:
-            with self.page.expect_navigation(wait_until=wait_until, timeout=timeout_ms):
+            with self.page.expect_navigation(wait_until=load_state(wait_until), timeout=timeout_ms):
                 submit.first.click()
-            return self.page.url
-
-        # 2) Programmatic submit on first form
-        forms = self.page.locator("form")
-        if forms.count() == 0:
-            return self.page.url
-        forms.first.evaluate("el => el.submit()")
-        return self.page.wait_for_load_state(wait_until, timeout=timeout_ms)
+        else:
+            # 2) Programmatic submit on first form
+            forms = self.page.locator("form")
+            if forms.count() == 0:
+                return self.page.url
+            forms.first.evaluate("el => el.submit()")
+        # The result page need not have a form, so "ready" only waits for the DOM to settle
+        self.wait_until_ready(timeout_ms=timeout_ms, strategy=wait_until, selector="")
+        return self.page.url
 
 
-    def submit_form(self, *, wait_until: str = "networkidle", timeout_ms: int = 60_000) -> str:
+    def submit_form(self, *, wait_until: str = "ready", timeout_ms: int = 60_000) -> str:
         return suppress_errors(lambda: self.__submit_form__(wait_until=wait_until, timeout_ms=timeout_ms))
 
     def extract_form_submit_info(self) -> Dict[str, object]:
@@ -172,7 +654,7 @@ class Browser:
         self,
         url: str,
         *,
-        wait_until: str = "networkidle",
+        wait_until: str = "ready",
         timeout_ms: int = 60_000,
         headless: bool = True,
         engine: str = "chromium",
@@ -182,12 +664,12 @@ class Browser:
         and return (data, files, raw_fields).
         """
         self.go_to(url, wait_until=wait_until, timeout_ms=timeout_ms)
-        fields = collect_fields_from_page(self.page, timeout_ms=timeout_ms)
+        fields = self.extract_inputs(timeout_ms=timeout_ms, wait=wait_until != "ready")
         # Try to find a form; if none, follow an Apply link, else fallback to SPA hints
         submit = self.extract_form_submit_info()
         if not submit["submit_buttons"] and self.get_link_containing("Apply"):
             self.go_to(self.get_link_containing("Apply") or url, wait_until=wait_until, timeout_ms=timeout_ms)
-            fields = collect_fields_from_page(self.page, timeout_ms=timeout_ms)
+            fields = self.extract_inputs(timeout_ms=timeout_ms, wait=wait_until != "ready")
             submit = self.extract_form_submit_info()
         if not submit["submit_buttons"]:
             html = self.page.content()
@@ -201,3 +683,307 @@ def suppress_errors(func):
         return func()
     except Exception:
         pass
+
+
+async def suppress_errors_async(awaitable):
+    try:
+        return await awaitable
+    except Exception:
+        pass
+
+
+# ---------- asyncio ----------
+
+@dataclass
+class _AsyncBrowserState:
+    playwright: Any
+    browser: Any
+    pages: asyncio.Semaphore
+
+
+class AsyncBrowserPool:
+    """One Playwright driver and browser per event loop, shared by every AsyncBrowser.
+
+    The browser starts on first use in a loop; at most `max_pages` pages are open at
+    once in that loop and further AsyncBrowsers wait for a slot. The loop's driver and
+    browser run until aclose() (`async with AsyncBrowserPool() as pool:` does this), or,
+    with auto_close=True, until the last AsyncBrowser open in the loop is closed.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_pages: int = 8,
+        headless: bool = True,
+        engine: str = "chromium",
+        block: Optional[str] = None,
+        auto_close: bool = False,
+    ) -> None:
+        blocker_for(block)  # reject unknown profiles up front
+        self.block = block
+        self.max_pages = max_pages
+        self.headless = headless
+        self.engine = engine
+        self.auto_close = auto_close
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Future]" = weakref.WeakKeyDictionary()
+        self._users: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = weakref.WeakKeyDictionary()
+
+    async def __aenter__(self) -> "AsyncBrowserPool":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _start(self) -> _AsyncBrowserState:
+        playwright = await async_playwright().start()
+        launcher = getattr(playwright, self.engine, playwright.chromium)
+        try:
+            browser = await launcher.launch(headless=self.headless, args=LAUNCH_ARGS)
+        except Exception:
+            # Fallback to WebKit in restricted environments
+            browser = await playwright.webkit.launch(headless=self.headless)
+        return _AsyncBrowserState(playwright, browser, asyncio.Semaphore(self.max_pages))
+
+    async def _state(self) -> _AsyncBrowserState:
+        loop = asyncio.get_running_loop()
+        if (started := self._states.get(loop)) is None:
+            # Concurrent first callers await the same launch
+            started = self._states[loop] = asyncio.ensure_future(self._start())
+        try:
+            return await started
+        except BaseException:
+            if self._states.get(loop) is started:
+                del self._states[loop]  # let the next caller retry the launch
+            raise
+
+    async def open(
+        self, *, blocker: Optional[RequestBlocker] = None, archive: Optional[Archive] = None, **context_options
+    ) -> Tuple[Any, Any]:
+        """A new (context, page) once a page slot is free; hand the context to release()."""
+        loop = asyncio.get_running_loop()
+        # Counted before the first await so an auto_close pool stays up while callers queue
+        self._users[loop] = self._users.get(loop, 0) + 1
+        try:
+            state = await self._state()
+            await state.pages.acquire()
+            try:
+                context = await state.browser.new_context(**{**(archive.context_options() if archive else {}), **context_options})
+                if archive is not None:
+                    await archive.attach_async(context)
+                if blocker is not None:
+                    await context.route("**/*", blocker.route_async)
+                return context, await context.new_page()
+            except BaseException:
+                state.pages.release()
+                raise
+        except BaseException:
+            await self._done(loop)
+            raise
+
+    async def release(self, context) -> None:
+        state = await self._state()
+        try:
+            await context.close()
+        finally:
+            state.pages.release()
+            await self._done(asyncio.get_running_loop())
+
+    async def _done(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._users[loop] -= 1
+        if self.auto_close and not self._users[loop]:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        started = self._states.pop(asyncio.get_running_loop(), None)
+        if started is None:
+            return
+        state = await started
+        try:
+            await state.browser.close()
+        finally:
+            await state.playwright.stop()
+
+
+@lru_cache(maxsize=None)
+def async_pool(*, headless: bool = True, engine: str = "chromium") -> AsyncBrowserPool:
+    """The shared default pool; it shuts a loop's browser down when its last AsyncBrowser closes."""
+    return AsyncBrowserPool(headless=headless, engine=engine, auto_close=True)
+
+
+class AsyncBrowser:
+    """Browser's form workflow on playwright.async_api, for many pages in one event loop.
+
+    Each instance is its own context and page from an AsyncBrowserPool, opened by the
+    first call that needs it, and holds one of its page slots until aclose():
+    `async with AsyncBrowser() as b: await b.go_to(url)`. With the default pool the
+    browser is shut down once no AsyncBrowser in the loop is open; pass a long-lived
+    `pool` to keep it running between batches.
+    """
+
+    def __init__(
+        self,
+        *,
+        headless: bool = True,
+        engine: str = "chromium",
+        pool: Optional[AsyncBrowserPool] = None,
+        block: Optional[str] = None,
+        record: Optional[Path | str] = None,
+        replay: Optional[Path | str] = None,
+        **context_options,
+    ) -> None:
+        self.pool = pool or async_pool(headless=headless, engine=engine)
+        self.blocker = blocker_for(block or self.pool.block)
+        self.archive = archive_for(record, replay)
+        self.context_options = context_options
+        self.context = None
+        self.page = None
+        self.waits: List[Readiness] = []
+
+    async def __aenter__(self) -> "AsyncBrowser":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def start(self) -> "AsyncBrowser":
+        await self._ensure_page()
+        return self
+
+    async def _ensure_page(self):
+        if self.page is None:
+            self.context, self.page = await self.pool.open(blocker=self.blocker, archive=self.archive, **self.context_options)
+        return self.page
+
+    async def aclose(self) -> None:
+        if self.context is not None:
+            context, self.context, self.page = self.context, None, None
+            await self.pool.release(context)
+
+    async def go_to(self, url: str, *, wait_until: str = "domcontentloaded", timeout_ms: int = 30_000) -> None:
+        page = await self._ensure_page()
+        await page.goto(url, wait_until=load_state(wait_until), timeout=timeout_ms)
+        if wait_until == "ready":
+            await self.wait_until_ready(timeout_ms=timeout_ms)
+
+    async def wait_until_ready(self, *, timeout_ms: int = 30_000, strategy: str = "ready", selector: Optional[str] = None) -> Readiness:
+        readiness = await wait_until_ready_async(await self._ensure_page(), timeout_ms=timeout_ms, strategy=strategy, selector=selector)
+        self.waits.append(readiness)
+        return readiness
+
+    async def get_link_containing(self, link_text: str, *, exact: bool = False) -> str | None:
+        page = await self._ensure_page()
+        locator = page.get_by_role("link", name=link_text) if exact else page.locator("a", has_text=link_text)
+        if await locator.count() == 0:
+            return None
+        url = await locator.first.get_attribute("href") or ""
+        return urljoin(page.url, url) if url else None
+
+    async def extract_inputs(self, *, timeout_ms: int = 30_000, wait: bool = True) -> List[Dict[str, str]]:
+        if wait:
+            await self.wait_until_ready(timeout_ms=timeout_ms)
+        return await collect_fields_from_page_async(await self._ensure_page(), timeout_ms=timeout_ms, wait=None)
+
+    async def fill_fields(self, values: Dict[str, object], *, bulk: bool = True) -> Dict[str, str]:
+        """Browser.fill_fields: a status per key, bulk in one evaluate() unless bulk=False."""
+        if not bulk:
+            return {key: await self._fill_one(key, val) for key, val in values.items()}
+        page = await self._ensure_page()
+        report: Dict[str, str] = await page.evaluate(FILL_SCRIPT, fill_payload(values))
+        for key, status in report.items():
+            if status in ("file", "missing"):
+                try:
+                    report[key] = await self._fill_one(key, values[key])
+                except Exception as e:
+                    report[key] = f"error: {e}"
+        return report
+
+    async def _fill_one(self, key: str, val: object) -> str:
+        locator = (await self._ensure_page()).locator(field_selector(key))
+        if await locator.count() == 0:
+            return "missing"
+        loc = locator.first
+        tag = (await loc.evaluate("e => e.tagName.toLowerCase()") or "").lower()
+        typ = (await loc.get_attribute("type") or "").lower()
+
+        if typ == "file":
+            paths = file_paths(val)
+            if paths:
+                await loc.set_input_files(paths)
+            return "uploaded" if paths else "skipped"
+
+        if typ in ("checkbox", "radio"):
+            if not isinstance(val, bool):
+                return "skipped"
+            await suppress_errors_async((loc.check if val else loc.uncheck)())
+            return "checked" if val else "unchecked"
+
+        if val is None:
+            return "skipped"
+        await (loc.select_option if tag == "select" else loc.fill)(str(val))
+        return "selected" if tag == "select" else "filled"
+
+    async def _submit_form(self, *, wait_until: str, timeout_ms: int) -> str:
+        page = await self._ensure_page()
+        submit = page.locator(SUBMIT_SELECTOR)
+        if await submit.count() == 0:
+            submit = page.locator(APPLY_SELECTOR)
+        if await submit.count() > 0:
+            async with page.expect_navigation(wait_until=load_state(wait_until), timeout=timeout_ms):
+                await submit.first.click()
+        else:
+            forms = page.locator("form")
+            if await forms.count() == 0:
+                return page.url
+            await forms.first.evaluate("el => el.submit()")
+        await self.wait_until_ready(timeout_ms=timeout_ms, strategy=wait_until, selector="")
+        return page.url
+
+    async def submit_form(self, *, wait_until: str = "ready", timeout_ms: int = 60_000) -> str:
+        return await suppress_errors_async(self._submit_form(wait_until=wait_until, timeout_ms=timeout_ms))
+
+    async def extract_form_submit_info(self) -> Dict[str, object]:
+        page = await self._ensure_page()
+        forms = page.locator("form")
+        if await forms.count() == 0:
+            return {
+                "action": page.url,
+                "method": "GET",
+                "enctype": "application/x-www-form-urlencoded",
+                "submit_buttons": [],
+            }
+        form = forms.first
+        action = await form.get_attribute("action") or ""
+        method = (await form.get_attribute("method") or "GET").upper()
+        enctype = await form.get_attribute("enctype") or "application/x-www-form-urlencoded"
+        submits = []
+        for el in await form.locator(SUBMIT_SELECTOR).all():
+            name = await el.get_attribute("name") or ""
+            value = await el.get_attribute("value") or (await el.inner_text() or "").strip()
+            submits.append({"name": name, "value": value})
+        return {
+            "action": urljoin(page.url, action) if action else page.url,
+            "method": method,
+            "enctype": enctype,
+            "submit_buttons": submits,
+        }
+
+    async def build_payload_from_url(
+        self,
+        url: str,
+        *,
+        wait_until: str = "ready",
+        timeout_ms: int = 60_000,
+    ) -> Tuple[Dict[str, str], Dict[str, Tuple[str, bytes, str]], List[Dict], Dict[str, object]]:
+        """Async Browser.build_payload_from_url: (data, files, raw_fields, submit info)."""
+        await self.go_to(url, wait_until=wait_until, timeout_ms=timeout_ms)
+        fields = await self.extract_inputs(timeout_ms=timeout_ms, wait=wait_until != "ready")
+        submit = await self.extract_form_submit_info()
+        if not submit["submit_buttons"] and (apply_url := await self.get_link_containing("Apply")):
+            await self.go_to(apply_url, wait_until=wait_until, timeout_ms=timeout_ms)
+            fields = await self.extract_inputs(timeout_ms=timeout_ms, wait=wait_until != "ready")
+            submit = await self.extract_form_submit_info()
+        if not submit["submit_buttons"]:
+            html = await self.page.content()
+            submit = {**parse_submit_hints_from_html(html, base_url=self.page.url), **{"submit_buttons": []}}
+        data, files = build_payload(fields)
+        return data, files, fields, submit
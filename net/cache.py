@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import email.utils
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from util.store import LRUStore
+
+
+DEFAULT_CACHE_PATH = Path("target/cache/http.sqlite")
+
+# send(conditional_headers) -> (status, response headers, body, complete)
+Send = Callable[[Dict[str, str]], Tuple[int, Mapping[str, str], bytes, bool]]
+
+
+def lower_keys(headers: Mapping[str, str]) -> Dict[str, str]:
+    return {k.lower(): v for k, v in headers.items()}
+
+
+def cache_control(headers: Mapping[str, str]) -> Dict[str, str]:
+    """Cache-Control directives from lower-cased response headers."""
+    directives: Dict[str, str] = {}
+    for part in (headers.get("cache-control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+def http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def expires_at(headers: Mapping[str, str], now: float) -> float:
+    """When a response (lower-cased headers) stops being fresh: max-age (less Age), else Expires, else immediately."""
+    directives = cache_control(headers)
+    if "no-cache" in directives:
+        return now
+    if (max_age := directives.get("max-age", "")).isdigit():
+        age = int(headers["age"]) if (headers.get("age") or "").isdigit() else 0
+        return now + int(max_age) - age
+    expires, date = http_date(headers.get("expires")), http_date(headers.get("date"))
+    if expires is not None:
+        return now + expires - (date if date is not None else now)
+    return now
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body: bytes
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires
+
+    def validators(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class HTTPCacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / total if total else 0.0
+
+
+class HTTPCache:
+    """On-disk (sqlite) HTTP cache for page fetches.
+
+    Fresh entries (Cache-Control max-age or Expires) are served without a request;
+    stale ones are revalidated with If-None-Match/If-Modified-Since, so an unchanged
+    page costs a 304 round trip. no-store responses, partial bodies and responses
+    that can be neither reused nor revalidated are not stored. Total size is bounded
+    with least-recently-used eviction.
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH, *, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.path = Path(path)
+        self.stats = HTTPCacheStats()
+        self._store = LRUStore(
+            self.path, "pages", "url",
+            "url TEXT PRIMARY KEY, body BLOB NOT NULL, content_type TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "expires REAL NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL",
+            self.stats, max_bytes=max_bytes,
+        )
+
+    @property
+    def max_bytes(self) -> int:
+        return self._store.max_bytes
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        with self._store.lock:
+            row = self._store.execute(
+                "SELECT body, content_type, etag, last_modified, expires FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is not None:
+                self._store.execute("UPDATE pages SET accessed = ? WHERE url = ?", (time.time(), url))
+        return CachedPage(url, *row) if row else None
+
+    def store(self, url: str, headers: Mapping[str, str], body: bytes) -> Optional[CachedPage]:
+        headers = lower_keys(headers)
+        now = time.time()
+        page = CachedPage(
+            url, body, headers.get("content-type") or "", headers.get("etag"), headers.get("last-modified"),
+            expires_at(headers, now),
+        )
+        if "no-store" in cache_control(headers) or not (page.fresh or page.validators()):
+            return None
+        with self._store.lock:
+            self._store.execute(
+                "INSERT OR REPLACE INTO pages (url, body, content_type, etag, last_modified, expires, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, page.content_type, page.etag, page.last_modified, page.expires, len(body), now),
+            )
+            self._store.evict()
+        return page
+
+    def revalidate(self, page: CachedPage, headers: Mapping[str, str]) -> CachedPage:
+        """Apply a 304's headers (new freshness, possibly new validators) to a stored page."""
+        headers = lower_keys(headers)
+        page.expires = expires_at(headers, time.time())
+        page.etag = headers.get("etag") or page.etag
+        page.last_modified = headers.get("last-modified") or page.last_modified
+        with self._store.lock:
+            self._store.execute(
+                "UPDATE pages SET expires = ?, etag = ?, last_modified = ? WHERE url = ?",
+                (page.expires, page.etag, page.last_modified, page.url),
+            )
+        return page
+
+    def _count(self, outcome: str, saved: int = 0) -> None:
+        # Crawler workers share one cache, so counters are updated under the store lock
+        with self._store.lock:
+            setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+            self.stats.bytes_saved += saved
+
+    def fetch(self, url: str, send: Send) -> Tuple[bytes, str]:
+        """Body and Content-Type for `url`, from the cache when fresh or confirmed by a 304."""
+        cached = self.lookup(url)
+        if cached is not None and cached.fresh:
+            self._count("hits", len(cached.body))
+            return cached.body, cached.content_type
+        status, headers, body, complete = send(cached.validators() if cached else {})
+        if status == 304 and cached is not None:
+            self.revalidate(cached, headers)
+            self._count("revalidated", len(cached.body))
+            return cached.body, cached.content_type
+        self._count("misses")
+        if status == 200 and complete:
+            self.store(url, headers, body)
+        return body, lower_keys(headers).get("content-type") or ""
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def close(self) -> None:
+        self._store.close()
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import html as htmlmod
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+from .text import collapse, html_to_text
+from .web import PLATFORMS, detect_platform
+
+
+# Raw-text elements are consumed whole (their bodies are never page text); everything
+# else is an open tag, a close tag, a comment or a doctype.
+MARKUP = re.compile(
+    r"<(?:"
+    r"(?P<raw>script|style|noscript|template|svg|textarea)\b(?P<raw_attrs>[^>]*)>"
+    r"(?P<raw_body>[^<]*(?:<(?!/(?P=raw)\s*>)[^<]*)*)(?:</(?P=raw)\s*>|$)"
+    r"|!--[^-]*(?:-(?!->)[^-]*)*(?:-->|$)"
+    r"|(?P<close>/)?\s*(?P<tag>[a-zA-Z][\w:-]*)(?P<attrs>[^>]*)>"
+    r"|[!?][^>]*>"
+    r")",
+    re.I,
+)
+ATTR = re.compile(r"""([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+SELECTOR = re.compile(r"""([\w-]+)|#([\w-]+)|\.([\w-]+)|\[([\w-]+)(\*?=)["']?([^\]"']*)["']?\]""")
+
+VOID = frozenset("area base br col embed hr img input link meta param source track wbr".split())
+BLOCK = frozenset(
+    "address article aside blockquote body dd details div dl dt fieldset figure footer form h1 h2 h3 h4 h5 h6 "
+    "header hr li main nav ol p pre section table tbody td tfoot th thead tr ul".split()
+)
+PARAGRAPH = frozenset("p li pre td dd blockquote".split())
+SKIP_TAGS = frozenset("nav footer aside form button select header dialog iframe".split())
+AUTO_CLOSE = {"p": {"p"}, "li": {"li"}, "dt": {"dt", "dd"}, "dd": {"dt", "dd"}, "tr": {"tr"}, "td": {"td", "th"}, "th": {"td", "th"}}
+
+UNLIKELY = re.compile(
+    r"nav|menu|footer|header|banner|cookie|consent|gdpr|sidebar|breadcrumb|social|share|modal|popup|"
+    r"newsletter|subscribe|related|similar|other-?jobs|more-?jobs|openings|legal|privacy|disclaimer|promo|widget",
+    re.I,
+)
+MAYBE = re.compile(r"content|article|main|body|description|posting|job|details|column", re.I)
+POSITIVE = re.compile(r"description|posting|job|content|article|main|body|details|text", re.I)
+NEGATIVE = re.compile(r"nav|footer|header|menu|sidebar|banner|cookie|consent|social|share|related|similar|promo|widget|legal", re.I)
+
+MIN_BODY_CHARS = 200
+
+
+class Node:
+    __slots__ = ("tag", "raw_attrs", "parent", "children", "text_len", "link_len", "score", "_attrs")
+
+    def __init__(self, tag: str, raw_attrs: str = "", parent: Optional["Node"] = None) -> None:
+        self.tag = tag
+        self.raw_attrs = raw_attrs
+        self.parent = parent
+        self.children: List[Union["Node", str]] = []
+        self.text_len = 0
+        self.link_len = 0
+        self.score = 0.0
+        self._attrs: Optional[Dict[str, str]] = None
+
+    @property
+    def attrs(self) -> Dict[str, str]:
+        if self._attrs is None:
+            self._attrs = {
+                m.group(1).lower(): htmlmod.unescape(next((g for g in m.group(2, 3, 4) if g is not None), ""))
+                for m in ATTR.finditer(self.raw_attrs)
+            }
+        return self._attrs
+
+    @property
+    def class_id(self) -> str:
+        if "class" not in self.raw_attrs and "id" not in self.raw_attrs:
+            return ""
+        return f"{self.attrs.get('class', '')} {self.attrs.get('id', '')}"
+
+    @property
+    def link_density(self) -> float:
+        return self.link_len / self.text_len if self.text_len else 0.0
+
+    def walk(self) -> Iterator["Node"]:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(c for c in reversed(node.children) if isinstance(c, Node))
+
+
+@dataclass
+class Document:
+    root: Node
+    json_ld: List[object] = field(default_factory=list)
+    meta: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class JobContent:
+    """Main content of a job page: the posting body plus the headline fields.
+
+    `source` says where the body came from: "json-ld" (a JobPosting block), "hint"
+    (a per-platform selector), "density" (text/link-density scoring) or "page" (the
+    whole page text, when nothing better was found).
+    """
+    body: str
+    title: str = ""
+    company: str = ""
+    location: str = ""
+    platform: Optional[str] = None
+    source: str = "page"
+
+    def as_text(self) -> str:
+        header = [f"{k}: {v}" for k, v in (("Title", self.title), ("Company", self.company), ("Location", self.location)) if v]
+        return "\n".join([*header, self.body]).strip()
+
+
+def parse(html: str) -> Document:
+    """Build a lightweight element tree (tags, attributes, text) plus JSON-LD blocks and <meta> values."""
+    root = Node("#root")
+    doc = Document(root)
+    node, pos = root, 0
+    for m in MARKUP.finditer(html):
+        if m.start() > pos:
+            node.children.append(html[pos:m.start()])
+        pos = m.end()
+        if (raw := m.group("raw")) is not None:
+            if raw.lower() == "script" and "ld+json" in m.group("raw_attrs").lower():
+                try:
+                    doc.json_ld.append(json.loads(m.group("raw_body")))
+                except ValueError:
+                    pass
+            continue
+        tag = m.group("tag")
+        if tag is None:
+            continue
+        tag = tag.lower()
+        if m.group("close"):
+            open_node = node
+            while open_node is not root and open_node.tag != tag:
+                open_node = open_node.parent  # type: ignore[assignment]
+            if open_node is not root:
+                node = open_node.parent  # type: ignore[assignment]
+            continue
+        while tag in AUTO_CLOSE and node.tag in AUTO_CLOSE[tag]:
+            node = node.parent  # type: ignore[assignment]
+        child = Node(tag, m.group("attrs"), node)
+        node.children.append(child)
+        if tag == "meta":
+            attrs = child.attrs
+            if (key := attrs.get("property") or attrs.get("name")) and "content" in attrs:
+                doc.meta.setdefault(key.lower(), attrs["content"])
+        elif tag == "title" and "title" not in doc.meta:
+            end = html.find("<", pos)
+            doc.meta["title"] = collapse(htmlmod.unescape(html[pos:end if end >= 0 else len(html)]))
+        if tag not in VOID and not m.group("attrs").rstrip().endswith("/"):
+            node = child
+    if pos < len(html):
+        node.children.append(html[pos:])
+    measure(root)
+    return doc
+
+
+def measure(root: Node) -> None:
+    for node in reversed(list(root.walk())):
+        text = sum(len(c.strip()) for c in node.children if isinstance(c, str))
+        kids = [c for c in node.children if isinstance(c, Node)]
+        node.text_len = text + sum(k.text_len for k in kids)
+        node.link_len = node.text_len if node.tag == "a" else sum(k.link_len for k in kids)
+
+
+def matches(node: Node, selector: str) -> bool:
+    """Match a simple selector: compounds of tag, #id, .class, [attr=value] and [attr*=value],
+    joined by descendant combinators."""
+    *ancestors, last = selector.split()
+    if not _match_compound(node, last):
+        return False
+    up = node.parent
+    for compound in reversed(ancestors):
+        while up is not None and not _match_compound(up, compound):
+            up = up.parent
+        if up is None:
+            return False
+        up = up.parent
+    return True
+
+
+def _match_compound(node: Node, compound: str) -> bool:
+    for tag, id_, cls, attr, op, value in SELECTOR.findall(compound):
+        if tag and node.tag != tag.lower():
+            return False
+        if id_ and node.attrs.get("id") != id_:
+            return False
+        if cls and cls not in node.attrs.get("class", "").split():
+            return False
+        if attr:
+            actual = node.attrs.get(attr.lower())
+            if actual is None or (value not in actual if op == "*=" else actual != value):
+                return False
+    return True
+
+
+def select(root: Node, selectors: Sequence[str]) -> Optional[Node]:
+    """First node (in document order) matching the earliest selector that matches anything."""
+    nodes = list(root.walk())
+    for selector in selectors:
+        for node in nodes:
+            if node.text_len and matches(node, selector):
+                return node
+    return None
+
+
+def render(node: Node) -> str:
+    """Plain text of a subtree, skipping chrome (nav/forms/buttons) and link-heavy lists."""
+    out: List[str] = []
+    stack: List[Union[Node, str]] = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+            continue
+        if item is not node and boilerplate(item):
+            continue
+        if item.tag in BLOCK or item.tag == "br":
+            out.append("\n")
+            stack.append("\n")
+        if item.tag == "li":
+            out.append("- ")
+        stack.extend(reversed(item.children))
+    return collapse(htmlmod.unescape("".join(out)))
+
+
+def boilerplate(node: Node) -> bool:
+    if node.tag in SKIP_TAGS:
+        return True
+    class_id = node.class_id
+    if class_id and UNLIKELY.search(class_id) and not MAYBE.search(class_id):
+        return True
+    # "Other openings" lists, share bars, link farms
+    return node.tag in ("ul", "ol", "div", "section", "table") and node.text_len > 0 and node.link_density > 0.5
+
+
+def class_weight(node: Node) -> float:
+    class_id = node.class_id
+    if not class_id:
+        return 0.0
+    return (25.0 if POSITIVE.search(class_id) else 0.0) - (25.0 if NEGATIVE.search(class_id) else 0.0)
+
+
+def best_block(root: Node) -> Optional[Node]:
+    """Readability-style scoring: paragraphs credit their parent and (half) their grandparent
+    by length and comma count; candidates are weighted by class/id hints and scaled by
+    (1 - link density)."""
+    candidates: Dict[int, Node] = {}
+    skipped = set()
+    for node in root.walk():
+        if node.parent is not None and id(node.parent) in skipped or boilerplate(node):
+            skipped.add(id(node))
+            continue
+        paragraph = node.tag in PARAGRAPH or (
+            node.tag == "div" and not any(isinstance(c, Node) and c.tag in BLOCK for c in node.children)
+        )
+        if not paragraph or node.text_len < 25:
+            continue
+        text = "".join(c for c in node.children if isinstance(c, str))
+        score = 1 + text.count(",") + min(3, node.text_len // 100)
+        for share, ancestor in ((1.0, node.parent), (0.5, node.parent.parent if node.parent else None)):
+            if ancestor is None or ancestor is root:
+                continue
+            if id(ancestor) not in candidates:
+                ancestor.score = class_weight(ancestor)
+                candidates[id(ancestor)] = ancestor
+            ancestor.score += score * share
+    if not candidates:
+        return None
+    return max(candidates.values(), key=lambda n: n.score * (1 - n.link_density))
+
+
+def posting_from_json_ld(blocks: Sequence[object]) -> Optional[dict]:
+    stack = list(blocks)
+    while stack:
+        item = stack.pop(0)
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            kind = item.get("@type")
+            if kind == "JobPosting" or (isinstance(kind, list) and "JobPosting" in kind):
+                return item
+            stack.extend(v for k, v in item.items() if k == "@graph")
+    return None
+
+
+def location_from_json_ld(posting: dict) -> str:
+    places = posting.get("jobLocation") or []
+    names: List[str] = []
+    for place in places if isinstance(places, list) else [places]:
+        address = place.get("address", place) if isinstance(place, dict) else place
+        if isinstance(address, dict):
+            parts = [address.get(k) for k in ("addressLocality", "addressRegion", "addressCountry")]
+            parts = [p.get("name", "") if isinstance(p, dict) else p for p in parts]
+            names.append(", ".join(str(p) for p in parts if p))
+        elif address:
+            names.append(str(address))
+    if posting.get("jobLocationType") == "TELECOMMUTE":
+        names.append("Remote")
+    return "; ".join(dict.fromkeys(n for n in names if n))
+
+
+def node_text(node: Optional[Node]) -> str:
+    return " ".join(render(node).split()) if node is not None else ""
+
+
+def extract_content(html: str, url: str = "") -> JobContent:
+    """Job description body plus title, company and location, without page chrome.
+
+    A JSON-LD JobPosting wins when it carries a real description; otherwise the body
+    is the first per-platform hint selector (PLATFORMS[...]["content"]) with enough
+    text, then the best-scoring block. Falls back to the whole page text.
+    """
+    platform = detect_platform(url, html)
+    hints: Dict[str, List[str]] = PLATFORMS.get(platform, {}).get("content", {}) if platform else {}  # type: ignore[assignment]
+    doc = parse(html)
+    content = JobContent("", platform=platform)
+
+    if (posting := posting_from_json_ld(doc.json_ld)) is not None:
+        org = posting.get("hiringOrganization")
+        content.title = str(posting.get("title") or "")
+        content.company = str((org.get("name") if isinstance(org, dict) else org) or "")
+        content.location = location_from_json_ld(posting)
+        description = str(posting.get("description") or "")
+        body = html_to_text(htmlmod.unescape(description) if "&lt;" in description else description)
+        if len(body) >= MIN_BODY_CHARS:
+            content.body, content.source = body, "json-ld"
+
+    if not content.body:
+        node = select(doc.root, hints.get("body", []))
+        if node is not None and node.text_len >= MIN_BODY_CHARS:
+            content.body, content.source = render(node), "hint"
+    if not content.body:
+        node = best_block(doc.root)
+        body = render(node) if node is not None else ""
+        if len(body) >= MIN_BODY_CHARS:
+            content.body, content.source = body, "density"
+    if not content.body:
+        content.body = render(doc.root)
+
+    content.title = content.title or node_text(select(doc.root, hints.get("title", []) or ["h1"])) \
+        or doc.meta.get("og:title", "") or doc.meta.get("title", "")
+    content.company = content.company or node_text(select(doc.root, hints.get("company", []))) \
+        or doc.meta.get("og:site_name", "")
+    content.location = content.location or node_text(select(doc.root, hints.get("location", [])))
+    return content
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import codecs
+import html as htmlmod
+import re
+from typing import Iterable, List, Optional, Union
+
+Chunk = Union[str, bytes]
+
+# One scan over the markup, split into [text, opener, break, text, ...]. Whole
+# script/style elements and comments are consumed in a single match; an opener whose end
+# is not buffered yet is captured so the stream can skip straight to its terminator, and
+# the break group is set for <br> and the closing block tags that end a line.
+TOKEN = re.compile(
+    r"<(?:"
+    r"script\b[^>]*>[^<]*(?:<(?!/script\s*>)[^<]*)*</script\s*>"
+    r"|style\b[^>]*>[^<]*(?:<(?!/style\s*>)[^<]*)*</style\s*>"
+    r"|!--[^-]*(?:-(?!->)[^-]*)*-->"
+    r"|(script\b|style\b|!--)"
+    r"|\s*(br\b|/\s*(?:p|div|h[1-6]|li)\s*(?=>))?[^>]*>"
+    r")",
+    re.I,
+)
+RAW_END = {
+    "script": re.compile(r"</script\s*>", re.I),
+    "style": re.compile(r"</style\s*>", re.I),
+    "!--": re.compile(r"-->"),
+}
+SPACES = re.compile(r"[^\S\n]+")
+NEWLINES = re.compile(r" ?\n\s*")
+
+
+def collapse(text: str) -> str:
+    """Runs of spaces to one space, blank lines and indentation around newlines to one newline."""
+    return NEWLINES.sub("\n", SPACES.sub(" ", text)).strip()
+
+
+class TextExtractor:
+    """Incremental HTML-to-text converter.
+
+    feed() accepts str or bytes chunks of any size; close() returns the text. Script
+    and style bodies are dropped, <br> and closing p/div/h1-h6/li tags become
+    newlines, other tags become spaces, entities are unescaped and whitespace is
+    collapsed (runs of spaces to one space, blank lines to one newline).
+    """
+
+    def __init__(self, encoding: str = "utf-8") -> None:
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._buf = ""
+        self._raw: Optional[str] = None
+        self._out: List[str] = []
+
+    def feed(self, chunk: Chunk) -> None:
+        data = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        self._buf += data
+        self._scan(final=False)
+
+    def close(self) -> str:
+        self._buf += self._decoder.decode(b"", final=True)
+        self._scan(final=True)
+        text = htmlmod.unescape("".join(self._out))
+        self._out = []
+        return collapse(text)
+
+    def _skip_raw(self, final: bool) -> bool:
+        """Drop buffered script/style/comment content; True once its terminator was consumed."""
+        end = RAW_END[self._raw].search(self._buf)  # type: ignore[index]
+        if end is None:
+            # keep a short tail in case the terminator is split across chunks
+            self._buf = "" if final else self._buf[-10:]
+            return False
+        self._buf = self._buf[end.end():]
+        self._raw = None
+        self._out.append(" ")
+        return True
+
+    def _scan(self, final: bool) -> None:
+        if self._raw is not None and not self._skip_raw(final):
+            return
+        buf = self._buf
+        # hold back a possibly incomplete tag at the end of the buffer
+        cut = -1 if final else buf.rfind("<")
+        markup, self._buf = (buf, "") if cut < 0 else (buf[:cut], buf[cut:])
+        parts = TOKEN.split(markup)
+        if any(parts[1::3]):
+            # everything after an unterminated opener is raw content until its terminator arrives
+            opener = next(m for m in TOKEN.finditer(markup) if m.group(1))
+            parts = TOKEN.split(markup[:opener.start()])
+            self._raw = opener.group(1).lower()
+            self._buf = markup[opener.end():] + self._buf
+        parts[1::3] = ["\n" if brk else " " for brk in parts[2::3]]
+        del parts[2::3]
+        self._out.append("".join(parts))
+        if self._raw is not None and self._skip_raw(final):
+            self._scan(final)
+
+
+def html_to_text(html: Union[Chunk, Iterable[Chunk]], encoding: str = "utf-8") -> str:
+    """Convert HTML given as str, bytes or an iterable of chunks to plain text."""
+    extractor = TextExtractor(encoding)
+    for chunk in ([html] if isinstance(html, (str, bytes)) else html):
+        extractor.feed(chunk)
+    return extractor.close()
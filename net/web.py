@@ -2,50 +2,102 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple
+from typing import Callable, Optional, Dict, Iterable, Iterator, List, Mapping, Tuple, TypeVar
+import codecs
+import email.message
+import heapq
+import itertools
 import re
 import sys
+import threading
+import time
+import urllib.error
 import urllib.parse
 import urllib.request
 import json
 from collections import defaultdict
+from functools import lru_cache
+
+from util.http import ConnectionPool, Decompressor, HTTPStatusError, StreamingResponse, header_dict
+
+from .cache import HTTPCache
 
 
 USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
     "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
 )
+T = TypeVar("T")
 
-# Platform catalog: indicators + extraction rules
+# Platform catalog: indicators + extraction rules. "ready" selectors mark a usable
+# application form where it is not plain light-DOM controls (iframes, apply buttons).
 PLATFORMS: Dict[str, Dict[str, object]] = {
     "greenhouse": {
         "url": ["greenhouse.io", "boards.greenhouse.io"],
         "text": ["grnhse"],
+        "content": {
+            "body": ["div.job__description", "#content", "#app_body"],
+            "title": ["h1.app-title", "div.job__title h1", "h1"],
+            "company": ["span.company-name"],
+            "location": ["div.location", "div.job__location"],
+        },
+        "ready": "#application_form, #application-form, iframe#grnhse_iframe",
         "extract": {},
     },
     "lever": {
         "url": ["jobs.lever.co", "lever.co"],
         "text": ["lever"],
+        "content": {
+            "body": ["[data-qa=job-description]", "div.posting-page"],
+            "title": ["div.posting-headline h2"],
+            "location": ["div.location", "div.posting-categories"],
+        },
+        "ready": "form.application-form, .application-question",
         "extract": {},
     },
     "workday": {
         "url": ["myworkdayjobs.com"],
         "text": ["/wday/cxs/", "workday"],
+        "content": {
+            "body": ["[data-automation-id=jobPostingDescription]"],
+            "title": ["[data-automation-id=jobPostingHeader]"],
+            "location": ["[data-automation-id=locations]"],
+        },
+        "ready": "[data-automation-id=jobPostingPage], [data-automation-id=adventureButton], [data-automation-id=applyFlowPage]",
         "extract": {},
     },
     "smartrecruiters": {
         "url": ["smartrecruiters.com"],
         "text": ["smartrecruiters"],
+        "content": {
+            "body": ["[itemprop=description]", "div.job-sections"],
+            "title": ["h1.job-title"],
+            "company": ["[itemprop=hiringOrganization]"],
+            "location": ["[itemprop=jobLocation]", "spl-job-location"],
+        },
+        "ready": "oc-oneclick-form, [data-test=apply-form], a.js-oneclick",
         "extract": {},
     },
     "workable": {
         "url": ["workable.com", "apply.workable.com"],
         "text": ["workable"],
+        "content": {
+            "body": ["[data-ui=job-description]", "section[data-ui=job-details]"],
+            "title": ["[data-ui=job-title]"],
+            "location": ["[data-ui=job-location]"],
+        },
+        "ready": "form[data-ui=application-form], [data-ui=apply-button]",
         "extract": {},
     },
     "ashbyhq": {
         "url": ["ashbyhq.com"],
         "text": ["ashbyprd.com", "recaptchapublicsitekey"],
+        "content": {
+            "body": ["[class*=descriptionText]", "#overview"],
+            "title": ["h1[class*=title]", "h1"],
+            "location": ["[class*=location]"],
+        },
+        "ready": "[class*=application-form], [class*=_applicationForm]",
         "extract": {
             "form_id": r'"sourceFormDefinitionId"\s*:\s*"([a-f0-9-]{10,})"',
             "recaptcha_site_key": r'"recaptchaPublicSiteKey"\s*:\s*"([^\"]+)"',
@@ -74,12 +126,239 @@ def derive_base_filename(url: str) -> str:
     return sanitize_filename(f"{parsed.netloc}_{tail}" if parsed.netloc else tail)
 
 
-def fetch(url: str, timeout: float = 20.0) -> tuple[bytes, Optional[str]]:
-    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        data = resp.read()
-        encoding = resp.headers.get_content_charset()  # type: ignore[attr-defined]
-        return data, (encoding or "utf-8")
+MAX_PAGE_BYTES = 8 * 1024 * 1024
+FETCH_DEADLINE = 60.0
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 4096
+MAX_REDIRECTS = 10
+REDIRECTS = (301, 302, 303, 307, 308)
+REQUEST_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+}
+# Shared keep-alive connections for page fetches (many postings on the same ATS host)
+POOL = ConnectionPool(max_idle=4, idle_timeout=30.0, timeout=20.0)
+META_CHARSET = re.compile(rb"""<meta[^>]+?charset\s*=\s*["']?\s*([A-Za-z0-9._:-]+)""", re.I)
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+# Browsers decode pages labelled latin-1/ascii as windows-1252
+LEGACY_CHARSETS = {"latin-1": "cp1252", "iso8859-1": "cp1252", "ascii": "cp1252"}
+
+
+def sniff_charset(head: bytes, declared: Optional[str] = None) -> str:
+    """Charset for a page: BOM, then the Content-Type charset, then a <meta> declaration near the top, else UTF-8."""
+    for bom, name in BOMS:
+        if head.startswith(bom):
+            return name
+    meta = META_CHARSET.search(head[:SNIFF_BYTES])
+    for label in (declared, meta.group(1).decode("ascii") if meta else None):
+        if not label:
+            continue
+        try:
+            name = codecs.lookup(label).name
+        except LookupError:
+            continue
+        return LEGACY_CHARSETS.get(name, name)
+    return "utf-8"
+
+
+def pooled(url: str) -> bool:
+    """Whether the keep-alive POOL can fetch `url`: http(s), with no *_proxy configured for its host."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return False
+    return parts.scheme not in urllib.request.getproxies() or bool(urllib.request.proxy_bypass(parts.hostname or ""))
+
+
+class URLLibResponse:
+    """A urllib.request response behind the StreamingResponse methods PageStream uses.
+
+    urllib follows redirects and honors proxy settings itself; statuses it raises as
+    HTTPError (304 included) are kept as the response so callers see the status.
+    """
+
+    def __init__(self, url: str, headers: Dict[str, str], timeout: float) -> None:
+        try:
+            # A fresh opener reads the proxy environment now, as pooled() does (urlopen's is built once)
+            opener = urllib.request.build_opener()
+            self.resp = opener.open(urllib.request.Request(url, headers=headers), timeout=timeout)
+            self.status: int = getattr(self.resp, "status", None) or 200  # file:// responses have no status
+        except urllib.error.HTTPError as e:
+            self.resp, self.status = e, e.code
+        self.reason = getattr(self.resp, "reason", None) or ""
+        self.headers = header_dict(self.resp.headers.items())
+        self.url = self.resp.geturl() or url
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self.resp.read() if amt is None else self.resp.read(amt)
+
+    def read1(self, amt: int = CHUNK_SIZE) -> bytes:
+        return self.resp.read1(amt) if hasattr(self.resp, "read1") else self.resp.read(amt)
+
+    def raise_for_status(self) -> "URLLibResponse":
+        if self.status >= 400:
+            body = self.read()
+            self.close()
+            raise HTTPStatusError(self.status, self.reason, self.headers, body)
+        return self
+
+    def close(self) -> None:
+        self.resp.close()
+
+
+class PageStream:
+    """A page body read in chunks under a byte cap and a total-transfer deadline.
+
+    Requests go through the shared keep-alive POOL with gzip/deflate negotiated and
+    decompressed as the body streams; redirects are followed. URLs the pool cannot
+    serve (file:// and other non-http schemes, or hosts behind a configured *_proxy)
+    are opened with urllib.request instead, under the same limits. Iterating yields decoded
+    text (charset from the headers or sniffed from the first bytes); iter_bytes()
+    yields the decompressed chunks and feed() hands text straight to a parser such as
+    net.text.TextExtractor. Reading stops early, with `stopped` set to "max_bytes" or
+    "deadline", instead of buffering an unbounded or endless body; each read still
+    blocks for at most `timeout`. Statuses >= 400 raise HTTPStatusError.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        timeout: float = 20.0,
+        max_bytes: int = MAX_PAGE_BYTES,
+        deadline: Optional[float] = FETCH_DEADLINE,
+        chunk_size: int = CHUNK_SIZE,
+        headers: Optional[Dict[str, str]] = None,
+        pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        self.url = url
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.deadline = None if deadline is None else time.monotonic() + deadline
+        request_headers = {**REQUEST_HEADERS, **(headers or {})}
+        pool = pool or POOL
+        self.final_url = url
+        if pooled(url):
+            self.resp = self._follow(pool, request_headers, timeout)
+        else:
+            self.resp = URLLibResponse(url, request_headers, timeout)
+            self.final_url = self.resp.url
+        self.resp.raise_for_status()
+        self.status: int = self.resp.status
+        self.headers: Dict[str, str] = self.resp.headers
+        self.declared_charset = content_charset(self.headers.get("content-type", ""))
+        self.encoding: Optional[str] = None
+        self.bytes_read = 0
+        self.stopped: Optional[str] = None
+        self._decompressor = Decompressor(self.headers.get("content-encoding", ""))
+
+    def _follow(self, pool: ConnectionPool, headers: Dict[str, str], timeout: float) -> StreamingResponse:
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = pool.open("GET", self.final_url, headers=headers, timeout=timeout)
+            location = resp.headers.get("location")
+            if resp.status not in REDIRECTS or not location:
+                return resp
+            resp.read()  # drain the (small) redirect body so the connection is reused
+            resp.close()
+            self.final_url = urllib.parse.urljoin(self.final_url, location)
+        raise ConnectionError(f"too many redirects from {self.url}")
+
+    def __enter__(self) -> "PageStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.resp.close()
+
+    def _read(self, room: int) -> bytes:
+        """Up to `room` decompressed bytes; b"" at the end of the body."""
+        if self._decompressor.encoding in ("", "identity"):
+            return self.resp.read1(min(self.chunk_size, room))
+        while True:
+            raw = self._decompressor.unconsumed_tail or self.resp.read1(self.chunk_size)
+            if not raw:
+                return self._decompressor.flush()[:room]
+            if out := self._decompressor.decompress(raw, room):
+                return out
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        try:
+            while True:
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    self.stopped = "deadline"
+                    break
+                room = self.max_bytes - self.bytes_read
+                if room <= 0:
+                    if self._read(1):
+                        self.stopped = "max_bytes"
+                    break
+                chunk = self._read(room)
+                if not chunk:
+                    break
+                self.bytes_read += len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def __iter__(self) -> Iterator[str]:
+        chunks = self.iter_bytes()
+        head = b""
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= SNIFF_BYTES:
+                break
+        self.encoding = sniff_charset(head, self.declared_charset)
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        for data in itertools.chain([head], chunks):
+            if text := decoder.decode(data):
+                yield text
+        if tail := decoder.decode(b"", final=True):
+            yield tail
+
+    def feed(self, sink: T) -> T:
+        """Pass decoded chunks to `sink.feed` as they arrive; returns the sink."""
+        for text in self:
+            sink.feed(text)  # type: ignore[attr-defined]
+        return sink
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_bytes())
+
+    def text(self) -> str:
+        return "".join(self)
+
+
+def open_page(url: str, **limits) -> PageStream:
+    """Start fetching a page; see PageStream for `timeout`, `max_bytes`, `deadline` and `chunk_size`."""
+    return PageStream(url, **limits)
+
+
+def warn_if_stopped(page: PageStream) -> None:
+    if page.stopped:
+        print(f"Stopped reading {page.url} after {page.bytes_read} bytes ({page.stopped})", file=sys.stderr)
+
+
+def content_charset(content_type: str) -> Optional[str]:
+    message = email.message.Message()
+    message["Content-Type"] = content_type
+    return message.get_content_charset()
+
+
+def fetch(url: str, timeout: float = 20.0, *, cache: Optional[HTTPCache] = None, **limits) -> tuple[bytes, Optional[str]]:
+    """Fetch a URL's body and charset; with `cache`, fresh copies skip the network and stale ones are revalidated."""
+    def send(headers: Dict[str, str]) -> tuple[int, Mapping[str, str], bytes, bool]:
+        with open_page(url, timeout=timeout, headers=headers, **limits) as page:
+            data = page.read()
+        warn_if_stopped(page)
+        return page.status, page.headers, data, not page.stopped
+
+    if cache is not None:
+        data, content_type = cache.fetch(url, send)
+        return data, sniff_charset(data[:SNIFF_BYTES], content_charset(content_type))
+    _, headers, data, _ = send({})
+    return data, sniff_charset(data[:SNIFF_BYTES], content_charset(headers.get("content-type", "")))
 
 
 @dataclass
@@ -105,25 +384,29 @@ def save_html_bytes(target: Path, base: str, raw: bytes) -> Path:
     return path
 
 
-def get_html(url: str, timeout: float = 20.0) -> str:
-    """Fetch a URL and return decoded HTML string."""
-    raw, encoding = fetch(url, timeout=timeout)
-    try:
+def get_html(url: str, timeout: float = 20.0, *, cache: Optional[HTTPCache] = None, **limits) -> str:
+    """Fetch a URL and return decoded HTML string (decoded as it streams in, unless cached)."""
+    if cache is not None:
+        raw, encoding = fetch(url, timeout, cache=cache, **limits)
         return raw.decode(encoding or "utf-8", errors="replace")
-    except Exception:
-        return raw.decode("utf-8", errors="replace")
+    with open_page(url, timeout=timeout, **limits) as page:
+        html = page.text()
+    warn_if_stopped(page)
+    return html
 
 
 def download_page(
     url: str,
     target_dir: Path | str = Path("target"),
     basename: Optional[str] = None,
+    *,
+    cache: Optional[HTTPCache] = None,
 ) -> Path:
     """Fetch HTML then save to file; return saved Path."""
     target = ensure_dir(target_dir)
     base = resolve_base(basename, url)
     try:
-        html = get_html(url)
+        html = get_html(url, cache=cache)
         path = target / f"{base}.html"
         path.write_text(html, encoding="utf-8")
         return path
@@ -132,30 +415,258 @@ def download_page(
         return target / f"{base}.html"
 
 
-# URL: https://jobs.ashbyhq.com/snowflake/3eb872af-0ab1-4986-8f72-e7321fcd1538
-# write a function to find a URL with the given domain in a html file 
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|gh_src|gclid|fbclid|lever-\w+|source|ref)$", re.I)
+CRAWL_STATE = "crawl_state.json"
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL for de-duplication: lowercase scheme/host, no default port,
+    fragment or tracking parameters, sorted query."""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != {"http": 80, "https": 443}.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k))
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    return urllib.parse.urlunsplit((scheme, host, path, urllib.parse.urlencode(query), ""))
+
+
+class Crawler:
+    """Concurrent, polite page downloader.
+
+    Worker threads take URLs from a priority queue (lowest `priority` first, then
+    insertion order) under a global `concurrency` limit, at most `per_host` requests
+    in flight per host (`host_limits` overrides single hosts) and at least
+    `min_delay` seconds between request starts on the same host. URLs are
+    de-duplicated by canonical form. Finished pages are recorded in a JSON state file
+    under `target_dir`, so a re-run (after an interruption or with new URLs) skips
+    what is already on disk; failures are not recorded and are retried.
+    """
+
+    def __init__(
+        self,
+        target_dir: Path | str = Path("target"),
+        *,
+        concurrency: int = 8,
+        per_host: int = 2,
+        host_limits: Optional[Dict[str, int]] = None,
+        min_delay: float = 0.5,
+        state_path: Optional[Path | str] = None,
+        cache: Optional[HTTPCache] = None,
+        timeout: float = 20.0,
+        **limits,
+    ) -> None:
+        self.target = ensure_dir(target_dir)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_limits = host_limits or {}
+        self.min_delay = min_delay
+        self.state_path = Path(state_path) if state_path else self.target / CRAWL_STATE
+        self.cache = cache
+        self.timeout = timeout
+        self.limits = limits
+        self.done: Dict[str, DownloadResult] = self._load_state()
+        self._queue: List[Tuple[int, int, str, str, Optional[str]]] = []
+        self._order: List[str] = []
+        self._seen: set = set()
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._last_start: Dict[str, float] = {}
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def _load_state(self) -> Dict[str, DownloadResult]:
+        if not self.state_path.exists():
+            return {}
+        data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        return {
+            key: DownloadResult(r["url"], Path(r["html_path"]), r.get("encoding"))
+            for key, r in data.get("done", {}).items()
+            if r.get("html_path") and Path(r["html_path"]).exists()
+        }
+
+    def _save_state(self) -> None:
+        done = {k: {"url": r.url, "html_path": str(r.html_path), "encoding": r.encoding} for k, r in self.done.items()}
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"done": done}, indent=1), encoding="utf-8")
+        tmp.replace(self.state_path)
+
+    def add(self, url: str, *, priority: int = 0, basename: Optional[str] = None) -> bool:
+        """Queue a URL; returns False for duplicates (including pages finished in an earlier run)."""
+        key = canonical_url(url)
+        with self._cond:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            self._order.append(key)
+            if key in self.done:
+                return False
+            heapq.heappush(self._queue, (priority, len(self._order), key, url, basename))
+            self._cond.notify()
+            return True
+
+    def _host_limit(self, host: str) -> int:
+        return self.host_limits.get(host, self.per_host)
+
+    def _next(self) -> Optional[Tuple[str, str, Optional[str]]]:
+        with self._cond:
+            while True:
+                if not self._queue:
+                    if self._active == 0:
+                        self._cond.notify_all()
+                        return None
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                skipped, chosen, wait = [], None, None
+                while self._queue:
+                    item = heapq.heappop(self._queue)
+                    host = urllib.parse.urlsplit(item[2]).netloc
+                    ready_at = self._last_start.get(host, float("-inf")) + self.min_delay
+                    if self._in_flight[host] < self._host_limit(host) and ready_at <= now:
+                        chosen = item
+                        break
+                    skipped.append(item)
+                    if self._in_flight[host] < self._host_limit(host):
+                        wait = ready_at - now if wait is None else min(wait, ready_at - now)
+                for item in skipped:
+                    heapq.heappush(self._queue, item)
+                if chosen is not None:
+                    host = urllib.parse.urlsplit(chosen[2]).netloc
+                    self._in_flight[host] += 1
+                    self._last_start[host] = now
+                    self._active += 1
+                    return chosen[2], chosen[3], chosen[4]
+                self._cond.wait(wait)
+
+    def _finish(self, key: str, result: DownloadResult) -> None:
+        with self._cond:
+            self._in_flight[urllib.parse.urlsplit(key).netloc] -= 1
+            self._active -= 1
+            if result.html_path is not None:
+                self.done[key] = result
+                self._save_state()
+            self._cond.notify_all()
+
+    def _download(self, url: str, basename: Optional[str]) -> DownloadResult:
+        try:
+            raw, encoding = fetch(url, self.timeout, cache=self.cache, **self.limits)
+            return DownloadResult(url, save_html_bytes(self.target, resolve_base(basename, url), raw), encoding)
+        except Exception as e:
+            print(f"Failed to download or save {url}: {e}", file=sys.stderr)
+            return DownloadResult(url, None, None)
+
+    def _worker(self, failed: Dict[str, DownloadResult]) -> None:
+        while (job := self._next()) is not None:
+            key, url, basename = job
+            result = DownloadResult(url, None, None)
+            try:
+                result = self._download(url, basename)
+            finally:
+                if result.html_path is None:
+                    failed[key] = result
+                self._finish(key, result)
+
+    def run(self) -> List[DownloadResult]:
+        """Download everything queued; one DownloadResult per unique URL, in the order added."""
+        failed: Dict[str, DownloadResult] = {}
+        workers = [threading.Thread(target=self._worker, args=(failed,), daemon=True) for _ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return [self.done.get(key) or failed[key] for key in self._order]
+
+
+def download_pages(urls: List[str], target_dir: Path | str = Path("target"), **options) -> List[DownloadResult]:
+    """Fetch many pages concurrently with a Crawler; see Crawler for the options."""
+    crawler = Crawler(target_dir, **options)
+    for url in urls:
+        crawler.add(url)
+    return crawler.run()
+
+
+# Trailing characters that end a sentence rather than a URL
+URL_TRAILING = ".,;:!"
+URL_SCHEME = re.compile(r"https?:\\?$", re.I)
+
+
+@dataclass(frozen=True)
+class URLMatch:
+    url: str
+    start: int
+    end: int
+
+
+class URLScanner:
+    """Finds every URL on any of a set of domains (or their subdomains) in one pass.
+
+    One precompiled pattern matches absolute, protocol-relative and JSON-escaped
+    (https:\\/\\/...) URLs for all domains at once; scan() groups the hits by domain,
+    in document order, with their offsets. A URL is listed under every domain its
+    host belongs to (jobs.lever.co is under both "lever.co" and "jobs.lever.co").
+    """
+
+    def __init__(self, domains: Iterable[str]) -> None:
+        self.domains = sorted({d.lower().strip() for d in domains if d.strip()}, key=len, reverse=True)
+        hosts = "|".join(re.escape(d) for d in self.domains) or r"(?!)"
+        self._owners: Dict[str, List[str]] = {}
+        # Starting on a literal "/" lets the regex engine skip ahead quickly; the scheme
+        # in front of it is picked up by _match.
+        self.pattern = re.compile(
+            r"/\\?/(?P<host>(?:[\w-]+\.)*(?:" + hosts + r"))(?![\w.-])(?::\d+)?"
+            r"(?:(?:\\?/|[?#])(?:[^\s\"'<>()\\]|\\/)*)?",
+            re.I,
+        )
+
+    def _match(self, text: str, m: re.Match) -> URLMatch:
+        start = m.start()
+        if scheme := URL_SCHEME.search(text, max(0, start - 7), start):
+            start = scheme.start()
+        raw = text[start:m.end()].rstrip(URL_TRAILING)
+        url = raw.replace("\\/", "/").replace("&amp;", "&")
+        if not url.lower().startswith("http"):
+            url = f"https:{url}"
+        return URLMatch(url, start, start + len(raw))
+
+    def owners(self, host: str) -> List[str]:
+        """Listed domains that `host` is, or is a subdomain of (memoized per host)."""
+        if (found := self._owners.get(host)) is None:
+            lower = host.lower()
+            found = self._owners[host] = [d for d in self.domains if lower == d or lower.endswith("." + d)]
+        return found
+
+    def scan(self, text: str) -> Dict[str, List[URLMatch]]:
+        found: Dict[str, List[URLMatch]] = {d: [] for d in self.domains}
+        for m in self.pattern.finditer(text):
+            match = self._match(text, m)
+            for domain in self.owners(m.group("host")):
+                found[domain].append(match)
+        return found
+
+    def first(self, text: str) -> Optional[URLMatch]:
+        m = self.pattern.search(text)
+        return self._match(text, m) if m else None
+
+
+@lru_cache(maxsize=64)
+def url_scanner(domains: Tuple[str, ...]) -> URLScanner:
+    return URLScanner(domains)
+
+
+def platform_domains() -> Tuple[str, ...]:
+    return tuple(sorted({d for cfg in PLATFORMS.values() for d in cfg.get("url", [])}))  # type: ignore[union-attr]
+
+
+def scan_urls(html: str, domains: Optional[Iterable[str]] = None) -> Dict[str, List[URLMatch]]:
+    """All URLs in `html` on the given domains (default: every PLATFORMS domain), grouped by domain."""
+    return url_scanner(tuple(sorted(domains)) if domains is not None else platform_domains()).scan(html)
+
 
 def find_url_with_domain(html: str, domain: str) -> Optional[str]:
-    """Find a URL with the given domain in HTML content."""
-    # Try multiple patterns to match different URL formats
-    patterns = [
-        rf'https?://(?:www\.)?{domain}/[\w-]+',  # Matches http(s)://domain.com/...
-        rf'"(https?://[\w.-]*{domain}[\w/%-]*)',  # Matches URLs in quotes
-        rf'url\(["\']?(https?://[\w.-]*{domain}[\w/%-]*)'  # Matches CSS url() patterns
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, html, re.IGNORECASE)
-        if not match:
-            continue
-            
-        # Get the first group if it exists, otherwise get the full match
-        url = match.group(1) if len(match.groups()) > 0 else match.group(0)
-        # Clean up any trailing quotes or special characters
-        url = url.split('"')[0].split("'")[0].split(')')[0]
-        return url
-    
-    return None
+    """Find the first URL with the given domain (or a subdomain of it) in HTML content."""
+    match = url_scanner((domain,)).first(html)
+    return match.url if match else None
 
 
 # ---------- Form helpers (moved from util.form) ----------
@@ -219,11 +730,109 @@ def build_payload(fields: List[Dict]) -> Tuple[Dict[str, str], Dict[str, Tuple[s
     return data, files
 
 
-def wait_until_ready(page, *, timeout_ms: int) -> None:
-    try:
-        page.wait_for_load_state("networkidle", timeout=timeout_ms)
-    except Exception:
-        pass
+FORM_CONTROLS = "input:not([type=hidden]), textarea, select"
+READY_QUIET_MS = 500
+READY_GRACE_MS = 2_000
+
+# Resolves once `selector` matches (skipped when empty) and the DOM has gone `quietMs`
+# without child-list mutations, or at `timeoutMs` with ready: false. A loaded page that
+# never matches (a job description, a plain link target) resolves after `graceMs` of
+# quiet with controls: 0.
+READY_SCRIPT = """({selector, quietMs, graceMs, timeoutMs}) => new Promise(resolve => {
+    const started = performance.now();
+    let quiet = null, deadline = null, observer = null;
+    const finish = ready => {
+        observer.disconnect();
+        clearTimeout(quiet);
+        clearTimeout(deadline);
+        const controls = selector ? document.querySelectorAll(selector).length : 0;
+        resolve({ready, controls, waited_ms: performance.now() - started});
+    };
+    const check = () => {
+        clearTimeout(quiet);
+        if (!selector || document.querySelector(selector)) quiet = setTimeout(() => finish(true), quietMs);
+        else if (document.readyState !== "loading") quiet = setTimeout(() => finish(true), graceMs);
+    };
+    deadline = setTimeout(() => finish(false), timeoutMs);
+    observer = new MutationObserver(check);
+    observer.observe(document.documentElement || document, {childList: true, subtree: true});
+    if (document.readyState === "loading") document.addEventListener("DOMContentLoaded", check);
+    check();
+})"""
+
+
+@dataclass
+class Readiness:
+    """How a wait for a usable page went: `strategy` is "ready" or a Playwright load state."""
+    strategy: str
+    ready: bool
+    waited: float  # seconds
+    controls: int = 0
+    url: str = ""
+
+
+def load_state(wait_until: str) -> str:
+    """The Playwright load state to wait for before a "ready" check."""
+    return "domcontentloaded" if wait_until == "ready" else wait_until
+
+
+def ready_selector(url: str) -> str:
+    """Form controls, plus the page's platform "ready" hint if it has one."""
+    hint = PLATFORMS.get(url_platform(url) or "", {}).get("ready")
+    return f"{hint}, {FORM_CONTROLS}" if hint else FORM_CONTROLS
+
+
+def ready_args(page, selector: Optional[str], quiet_ms: int, grace_ms: int, timeout_ms: float) -> Dict[str, object]:
+    return {
+        "selector": ready_selector(page.url) if selector is None else selector,
+        "quietMs": quiet_ms, "graceMs": grace_ms, "timeoutMs": timeout_ms,
+    }
+
+
+# Playwright's messages when a navigation replaces the document an evaluate() runs in
+NAVIGATION_ERRORS = ("execution context was destroyed", "cannot find context with specified id", "navigat")
+
+
+def navigated(exc: BaseException) -> bool:
+    """Whether an evaluate() failed because the page navigated away, rather than on its own."""
+    message = str(exc).lower()
+    return any(marker in message for marker in NAVIGATION_ERRORS)
+
+
+def wait_until_ready(
+    page, *, timeout_ms: int, strategy: str = "ready", selector: Optional[str] = None, quiet_ms: int = READY_QUIET_MS,
+    grace_ms: int = READY_GRACE_MS,
+) -> Readiness:
+    """Wait until the page is usable instead of for network idle, which polling pages never reach.
+
+    "ready" returns once form controls (or the platform hint, or `selector`; "" for none)
+    are present and the DOM has been quiet for `quiet_ms`, or once a loaded page without
+    them has been quiet for `grace_ms` (controls=0); any other strategy is a Playwright
+    load state. Timeouts are reported as ready=False rather than raised; script errors
+    such as an invalid `selector` are raised.
+    """
+    started = time.perf_counter()
+    if strategy != "ready":
+        try:
+            page.wait_for_load_state(strategy, timeout=timeout_ms)
+            ready = True
+        except Exception:
+            ready = False
+        return Readiness(strategy, ready, time.perf_counter() - started, url=page.url)
+    # A navigation while watching destroys the script's context; watch the new document instead.
+    # Any other evaluate() error (an invalid selector, a closed page) is raised.
+    while (remaining := timeout_ms - (time.perf_counter() - started) * 1000) > 0:
+        try:
+            result = page.evaluate(READY_SCRIPT, ready_args(page, selector, quiet_ms, grace_ms, remaining))
+            return Readiness(strategy, result["ready"], time.perf_counter() - started, result["controls"], page.url)
+        except Exception as exc:
+            if not navigated(exc):
+                raise
+            try:
+                page.wait_for_load_state("domcontentloaded", timeout=remaining)
+            except Exception:
+                break
+    return Readiness(strategy, False, time.perf_counter() - started, url=page.url)
 
 
 def to_field(element) -> Optional[Dict]:
@@ -250,70 +859,184 @@ def to_field(element) -> Optional[Dict]:
     } if name else None
 
 
-def collect_from_scope(scope, *, selector: str) -> List[Dict]:
+FIELD_SELECTOR = "input, textarea, select"
+
+# The descriptors to_field builds, for every field in a frame in one evaluate() round trip.
+# querySelectorAll stays in the light DOM, like the :light() selector of the per-element path.
+FIELDS_SCRIPT = """selector => Array.from(document.querySelectorAll(selector), el => {
+    const name = el.getAttribute("name") || el.getAttribute("id") || el.getAttribute("aria-label");
+    if (!name) return null;
+    const tag = el.tagName.toLowerCase();
+    const type = el.getAttribute("type") || tag;
+    return {
+        name,
+        type,
+        label: (el.labels && el.labels[0] && el.labels[0].innerText) || "",
+        placeholder: el.getAttribute("placeholder"),
+        required: (!!el.required || (el.getAttribute("aria-required") || "").toLowerCase() === "true")
+            ? true : el.getAttribute("required"),
+        tag,
+        value: el.getAttribute("value") || el.value,
+        checked: ["checkbox", "radio"].includes(type) && !!el.checked,
+        options: tag === "select"
+            ? Array.from(el.options, o => ({value: o.value, label: o.label || o.textContent || "", selected: !!o.selected}))
+            : null,
+    };
+}).filter(Boolean)"""
+
+
+def collect_from_scope(scope, *, selector: str = FIELD_SELECTOR) -> List[Dict]:
+    """Field descriptors for a page or frame, gathered by FIELDS_SCRIPT in one round trip."""
+    return scope.evaluate(FIELDS_SCRIPT, selector)
+
+
+def collect_from_scope_per_element(scope, *, selector: str = ":light(input), :light(textarea), :light(select)") -> List[Dict]:
+    """The element-by-element path (about ten IPC calls per field); kept for timing comparisons."""
     return list(filter(None, map(to_field, scope.locator(selector).all())))
 
 
-def collect_fields_from_page(page, *, timeout_ms: int = 60_000) -> List[Dict]:
-    wait_until_ready(page, timeout_ms=timeout_ms)
-    selector = ":light(input), :light(textarea), :light(select)"
+def collect_fields_from_page(
+    page, *, timeout_ms: int = 60_000, collect: Callable[..., List[Dict]] = collect_from_scope, wait: Optional[str] = "ready"
+) -> List[Dict]:
+    """Fields from the page and its frames, after wait_until_ready (skipped when `wait` is None)."""
+    if wait is not None:
+        wait_until_ready(page, timeout_ms=timeout_ms, strategy=wait)
+    fields: List[Dict] = []
+    # page.frames starts with the main frame, so the page itself is not visited separately
+    for scope in page.frames:
+        try:
+            fields.extend(collect(scope))
+        except Exception:
+            continue
+    return fields
+
+
+async def wait_until_ready_async(
+    page, *, timeout_ms: int, strategy: str = "ready", selector: Optional[str] = None, quiet_ms: int = READY_QUIET_MS,
+    grace_ms: int = READY_GRACE_MS,
+) -> Readiness:
+    """wait_until_ready for playwright.async_api pages."""
+    started = time.perf_counter()
+    if strategy != "ready":
+        try:
+            await page.wait_for_load_state(strategy, timeout=timeout_ms)
+            ready = True
+        except Exception:
+            ready = False
+        return Readiness(strategy, ready, time.perf_counter() - started, url=page.url)
+    while (remaining := timeout_ms - (time.perf_counter() - started) * 1000) > 0:
+        try:
+            result = await page.evaluate(READY_SCRIPT, ready_args(page, selector, quiet_ms, grace_ms, remaining))
+            return Readiness(strategy, result["ready"], time.perf_counter() - started, result["controls"], page.url)
+        except Exception as exc:
+            if not navigated(exc):
+                raise
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=remaining)
+            except Exception:
+                break
+    return Readiness(strategy, False, time.perf_counter() - started, url=page.url)
+
+
+async def collect_fields_from_page_async(page, *, timeout_ms: int = 60_000, wait: Optional[str] = "ready") -> List[Dict]:
+    """collect_fields_from_page for playwright.async_api pages."""
+    if wait is not None:
+        await wait_until_ready_async(page, timeout_ms=timeout_ms, strategy=wait)
     fields: List[Dict] = []
-    for scope in [page, *page.frames]:
+    for scope in page.frames:
         try:
-            fields.extend(collect_from_scope(scope, selector=selector))
+            fields.extend(await scope.evaluate(FIELDS_SCRIPT, FIELD_SELECTOR))
         except Exception:
             continue
     return fields
 
 
-def parse_submit_hints_from_html(html: str, base_url: str = "") -> Dict[str, object]:
-    """Extract generic submit hints for SPA job pages (no <form> tags)."""
-    def detect_platform(url: str, text: str) -> str | None:
-        url_l = url.lower()
-        text_l = text.lower()
-        # Prefer URL/domain indicators over text tokens
-        url_matches = []
-        for platform, cfg in PLATFORMS.items():
-            indicators = [u for u in cfg.get("url", []) if u in url_l]
-            if indicators:
-                # score by longest matching indicator to reduce false positives
-                url_matches.append((max(map(len, indicators)), platform))
-        if url_matches:
-            url_matches.sort(reverse=True)
-            return url_matches[0][1]
-        # Fallback to text-based indicators
-        for platform, cfg in PLATFORMS.items():
-            if any(token in text_l for token in cfg.get("text", [])):
-                return platform
+# Matched against the lower-cased page, so its literal prefix keeps the scan fast
+APPLY_LINK = r'href=[\"\']([^\"\']*apply[^\"\']*)[\"\']'
+Page = TypeVar("Page", str, bytes)
+
+
+def compile_for(pattern: str, flags: int = re.I) -> Dict[type, re.Pattern]:
+    """`pattern` compiled for both str and bytes pages."""
+    return {str: re.compile(pattern, flags), bytes: re.compile(pattern.encode(), flags)}
+
+
+def as_text(value: str | bytes) -> str:
+    return value if isinstance(value, str) else value.decode("utf-8", "replace")
+
+
+class PlatformDetector:
+    """PLATFORMS text tokens and extract rules, API_PATH_PATTERNS and the inline apply
+    link, compiled once for str and bytes pages.
+
+    Each rule keeps its own precompiled pattern: with a literal prefix re finds
+    candidates in a fast scan, which a single alternation of all rules loses. The page
+    is lower-cased once and that copy serves both the token checks and the apply link.
+    """
+
+    def __init__(self, platforms: Mapping[str, Mapping[str, object]], api_patterns: Iterable[str]) -> None:
+        tokens = {name: [t.lower() for t in cfg.get("text", [])] for name, cfg in platforms.items()}  # type: ignore[union-attr]
+        self.tokens: Dict[type, Dict[str, list]] = {
+            str: tokens, bytes: {name: [t.encode() for t in ts] for name, ts in tokens.items()}
+        }
+        self.extract: Dict[str, Dict[str, Dict[type, re.Pattern]]] = {
+            name: {key: compile_for(p) for key, p in cfg.get("extract", {}).items()}  # type: ignore[union-attr]
+            for name, cfg in platforms.items()
+        }
+        self.api = [compile_for(p) for p in api_patterns]
+        self.apply_folded = compile_for(APPLY_LINK, 0)
+        self.apply = compile_for(APPLY_LINK)
+
+    def text_platform(self, page: Page, folded: Optional[Page] = None) -> Optional[str]:
+        """First PLATFORMS entry with a text token in `page` (`folded`: page.lower(), if at hand)."""
+        folded = page.lower() if folded is None else folded
+        for name, tokens in self.tokens[type(page)].items():
+            if any(t in folded for t in tokens):
+                return name
         return None
 
-    def find_paths(text: str, patterns: List[str]) -> List[str]:
-        return [
-            match.group(0)
-            for pattern in patterns
-            for match in re.finditer(pattern, text, re.I)
-        ]
-
-    platform = detect_platform(base_url, html) or "generic"
-    
-    # Initialize hints with base and platform information
-    hints: Dict[str, object] = {
-        "apply_page": base_url,
-        "platform": platform
-    }
+    def apply_link(self, page: Page, folded: Page) -> Optional[str]:
+        if len(folded) == len(page):
+            # lower() kept every offset, so the span can be read from the original page
+            m = self.apply_folded[type(page)].search(folded)
+            return as_text(page[m.start(1):m.end(1)]) if m else None
+        m = self.apply[type(page)].search(page)  # rare: lower-casing changed the length
+        return as_text(m.group(1)) if m else None
+
+    def hints(self, page: Page, url_platform: Optional[str] = None) -> Dict[str, object]:
+        folded = page.lower()
+        platform = url_platform or self.text_platform(page, folded) or "generic"
+        kind = type(page)
+        hints: Dict[str, object] = {"platform": platform}
+        for key, pattern in self.extract.get(platform, {}).items():
+            if m := pattern[kind].search(page):
+                hints[key] = as_text(m.group(1))
+        hints["api_hints"] = sorted({as_text(m.group(0)) for pattern in self.api for m in pattern[kind].finditer(page)})
+        if (link := self.apply_link(page, folded)) is not None:
+            hints["apply_link"] = link
+        return hints
+
+
+PLATFORM_DETECTOR = PlatformDetector(PLATFORMS, API_PATH_PATTERNS)
+
+
+def url_platform(url: str) -> str | None:
+    """PLATFORMS entry with the longest URL indicator found in `url`."""
+    url_l = url.lower()
+    url_matches = []
+    for platform, cfg in PLATFORMS.items():
+        indicators = [u for u in cfg.get("url", []) if u in url_l]
+        if indicators:
+            # score by longest matching indicator to reduce false positives
+            url_matches.append((max(map(len, indicators)), platform))
+    return max(url_matches)[1] if url_matches else None
+
+
+def detect_platform(url: str, text: str | bytes) -> str | None:
+    """Name of the PLATFORMS entry a page belongs to, by URL first and page text second."""
+    return url_platform(url) or PLATFORM_DETECTOR.text_platform(text)
+
 
-    # Platform-specific signals (data-driven)
-    extract = PLATFORMS.get(platform, {}).get("extract", {})  # type: ignore[assignment]
-    hints.update({
-        key: match.group(1)
-        for key, pattern in extract.items()  # type: ignore[union-attr]
-        if (match := re.search(pattern, html, re.I))
-    })
-
-    # Common API/apply paths
-    hints["api_hints"] = sorted(set(find_paths(html, API_PATH_PATTERNS)))
-
-    # Inline apply link
-    if (apply_match := re.search(r'href=[\"\']([^\"\']*apply[^\"\']*)[\"\']', html, re.I)):
-        hints["apply_link"] = apply_match.group(1)
-    return hints
+def parse_submit_hints_from_html(html: str | bytes, base_url: str = "") -> Dict[str, object]:
+    """Extract generic submit hints for SPA job pages (no <form> tags); `html` may be bytes."""
+    return {"apply_page": base_url, **PLATFORM_DETECTOR.hints(html, url_platform(base_url))}
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from net.browser import Browser, har_path  # noqa: E402
+from net.web import collect_from_scope, collect_from_scope_per_element  # noqa: E402
+
+
+def form_fields(count: int, prefix: str = "") -> str:
+    """A long application form: text, email, checkbox, radio, textarea and select fields with labels."""
+    rows = []
+    for i in range(count):
+        name = f"{prefix}q{i}"
+        kind = i % 6
+        if kind == 0:
+            control = f'<input id="{name}" name="{name}" type="text" placeholder="Answer {i}" required>'
+        elif kind == 1:
+            control = f'<input id="{name}" name="{name}" type="email" value="me@example.com">'
+        elif kind == 2:
+            control = f'<input id="{name}" name="{name}" type="checkbox" checked>'
+        elif kind == 3:
+            control = f'<input id="{name}" name="{name}" type="radio" aria-required="true">'
+        elif kind == 4:
+            control = f'<textarea id="{name}" name="{name}">Some text</textarea>'
+        else:
+            options = "".join(f'<option value="{v}"{" selected" if v == 2 else ""}>Option {v}</option>' for v in range(5))
+            control = f'<select id="{name}" name="{name}">{options}</select>'
+        rows.append(f'<div class="row"><label for="{name}">Question {i}</label>{control}</div>')
+    return "".join(rows)
+
+
+def synthetic_form(fields: int = 90, frame_fields: int = 20) -> str:
+    frame = f"<form>{form_fields(frame_fields, 'frame_')}</form>".replace('"', "&quot;")
+    return f'<html><body><form>{form_fields(fields)}</form><iframe srcdoc="{frame}"></iframe></body></html>'
+
+
+def timed(page, collect: Callable[..., List[Dict]], repeat: int = 3) -> tuple[float, List[Dict]]:
+    best, fields = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fields = [f for scope in page.frames for f in collect(scope)]
+        best = min(best, time.perf_counter() - start)
+    return best, fields
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time per-element vs one-evaluate form field collection.")
+    parser.add_argument("pages", nargs="*", help="URLs or HTML files (default: a synthetic form)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", action="store_true", help="capture each URL's session to target/har/")
+    mode.add_argument("--replay", action="store_true", help="serve each URL from its recorded archive, offline")
+    args = parser.parse_args()
+
+    for target in args.pages or [""]:
+        url = target if "://" in target or not target else Path(target).resolve().as_uri()
+        archive = har_path(url) if url.startswith("http") else None
+        with Browser(
+            record=archive if args.record else None, replay=archive if args.replay else None, block="forms-only"
+        ) as b:
+            if url:
+                b.go_to(url, wait_until="ready")
+            else:
+                b.page.set_content(synthetic_form(), wait_until="load")
+            old, old_fields = timed(b.page, collect_from_scope_per_element)
+            new, new_fields = timed(b.page, collect_from_scope)
+            same = "same fields" if old_fields == new_fields else "FIELDS DIFFER"
+            print(f"{target or 'synthetic form'}: {len(new_fields)} fields in {len(b.page.frames)} frames, {same}  "
+                  f"per-element {old * 1e3:.0f} ms  one evaluate per frame {new * 1e3:.1f} ms  ({old / new:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import html as htmlmod
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from net.text import html_to_text  # noqa: E402
+
+
+def regex_to_text(html: str) -> str:
+    """The previous Assistant.to_text: six re.sub passes plus unescape."""
+    if not html:
+        return ""
+    text = re.sub(r"(?is)<(script|style)[^>]*>.*?</\1>", " ", html)
+    text = re.sub(r"(?i)<\s*br\s*/?>|</\s*p\s*>|</\s*div\s*>|</\s*h[1-6]\s*>|</\s*li\s*>", "\n", text)
+    text = re.sub(r"(?s)<[^>]+>", " ", text)
+    text = htmlmod.unescape(text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"(\s*\n\s*)+", "\n", text)
+    return text.strip()
+
+
+def synthetic_page(jobs: int = 400) -> str:
+    """SPA-shaped page: a large inline JSON state blob plus the rendered postings."""
+    state = {"jobs": [{"id": i, "title": f"Engineer {i}", "description": "<p>Build things &amp; ship.</p>" * 20} for i in range(jobs)]}
+    blob = json.dumps(state).replace("<", "\\u003c")
+    body = "".join(
+        f"<div class='job'><h2>Engineer {i}</h2><p>Build data&nbsp;pipelines &amp; APIs.<br>Remote</p>"
+        f"<ul><li>Python</li><li>SQL</li></ul></div>\n"
+        for i in range(jobs)
+    )
+    return (
+        "<html><head><style>" + "body{margin:0}" * 500 + "</style>"
+        f"<script id='__NEXT_DATA__' type='application/json'>{blob}</script></head>"
+        f"<body>{body}</body></html>"
+    )
+
+
+def pages(args: List[str]) -> List[Tuple[str, str]]:
+    paths = [Path(a) for a in args] or sorted(Path("target").glob("**/*.html"))
+    found = [(str(p), p.read_text(encoding="utf-8", errors="replace")) for p in paths]
+    return found or [("synthetic", synthetic_page())]
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> int:
+    total_old = total_new = 0.0
+    for name, html in pages(sys.argv[1:]):
+        data = html.encode("utf-8")
+        chunks = [data[i:i + 65536] for i in range(0, len(data), 65536)]
+        old = best_of(lambda: regex_to_text(html))
+        new = best_of(lambda: html_to_text(html))
+        streamed = best_of(lambda: html_to_text(chunks))
+        total_old, total_new = total_old + old, total_new + new
+        print(f"{name}: {len(data) / 1e6:.2f} MB  regex {old * 1e3:.1f} ms  "
+              f"single-pass {new * 1e3:.1f} ms  streamed {streamed * 1e3:.1f} ms  ({old / new:.1f}x)")
+    print(f"total: regex {total_old * 1e3:.1f} ms  single-pass {total_new * 1e3:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
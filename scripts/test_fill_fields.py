@@ -22,7 +22,7 @@ def main() -> None:
 
     with Browser(headless=True) as b:
         b.go_to(url)
-        b.fill_fields(values)
+        print(b.fill_fields(values))
         # Snapshot current form values into attributes so they appear in saved HTML
         b.page.evaluate(
             "() => {"
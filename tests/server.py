@@ -0,0 +1,262 @@
+"""Local stand-in servers for tests (OpenAI-compatible chat endpoint, static pages)."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import socket
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Type
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler: Type[BaseHTTPRequestHandler]) -> None:
+        super().__init__(("127.0.0.1", 0), handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_json(self, data: object, status: int = 200, headers: dict | None = None) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def completion(payload: dict) -> dict:
+    text = payload["messages"][-1]["content"]
+    return {
+        "id": "chatcmpl-test",
+        "model": payload.get("model"),
+        "created": int(time.time()),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": f"echo: {text}"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": len(text.split()), "completion_tokens": 2, "total_tokens": len(text.split()) + 2},
+    }
+
+
+class ChatHandler(StubHandler):
+    delay = 0.05
+
+    def do_POST(self) -> None:
+        payload = self.read_json()
+        with self.server.lock:
+            self.server.requests.append(payload)
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        try:
+            time.sleep(self.delay)
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+        if payload.get("stream"):
+            self.send_stream(completion(payload))
+        else:
+            self.send_json(completion(payload))
+
+    def send_stream(self, done: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        meta = {k: done[k] for k in ("id", "model", "created")}
+        words = done["choices"][0]["message"]["content"].split(" ")
+        events = [
+            {**meta, "choices": [{"index": 0, "delta": {"content": w if i == 0 else f" {w}"}, "finish_reason": None}]}
+            for i, w in enumerate(words)
+        ]
+        events.append({**meta, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        events.append({**meta, "choices": [], "usage": done["usage"]})
+        for data in [*map(json.dumps, events), "[DONE]"]:
+            event = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FlakyHandler(StubHandler):
+    """Answers POSTs by `server.plan`, one step per request: "ok", "close" (answer, then drop
+    the keep-alive connection without announcing it), "cut" (drop it mid-body) or
+    "cut-chunked" (drop it after the first chunk of a chunked body)."""
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with self.server.lock:
+            step = self.server.__dict__["plan"][len(self.server.requests)]
+            self.server.requests.append(body)
+        self.send_response(200)
+        if step == "cut-chunked":
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(b"4\r\n0123\r\n")
+        else:
+            self.send_header("Content-Length", "10")
+            self.end_headers()
+            self.wfile.write(b"0123456789"[: 4 if step == "cut" else 10])
+        self.close_connection = step != "ok"
+
+
+class BatchHandler(StubHandler):
+    """Minimal Files + Batches API: a batch completes on its second poll."""
+
+    def read_upload(self) -> bytes:
+        boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        part = next(p for p in body.split(b"--" + boundary) if b'name="file"' in p)
+        return part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+
+    def do_POST(self) -> None:
+        store = self.server.__dict__.setdefault("store", {"files": {}, "batches": {}})
+        if self.path.endswith("/files"):
+            file_id = f"file-{len(store['files'])}"
+            store["files"][file_id] = self.read_upload()
+            self.send_json({"id": file_id, "purpose": "batch"})
+        elif self.path.endswith("/batches"):
+            payload = self.read_json()
+            batch_id = f"batch-{len(store['batches'])}"
+            store["batches"][batch_id] = {"id": batch_id, "status": "validating", "polls": 0, **payload}
+            self.send_json(store["batches"][batch_id])
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_GET(self) -> None:
+        store = self.server.__dict__["store"]
+        parts = self.path.strip("/").split("/")
+        if parts[-2] == "batches":
+            batch = store["batches"][parts[-1]]
+            batch["polls"] += 1
+            if batch["polls"] >= 2 and batch["status"] != "completed":
+                self.complete(store, batch)
+            self.send_json(batch)
+        elif parts[-1] == "content":
+            data = store["files"][parts[-2]]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def complete(self, store: dict, batch: dict) -> None:
+        out, errors = [], []
+        for line in store["files"][batch["input_file_id"]].decode().splitlines():
+            item = json.loads(line)
+            self.server.requests.append(item)
+            if "fail" in item["body"]["messages"][-1]["content"]:
+                errors.append({"custom_id": item["custom_id"], "response": {"status_code": 400, "body": {"error": "bad"}}})
+            else:
+                out.append({"custom_id": item["custom_id"], "response": {"status_code": 200, "body": completion(item["body"])}})
+        for key, lines in (("output_file_id", out), ("error_file_id", errors)):
+            file_id = f"file-{len(store['files'])}"
+            store["files"][file_id] = "".join(json.dumps(x) + "\n" for x in lines).encode()
+            batch[key] = file_id
+        batch["status"] = "completed"
+
+
+class PageHandler(StubHandler):
+    """Serves `server.pages[path]`: a dict with `body` and optional `headers`. Requests
+    whose If-None-Match/If-Modified-Since match the page's ETag/Last-Modified get a 304.
+    Pages with `trickle` set stream `body` as one chunk per `trickle` seconds, forever;
+    `delay` holds the response back and `compress` ("gzip", "deflate" or "raw-deflate")
+    encodes the body when the client accepts it. Tracks peak in-flight requests overall and per Host."""
+
+    def do_GET(self) -> None:
+        host = self.headers.get("Host", "")
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            by_host = self.server.__dict__.setdefault("in_flight_by_host", {})
+            peak = self.server.__dict__.setdefault("max_in_flight_by_host", {})
+            by_host[host] = by_host.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), by_host[host])
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        try:
+            self.send_page(self.server.__dict__.get("pages", {}).get(self.path.split("?")[0]))
+        finally:
+            with self.server.lock:
+                by_host[host] -= 1
+                self.server.in_flight -= 1
+
+    def send_page(self, page: dict | None) -> None:
+        if page is None:
+            self.send_json({"error": "not found"}, 404)
+            return
+        time.sleep(page.get("delay", 0))
+        headers = page.get("headers", {})
+        etag, modified = headers.get("ETag"), headers.get("Last-Modified")
+        if (etag and self.headers.get("If-None-Match") == etag) or (modified and self.headers.get("If-Modified-Since") == modified):
+            self.send_response(304)
+            self.send_header("Cache-Control", headers.get("Cache-Control", "no-cache"))
+            self.end_headers()
+            return
+        self.send_response(page.get("status", 200))
+        for key, value in {"Content-Type": "text/html", **headers}.items():
+            self.send_header(key, value)
+        if page.get("trickle"):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                while True:
+                    self.wfile.write(f"{len(page['body']):x}\r\n".encode() + page["body"] + b"\r\n")
+                    self.wfile.flush()
+                    time.sleep(page["trickle"])
+            except OSError:
+                return
+        body = page["body"]
+        if (encoding := page.get("compress")) and encoding.split("-")[-1] in self.headers.get("Accept-Encoding", ""):
+            body = compress(body, encoding)
+            self.send_header("Content-Encoding", encoding.split("-")[-1])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body)
+    deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS if encoding == "raw-deflate" else zlib.MAX_WBITS)
+    return deflate.compress(body) + deflate.flush()
+
+
+@contextmanager
+def serve(handler: Type[BaseHTTPRequestHandler] = ChatHandler) -> Iterator[StubServer]:
+    server = StubServer(handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+from contextlib import aclosing
+
+from assistant import Assistant, StageLimits
+from ml.llm import ChatChoice, ChatResponse, Message
+
+
+class SlowLLM:
+    """Async-only LLM that answers with the posting id found in the prompt."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.started = []
+        self.cancelled = 0
+
+    def count_prompt_tokens(self, messages, model=None) -> int:
+        return sum(len(m.content) for m in messages) // 4
+
+    async def async_chat(self, request):
+        self.started.append(time.perf_counter())
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        posting = next(w for w in request.messages[-1].content.split() if w.startswith("posting-"))
+        return ChatResponse(id="ok", model=None, choices=[ChatChoice(0, Message("assistant", posting))])
+
+
+class SlowSite(Assistant):
+    def __init__(self, llm, delay: float) -> None:
+        super().__init__(llm)
+        self.delay = delay
+        self.fetched = []
+        self.lock = threading.Lock()
+
+    def fetch(self, url: str) -> str:
+        time.sleep(self.delay)
+        if url.endswith("/bad"):
+            raise ConnectionError("connection refused")
+        with self.lock:
+            self.fetched.append((url, time.perf_counter()))
+        posting = url.rsplit("/", 1)[-1]
+        return f"<html><body><main><h1>Engineer {posting}</h1><p>You will build Python services.</p></main></body></html>"
+
+
+async def collect(assistant, urls, **options):
+    return [r async for r in assistant.generate_applications(urls, **options)]
+
+
+def test_stages_overlap_and_failures_are_reported_per_url():
+    llm = SlowLLM(delay=0.02)
+    assistant = SlowSite(llm, delay=0.1)
+    urls = [f"https://jobs.example.com/posting-{i}" for i in range(4)] + ["https://jobs.example.com/bad"]
+
+    results = asyncio.run(collect(assistant, urls, concurrency=StageLimits(fetch=1, text=1, llm=1)))
+
+    assert {r.url: r.output for r in results if r.error is None} == {u: u.rsplit("/", 1)[-1] for u in urls[:4]}
+    [failed] = [r for r in results if r.error is not None]
+    assert failed.url == urls[-1] and isinstance(failed.error, ConnectionError)
+    # The first answer is requested while later pages are still being fetched
+    assert llm.started[0] < assistant.fetched[-1][1]
+
+
+def test_breaking_out_early_cancels_the_remaining_work():
+    llm = SlowLLM(delay=0.5)
+    assistant = SlowSite(llm, delay=0.01)
+    urls = [f"https://jobs.example.com/posting-{i}" for i in range(50)]
+
+    async def first():
+        limits = StageLimits(fetch=2, text=1, llm=2, queue_size=2)
+        async with aclosing(assistant.generate_applications(urls, concurrency=limits)) as gen:
+            async for result in gen:
+                break
+        return result, asyncio.all_tasks() - {asyncio.current_task()}
+
+    result, left = asyncio.run(first())
+    assert result.output and result.error is None
+    assert not left
+    assert llm.cancelled >= 1 and len(assistant.fetched) < len(urls)
@@ -0,0 +1,23 @@
+import ml.openai as openai_module
+from ml.batch import BatchError, BatchJob, BatchRunner, custom_id
+from ml.llm import to_request
+from ml.openai import ChatGPT, ChatGPTConfig
+from tests.server import BatchHandler, serve
+
+
+def test_batch_round_trip_against_local_server(monkeypatch, tmp_path):
+    requests = [to_request(f"posting {i}", model="gpt-4o-mini") for i in range(5)]
+    requests += [to_request("posting 2", model="gpt-4o-mini"), to_request("please fail", model="gpt-4o-mini")]
+
+    with serve(BatchHandler) as server:
+        monkeypatch.setattr(openai_module, "OPENAI_API_BASE", server.base)
+        runner = BatchRunner(ChatGPT(ChatGPTConfig(api_key="test")), out_dir=tmp_path, poll_interval=0.01)
+        job = runner.submit(requests)
+        resumed = BatchJob.load(job.state_path)
+        results = runner.results(runner.wait(resumed, timeout=5))
+
+    assert len(server.requests) == 6  # duplicate request submitted once
+    assert [r.choices[0].message.content for r in results[:6]] == [f"echo: posting {i}" for i in (0, 1, 2, 3, 4, 2)]
+    assert isinstance(results[6], BatchError)
+    assert resumed.custom_ids[2] == resumed.custom_ids[5] == custom_id(requests[2])
+    assert BatchJob.load(job.state_path).status == "completed"
@@ -0,0 +1,200 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from net.browser import AsyncBrowser, AsyncBrowserPool, Browser, BrowserPool, RequestBlocker  # noqa: E402
+from net.web import collect_from_scope, collect_from_scope_per_element  # noqa: E402
+from tests.server import PageHandler, serve  # noqa: E402
+
+FORM = b"""<html><body><img src="/pixel.png" alt="">
+<form action="/thanks" method="post">
+  <label for="name">Name</label><input id="name" name="name" required>
+  <input type="email" name="email" placeholder="you@example.com">
+  <input type="checkbox" name="terms">
+  <select name="level"><option value="junior">Junior</option><option value="senior">Senior</option></select>
+  <textarea name="cover"></textarea>
+  <input type="file" name="cv">
+  <input type="hidden" name="token" value="t1">
+  <button type="submit">Apply</button>
+</form></body></html>"""
+
+# Renders its form late and polls forever, so it never reaches networkidle
+LATE = b"""<div id="app">Loading</div><script>
+setTimeout(() => { document.getElementById("app").innerHTML = '<form><input name="late"></form>'; }, 300);
+setInterval(() => fetch("/poll"), 100);
+</script>"""
+
+# A single-page app whose form depends on an API response
+SPA = b"""<div id="app"></div><script>
+fetch("/api/job").then(r => r.json()).then(job => {
+    document.getElementById("app").innerHTML = `<form><input name="${job.field}"></form>`;
+});
+</script>"""
+
+PAGES = {
+    "/form": {"body": FORM},
+    "/tracked": {"body": b'<img src="/pixel.png" alt=""><script src="https://www.googletagmanager.com/gtm.js"></script><p>Job</p>'},
+    "/late": {"body": LATE},
+    "/spa": {"body": SPA},
+    "/job": {"body": b'<h1>Engineer</h1><p>You will build Python services.</p><a href="/form">Apply</a>'},
+    "/api/job": {"body": b'{"field": "years_experience"}', "headers": {"Content-Type": "application/json"}},
+    "/pixel.png": {"body": b"\x89PNG\r\n\x1a\n", "headers": {"Content-Type": "image/png"}},
+}
+
+
+@pytest.fixture(scope="module")
+def site():
+    with serve(PageHandler) as server:
+        server.pages = PAGES
+        yield server
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = BrowserPool(size=1, max_pages=2, max_uses=3, max_memory_mb=None)
+    try:
+        pool.lease().release()
+    except Exception as exc:  # the driver is installed but no browser is
+        pool.close()
+        pytest.skip(f"no browser to launch: {exc}")
+    yield pool
+    pool.close()
+
+
+def test_fields_are_collected_in_one_evaluate_per_frame(pool, site):
+    with Browser(pool=pool) as b:
+        b.go_to(f"{site.base}/form")
+        fields = b.extract_inputs()
+        assert collect_from_scope(b.page) == collect_from_scope_per_element(b.page)
+
+    by_name = {f["name"]: f for f in fields}
+    assert [f["name"] for f in fields] == ["name", "email", "terms", "level", "cover", "cv", "token"]
+    assert by_name["name"]["label"] == "Name" and by_name["name"]["required"] is True
+    assert by_name["email"]["placeholder"] == "you@example.com" and by_name["cover"]["type"] == "textarea"
+    assert by_name["level"]["options"][0] == {"value": "junior", "label": "Junior", "selected": True}
+    assert by_name["terms"]["checked"] is False and by_name["token"]["value"] == "t1"
+
+
+def test_pool_caps_pages_recycles_browsers_and_rolls_back_failed_leases(pool):
+    launched, leases = pool.stats.launched, pool.stats.leases
+    with Browser(pool=pool), Browser(pool=pool):
+        assert pool.stats.pages == 2
+        with pytest.raises(RuntimeError, match="page limit"):
+            Browser(pool=pool)
+    with pytest.raises(Exception):
+        Browser(pool=pool, viewport="not a size")
+    assert (pool.stats.pages, pool.stats.leases) == (0, leases + 2)
+
+    for _ in range(pool.max_uses):
+        Browser(pool=pool).close()
+    assert pool.stats.recycled >= 1 and pool.stats.launched > launched
+
+
+def run_async(coro):
+    # The sync API leaves its event loop marked as running on this thread
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def test_async_browsers_share_a_browser_that_closes_with_the_last_of_them(pool, site):
+    async def main():
+        shared = AsyncBrowserPool(max_pages=2, auto_close=True)
+
+        async def fields():
+            async with AsyncBrowser(pool=shared) as b:
+                await b.go_to(f"{site.base}/form", wait_until="ready")
+                return [f["name"] for f in await b.extract_inputs(wait=False)], b.context.browser
+
+        results = await asyncio.gather(*(fields() for _ in range(3)))
+        lazy = AsyncBrowser(pool=shared)
+        info = await lazy.extract_form_submit_info()
+        await lazy.aclose()
+        return results, info
+
+    results, info = run_async(main())
+    assert [names for names, _ in results] == [["name", "email", "terms", "level", "cover", "cv", "token"]] * 3
+    assert len({id(browser) for _, browser in results}) == 1 and not results[0][1].is_connected()
+    assert info == {"action": "about:blank", "method": "GET", "enctype": "application/x-www-form-urlencoded", "submit_buttons": []}
+
+
+def test_bulk_fill_reports_a_status_per_field(pool, site, tmp_path):
+    cv = tmp_path / "cv.pdf"
+    cv.write_bytes(b"%PDF-1.4")
+    values = {"name": "Ada", "email": None, "terms": True, "level": "Senior", "cover": 3, "cv": cv, "nickname": "x"}
+    with Browser(pool=pool) as b:
+        b.go_to(f"{site.base}/form")
+        report = b.fill_fields(values)
+        state = b.page.eval_on_selector_all(
+            "input, select, textarea", "els => Object.fromEntries(els.map(e => [e.name, e.type === 'checkbox' ? e.checked : e.value]))"
+        )
+
+    assert report == {
+        "name": "filled", "email": "skipped", "terms": "checked", "level": "selected", "cover": "filled", "cv": "uploaded",
+        "nickname": "missing",
+    }
+    assert {k: state[k] for k in ("name", "terms", "level", "cover")} == {"name": "Ada", "terms": True, "level": "senior", "cover": "3"}
+    assert state["cv"].endswith("cv.pdf")
+
+
+def test_blocking_profile_aborts_images_and_trackers(pool, site):
+    pixels = site.requests.count("/pixel.png")
+    with Browser(pool=pool, block="forms-only") as b:
+        b.go_to(f"{site.base}/tracked", wait_until="load")
+        stats = b.blocker.stats
+    assert stats.blocked == {"image": 1, "tracker": 1} and stats.allowed >= 1
+    assert site.requests.count("/pixel.png") == pixels
+
+
+class Request:
+    def __init__(self, url: str, resource_type: str = "script") -> None:
+        self.url, self.resource_type = url, resource_type
+
+
+def test_profiles_leave_form_providers_and_consent_banners_alone():
+    forms = ["https://js.hsforms.net/forms/v2.js", "https://boards.greenhouse.io/embed/job_board/js", "https://jobs.lever.co/acme/apply"]
+    consent = "https://cdn.cookielaw.org/scripttemplates/otSDKStub.js"
+    for profile in ("forms-only", "text-only"):
+        blocker = RequestBlocker(profile)
+        assert [blocker.reason(Request(url)) for url in [*forms, consent]] == [None] * 4
+        assert blocker.reason(Request("https://js.hs-analytics.net/analytics.js")) == "tracker"
+
+    opted_in = RequestBlocker("forms-only+consent")
+    assert opted_in.reason(Request(consent)) == "consent" and opted_in.reason(Request(forms[0])) is None
+    with pytest.raises(ValueError, match="unknown host group"):
+        RequestBlocker("forms-only+ads")
+
+
+def test_ready_wait_settles_on_a_page_that_never_goes_network_idle(pool, site):
+    with Browser(pool=pool) as b:
+        b.go_to(f"{site.base}/late", wait_until="ready", timeout_ms=10_000)
+        idle = b.wait_until_ready(strategy="networkidle", timeout_ms=1_500)
+    ready = b.waits[0]
+    assert (ready.strategy, ready.ready, ready.controls) == ("ready", True, 1)
+    assert 0.5 <= ready.waited < 5
+    assert not idle.ready and len(b.waits) == 2
+
+
+def test_ready_wait_settles_quickly_on_a_page_without_form_controls(pool, site):
+    with Browser(pool=pool) as b:
+        b.go_to(f"{site.base}/job", wait_until="ready", timeout_ms=20_000)
+        assert b.click_link_with_text("Apply") == f"{site.base}/form"
+    description, form = b.waits
+    assert (description.ready, description.controls) == (True, 0) and description.waited < 5
+    assert form.ready and form.controls > 0
+
+
+def test_har_replay_serves_a_recorded_session_without_the_network(pool, site, tmp_path):
+    archive, url = tmp_path / "spa.har.zip", f"{site.base}/spa"
+    with Browser(pool=pool, record=archive) as b:
+        b.go_to(url, wait_until="ready")
+        recorded = b.extract_inputs(wait=False)
+    served = len(site.requests)
+
+    with Browser(pool=pool, replay=archive) as b:
+        b.go_to(url, wait_until="ready")
+        replayed = b.extract_inputs(wait=False)
+    assert [f["name"] for f in replayed] == [f["name"] for f in recorded] == ["years_experience"]
+    assert len(site.requests) == served
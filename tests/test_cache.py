@@ -0,0 +1,58 @@
+from ml.cache import CachedLLM, ResponseCache, request_key
+from ml.llm import ChatChoice, ChatRequest, ChatResponse, Message, Usage, to_request
+
+
+class CountingLLM:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def chat(self, request: ChatRequest) -> ChatResponse:
+        self.calls += 1
+        text = request.messages[-1].content
+        return ChatResponse(
+            id=f"r{self.calls}",
+            model=request.model,
+            choices=[ChatChoice(0, Message("assistant", text.upper()), "stop")],
+            usage=Usage(3, 2, 5),
+        )
+
+
+def test_repeat_requests_are_served_from_disk(tmp_path):
+    llm = CountingLLM()
+    cached = CachedLLM(llm, ResponseCache(tmp_path / "llm.sqlite"))
+    first = cached.chat(to_request("hello", model="m", temperature=0.2))
+    second = cached.chat(to_request("hello", model="m", temperature=0.2))
+    other = cached.chat(to_request("hello", model="m", temperature=0.7))
+
+    assert llm.calls == 2
+    assert second.choices[0].message.content == first.choices[0].message.content == "HELLO"
+    assert second.usage == Usage(3, 2, 5)
+    assert (cached.stats.hits, cached.stats.misses) == (1, 2)
+    assert other.id == "r2"
+
+    # A new process sees the same entries
+    reopened = CachedLLM(llm, ResponseCache(tmp_path / "llm.sqlite"))
+    reopened.chat(to_request("hello", model="m", temperature=0.7))
+    assert llm.calls == 2 and reopened.stats.entries == 2
+
+
+def test_key_ignores_stream_flag_and_tracks_content():
+    base = to_request("x", model="m")
+    assert request_key(base) == request_key(to_request("x", model="m", stream=True))
+    assert request_key(base) != request_key(to_request("y", model="m"))
+    assert request_key(to_request("x"), "m") == request_key(base)
+
+
+def test_lru_eviction_keeps_size_bounded(tmp_path):
+    llm = CountingLLM()
+    cache = ResponseCache(tmp_path / "llm.sqlite", max_bytes=2_000)
+    cached = CachedLLM(llm, cache)
+    for i in range(20):
+        cached.chat(to_request(f"prompt {i} " + "x" * 100, model="m"))
+        cached.chat(to_request("prompt 0 " + "x" * 100, model="m"))  # keep entry 0 hot
+
+    assert cache.stats.bytes <= 2_000
+    assert cache.stats.evictions > 0
+    calls = llm.calls
+    cached.chat(to_request("prompt 0 " + "x" * 100, model="m"))
+    assert llm.calls == calls
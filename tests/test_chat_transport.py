@@ -0,0 +1,111 @@
+import asyncio
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ml.openai as openai_module
+from ml.llm import user
+from ml.openai import ChatGPT, ChatGPTConfig, ChatRequest
+from ml.ratelimit import retryable
+from tests.server import FlakyHandler, serve
+from util.http import AsyncConnectionPool, ConnectionPool, IncompleteBody
+
+
+def local_client(monkeypatch, server, **config) -> ChatGPT:
+    monkeypatch.setattr(openai_module, "OPENAI_API_BASE", server.base)
+    return ChatGPT(ChatGPTConfig(default_model="gpt-4o-mini", api_key="test", **config))
+
+
+def test_async_chat_against_local_server(monkeypatch):
+    """Many concurrent async_chat calls share one loop, a bounded set of keep-alive connections."""
+    async def run(client: ChatGPT) -> tuple[list, int]:
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick = asyncio.create_task(ticker())
+        responses = await asyncio.gather(*(
+            client.async_chat(ChatRequest(messages=[user(f"hello {i}")])) for i in range(40)
+        ))
+        tick.cancel()
+        await client.aclose()
+        return responses, ticks
+
+    with serve() as server:
+        responses, ticks = asyncio.run(run(local_client(monkeypatch, server, max_in_flight=4)))
+
+    assert [r.choices[0].message.content for r in responses] == [f"echo: hello {i}" for i in range(40)]
+    assert server.max_in_flight <= 4
+    assert server.connections <= 4
+    assert ticks > 10  # the loop kept running while requests were in flight
+
+
+def test_chat_reuses_pooled_connections_across_threads(monkeypatch):
+    with serve() as server:
+        client = local_client(monkeypatch, server, pool_size=3)
+        with ThreadPoolExecutor(3) as pool:
+            responses = list(pool.map(lambda i: client.chat(ChatRequest(messages=[user(f"hi {i}")])), range(30)))
+        client.close()
+
+    assert [r.choices[0].message.content for r in responses] == [f"echo: hi {i}" for i in range(30)]
+    assert server.connections <= 3
+    assert client.pool.stats.opened == server.connections
+    assert sum(r.timing.reused for r in responses) == 30 - server.connections
+    assert all(r.timing.ttfb <= r.timing.total for r in responses)
+
+
+def test_chat_stream_yields_deltas_then_builds_response(monkeypatch):
+    with serve() as server:
+        client = local_client(monkeypatch, server)
+        stream = client.chat_stream(ChatRequest(messages=[user("stream me please")]))
+        deltas = list(stream)
+        again = client.chat(ChatRequest(messages=[user("and again")], stream=True))
+
+    assert deltas == ["echo:", " stream", " me", " please"]
+    assert stream.response.choices[0].message.content == "echo: stream me please"
+    assert stream.response.choices[0].finish_reason == "stop"
+    assert stream.response.usage.total_tokens == 5
+    assert stream.first_token is not None
+    assert server.requests[0]["stream"] is True
+    assert again.choices[0].message.content == "echo: and again"
+    assert client.pool.stats.reused == 1
+
+
+def test_pools_resend_only_when_no_response_arrived():
+    with serve(FlakyHandler) as server:
+        server.plan = ["close", "ok", "cut", "ok"]
+        pool = ConnectionPool()
+        assert pool.request("POST", server.base, body=b"1").body == b"0123456789"
+        assert pool.request("POST", server.base, body=b"2").timing.reused is False  # stale: resent on a new connection
+        with pytest.raises(http.client.IncompleteRead):
+            pool.request("POST", server.base, body=b"3")
+    assert server.requests == [b"1", b"2", b"3"]
+
+    async def run(pool: AsyncConnectionPool) -> None:
+        assert (await pool.request("POST", server.base, body=b"1")).body == b"0123456789"
+        assert (await pool.request("POST", server.base, body=b"2")).timing.reused is False
+        with pytest.raises(IncompleteBody):
+            await pool.request("POST", server.base, body=b"3")
+
+    with serve(FlakyHandler) as server:
+        server.plan = ["close", "ok", "cut", "ok"]
+        asyncio.run(run(AsyncConnectionPool()))
+    assert server.requests == [b"1", b"2", b"3"]
+
+
+def test_a_chunked_body_cut_short_is_a_connection_error():
+    async def run(pool: AsyncConnectionPool) -> None:
+        with pytest.raises(IncompleteBody):
+            await pool.request("POST", server.base, body=b"1")
+        assert (await pool.request("POST", server.base, body=b"2")).body == b"0123456789"
+
+    with serve(FlakyHandler) as server:
+        server.plan = ["cut-chunked", "ok"]
+        asyncio.run(run(AsyncConnectionPool()))
+    assert server.requests == [b"1", b"2"]
+    assert issubclass(IncompleteBody, ConnectionError) and retryable(IncompleteBody("cut"))
@@ -0,0 +1,64 @@
+import json
+
+from ml.tokens import estimate_tokens
+from net.content import extract_content
+from net.text import html_to_text
+
+
+DESCRIPTION = "".join(
+    f"<p>We are hiring a data engineer to build streaming pipelines, batch jobs, and APIs (part {i}), "
+    "working with Python, SQL, and Kafka across teams.</p>"
+    for i in range(4)
+) + "<ul><li>5+ years of Python, SQL and distributed systems</li><li>Experience with Airflow, dbt or Spark</li></ul>"
+
+CHROME = (
+    "<nav class='site-nav'>" + "".join(f"<a href='/p{i}'>Products and solutions {i}</a>" for i in range(30)) + "</nav>"
+    "<div id='cookie-banner'><p>We use cookies to improve your experience, measure traffic, and personalise ads. "
+    "By continuing you agree to our cookie policy, privacy notice, and terms of use.</p><button>Accept all</button></div>"
+)
+OPENINGS = "<div class='other-jobs'><h3>Other openings</h3><ul>" + "".join(
+    f"<li><a href='/jobs/{i}'>Senior Software Engineer, Platform Infrastructure {i}</a></li>" for i in range(40)
+) + "</ul></div>"
+FOOTER = "<footer><p>" + "Legal notice, equal opportunity statement, accessibility, sitemap. " * 15 + "</p></footer>"
+
+
+def page(main: str, head: str = "") -> str:
+    return f"<html><head><title>Data Engineer - Acme</title>{head}</head><body>{CHROME}{main}{OPENINGS}{FOOTER}</body></html>"
+
+
+def test_density_scoring_keeps_the_posting_and_drops_chrome():
+    html = page(f"<main><h1>Data Engineer</h1><div class='posting'>{DESCRIPTION}</div></main>")
+    content = extract_content(html, "https://careers.acme.com/jobs/1")
+
+    assert content.source == "density"
+    assert content.title == "Data Engineer"
+    assert "streaming pipelines" in content.body and "- Experience with Airflow" in content.body
+    for noise in ("Products and solutions", "cookies", "Other openings", "Legal notice"):
+        assert noise not in content.body
+    assert estimate_tokens(content.as_text()) < estimate_tokens(html_to_text(html)) / 2
+
+
+def test_platform_hints_pick_the_description_and_headline():
+    html = page(
+        "<div class='job__title'><h1>Data Engineer</h1><div class='job__location'>Berlin, Germany</div></div>"
+        f"<div class='job__description body'>{DESCRIPTION}</div>"
+    )
+    content = extract_content(html, "https://job-boards.greenhouse.io/acme/jobs/123")
+
+    assert (content.platform, content.source) == ("greenhouse", "hint")
+    assert (content.title, content.location) == ("Data Engineer", "Berlin, Germany")
+    assert content.body.startswith("We are hiring") and "Other openings" not in content.body
+
+
+def test_json_ld_job_posting_wins():
+    posting = {
+        "@context": "https://schema.org", "@type": "JobPosting", "title": "Data Engineer",
+        "hiringOrganization": {"@type": "Organization", "name": "Acme"},
+        "jobLocation": [{"@type": "Place", "address": {"addressLocality": "Berlin", "addressCountry": "DE"}}],
+        "description": DESCRIPTION,
+    }
+    html = page("<div id='root'></div>", f"<script type='application/ld+json'>{json.dumps({'@graph': [posting]})}</script>")
+    content = extract_content(html)
+
+    assert (content.source, content.title, content.company, content.location) == ("json-ld", "Data Engineer", "Acme", "Berlin, DE")
+    assert content.as_text().startswith("Title: Data Engineer\nCompany: Acme\nLocation: Berlin, DE\nWe are hiring")
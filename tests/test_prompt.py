@@ -0,0 +1,39 @@
+import pytest
+
+from ml.openai import ChatGPT, ChatGPTConfig, Usage
+from ml.prompt import Section, assemble
+from ml.tokens import estimate_tokens
+
+
+def test_assemble_drops_lowest_value_items_until_it_fits():
+    paragraphs = [f"paragraph {i} " + "word " * 20 for i in range(10)]
+    scores = [1.0 if i < 3 else 0.1 * i / 10 for i in range(10)]
+    parts = ["Header\n", Section("job", paragraphs, lambda kept: "\n".join(kept), scores, keep=1)]
+
+    full = assemble(parts, None, estimate_tokens)
+    assert not full.dropped
+
+    trimmed = assemble(parts, full.tokens // 2, estimate_tokens)
+    assert trimmed.fits
+    assert [d.index for d in trimmed.dropped] == list(range(3, 3 + len(trimmed.dropped)))
+    assert all(p in trimmed.text for p in paragraphs[:3])
+
+
+def test_assemble_respects_keep_and_reports_overflow():
+    parts = [Section("job", ["a " * 50, "b " * 50], lambda kept: "".join(kept), [0.5, 0.1], keep=1)]
+    result = assemble(parts, 5, estimate_tokens)
+    assert not result.fits
+    assert [d.index for d in result.dropped] == [1]
+
+
+def test_cached_prompt_tokens_are_parsed_and_billed_at_the_cached_rate():
+    usage = Usage.from_dict({
+        "prompt_tokens": 1000, "completion_tokens": 100, "total_tokens": 1100, "prompt_tokens_details": {"cached_tokens": 800},
+    })
+    assert usage.cached_tokens == 800
+    assert Usage.from_dict({"prompt_tokens": 5, "prompt_tokens_details": None}).cached_tokens == 0
+
+    client = ChatGPT(ChatGPTConfig(default_model="gpt-5", api_key="test"))
+    assert client.price_for_usage(usage) == pytest.approx(200 * 1.25e-6 + 800 * 0.125e-6 + 100 * 10e-6)
+    # Models without a cached rate bill cached tokens as ordinary input
+    assert client.price_for_usage(usage, "gpt-4o-mini") == pytest.approx(1100 * 0.15 / 1000)
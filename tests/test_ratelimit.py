@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from ml.llm import ChatChoice, ChatResponse, Message, Usage, to_request
+from ml.ratelimit import RateLimitedLLM, RateLimiter, RetryPolicy, TokenBucket, retry_after
+from util.http import HTTPStatusError
+
+
+class FlakyLLM:
+    def __init__(self, failures: list) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    def count_prompt_tokens(self, messages, model=None) -> int:
+        return 10
+
+    def chat(self, request):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return ChatResponse(id="ok", model=None, choices=[ChatChoice(0, Message("assistant", "hi"))], usage=Usage(10, 2, 12))
+
+    async def async_chat(self, request):
+        return self.chat(request)
+
+    def chat_stream(self, request):
+        return FakeStream(self.chat(request))
+
+
+class FakeStream:
+    def __init__(self, response) -> None:
+        self.final = response
+        self.response = None
+
+    def __iter__(self):
+        yield from ["h", "i"]
+        self.response = self.final
+
+
+def test_bucket_reservations_queue_behind_each_other():
+    bucket = TokenBucket(per_minute=60, capacity=2)
+    assert [round(bucket.reserve(1)) for _ in range(4)] == [0, 0, 1, 2]
+
+
+def test_retries_honor_retry_after_and_pause_the_limiter():
+    sleeps = []
+    throttled = HTTPStatusError(429, "Too Many Requests", {"retry-after": "3"}, b"")
+    llm = FlakyLLM([throttled, HTTPStatusError(503, "Unavailable", {}, b"")])
+    limiter = RateLimiter(rpm=6000, tpm=1_000_000)
+    client = RateLimitedLLM(llm, limiter, retry=RetryPolicy(base_delay=0.01), sleep=sleeps.append)
+
+    assert client.chat(to_request("x", max_tokens=100)).id == "ok"
+    assert llm.calls == 3
+    assert sleeps[0] >= 3 and sleeps[1] > 2.5  # backoff, then the shared pause
+    assert sleeps[2] <= 0.02
+    assert limiter.paused_until > 0
+
+
+def test_non_retryable_errors_and_exhausted_retries_raise():
+    client = RateLimitedLLM(FlakyLLM([HTTPStatusError(400, "Bad Request", {}, b"")]), sleep=lambda _: None)
+    with pytest.raises(HTTPStatusError):
+        client.chat(to_request("x"))
+
+    client = RateLimitedLLM(FlakyLLM([ConnectionError()] * 3), retry=RetryPolicy(max_retries=2), sleep=lambda _: None)
+    with pytest.raises(ConnectionError):
+        client.chat(to_request("x"))
+
+
+def test_async_admission_refunds_unused_tokens():
+    limiter = RateLimiter(tpm=600)
+    client = RateLimitedLLM(FlakyLLM([]), limiter)
+    asyncio.run(client.async_chat(to_request("x", max_tokens=90)))
+    assert round(limiter.tokens.level) == 600 - 12
+    assert retry_after(HTTPStatusError(429, "", {"retry-after-ms": "250"}, b"")) == 0.25
+    assert retry_after(HTTPStatusError(429, "", {"retry-after": "soon"}, b"")) is None
+
+
+def test_failed_attempts_give_back_their_tokens():
+    limiter = RateLimiter(tpm=600)
+    llm = FlakyLLM([HTTPStatusError(429, "Too Many Requests", {"retry-after": "soon"}, b""), ConnectionError()])
+    client = RateLimitedLLM(llm, limiter, retry=RetryPolicy(base_delay=0), sleep=lambda _: None)
+    assert client.chat(to_request("x", max_tokens=90)).id == "ok"
+    assert llm.calls == 3
+    assert round(limiter.tokens.level) == 600 - 12
+
+
+def test_streams_settle_when_exhausted():
+    limiter = RateLimiter(tpm=600)
+    client = RateLimitedLLM(FlakyLLM([]), limiter)
+    stream = client.chat_stream(to_request("x", max_tokens=90))
+    assert round(limiter.tokens.level) == 600 - 100
+    assert "".join(stream) == "hi"
+    assert stream.response.id == "ok"
+    assert round(limiter.tokens.level) == 600 - 12
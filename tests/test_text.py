@@ -0,0 +1,27 @@
+from net.text import html_to_text
+
+
+PAGE = (
+    "<html><head><style>body { color: red }</style>"
+    "<script>var s = '<div>not text</div>';</script></head>"
+    "<body><h1>Senior Engineer</h1><!-- tracking <p> -->"
+    "<p>Build   data&nbsp;pipelines &amp; APIs.<br/>Remote</p>"
+    "<ul><li>Python</li><li>SQL</li></ul><SCRIPT type='x'>junk</SCRIPT ></body></html>"
+)
+EXPECTED = "Senior Engineer\nBuild data pipelines & APIs.\nRemote\nPython\nSQL"
+
+
+def test_drops_raw_elements_and_keeps_line_breaks():
+    assert html_to_text(PAGE) == EXPECTED
+
+
+def test_chunked_and_bytes_input_match_whole_document():
+    data = PAGE.replace("Remote", "Zürich").encode("utf-8")
+    expected = EXPECTED.replace("Remote", "Zürich")
+    assert html_to_text(data) == expected
+    for size in (1, 3, 7, 64):
+        assert html_to_text(data[i:i + size] for i in range(0, len(data), size)) == expected
+
+
+def test_unterminated_script_drops_rest_of_document():
+    assert html_to_text("<p>kept</p><script>var a = 1 < 2;") == "kept"
@@ -0,0 +1,20 @@
+from ml.llm import user
+from ml.tokens import TokenCounter, estimate_tokens
+
+
+def test_batch_counts_match_single_counts_and_are_memoized():
+    counter = TokenCounter()
+    prompts = [[user("You are a helpful assistant."), user(f"Posting {i}: build data pipelines")] for i in range(50)]
+    prompts.append("a plain string prompt")
+
+    batch = counter.count_batch(prompts, "gpt-4o-mini")
+    # the shared system message is encoded and stored once
+    assert counter.cache_info() == (49, 52, counter.max_entries, 52)
+    assert batch == [counter.count_messages(p, "gpt-4o-mini") if isinstance(p, list) else counter.count_text(p, "gpt-4o-mini") for p in prompts]
+    assert counter.cache_info().misses == 52
+
+
+def test_estimator_tracks_word_and_punctuation_pieces():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Hello world, this is a test.") == 8
+    assert estimate_tokens("internationalization") > 1
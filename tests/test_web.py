@@ -0,0 +1,231 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from net.cache import HTTPCache
+from net.text import TextExtractor
+from net.web import (
+    FORM_CONTROLS, Crawler, URLMatch, canonical_url, detect_platform, download_pages, fetch, find_url_with_domain, get_html,
+    load_state, open_page, parse_submit_hints_from_html, ready_selector, scan_urls, sniff_charset, wait_until_ready,
+)
+from tests.server import PageHandler, serve
+from util.http import ConnectionPool
+
+
+def test_byte_cap_and_deadline_stop_reading_early():
+    with serve(PageHandler) as server:
+        server.pages = {
+            "/big": {"body": b"<p>" + b"x" * 1_000_000 + b"</p>"},
+            "/endless": {"body": b"<p>still loading</p>", "trickle": 0.02},
+        }
+        with open_page(f"{server.base}/big", max_bytes=100_000, chunk_size=8192) as page:
+            data = page.read()
+        assert (len(data), page.bytes_read, page.stopped) == (100_000, 100_000, "max_bytes")
+
+        started = time.monotonic()
+        with open_page(f"{server.base}/endless", deadline=0.3) as page:
+            text = page.text()
+        assert page.stopped == "deadline" and time.monotonic() - started < 2
+        assert text.startswith("<p>still loading</p>")
+
+
+def test_meta_charset_is_sniffed_and_chunks_feed_a_parser():
+    body = ("<html><head><meta charset='iso-8859-1'></head><body><p>Zürich – café</p></body></html>").encode("cp1252")
+    with serve(PageHandler) as server:
+        server.pages = {"/latin": {"body": body}}
+        with open_page(f"{server.base}/latin", chunk_size=7) as page:
+            text = page.feed(TextExtractor()).close()
+        assert page.encoding == "cp1252" and text == "Zürich – café"
+        assert "Zürich" in get_html(f"{server.base}/latin")
+
+
+def test_sniff_charset_prefers_bom_then_header_then_meta():
+    assert sniff_charset(b"\xef\xbb\xbf<html>", "latin-1") == "utf-8-sig"
+    assert sniff_charset(b"<meta charset=shift_jis>", "utf-8") == "utf-8"
+    assert sniff_charset(b'<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">') == "shift_jis"
+    assert sniff_charset(b"<meta charset=bogus>") == "utf-8"
+
+
+def test_http_cache_serves_fresh_pages_and_revalidates_stale_ones(tmp_path):
+    cache = HTTPCache(tmp_path / "http.sqlite")
+    with serve(PageHandler) as server:
+        server.pages = {
+            "/fresh": {"body": b"<p>fresh</p>", "headers": {"Cache-Control": "max-age=600"}},
+            "/etag": {"body": "<p>Zürich</p>".encode(), "headers": {"ETag": '"v1"', "Content-Type": "text/html; charset=utf-8"}},
+            "/dated": {"body": b"<p>dated</p>", "headers": {"Last-Modified": "Wed, 01 Oct 2025 10:00:00 GMT"}},
+            "/nostore": {"body": b"<p>private</p>", "headers": {"Cache-Control": "no-store", "ETag": '"x"'}},
+        }
+        for _ in range(3):
+            assert get_html(f"{server.base}/fresh", cache=cache) == "<p>fresh</p>"
+            assert get_html(f"{server.base}/etag", cache=cache) == "<p>Zürich</p>"
+            assert fetch(f"{server.base}/dated", cache=cache)[0] == b"<p>dated</p>"
+            assert fetch(f"{server.base}/nostore", cache=cache)[0] == b"<p>private</p>"
+
+    assert server.requests.count("/fresh") == 1
+    assert server.requests.count("/etag") == server.requests.count("/dated") == server.requests.count("/nostore") == 3
+    assert (cache.stats.hits, cache.stats.revalidated, cache.stats.misses) == (2, 4, 6)
+    assert cache.stats.entries == 3
+
+    # A new process reuses the stored pages
+    assert HTTPCache(tmp_path / "http.sqlite").lookup(f"{server.base}/etag").body == "<p>Zürich</p>".encode()
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path):
+    cache = HTTPCache(tmp_path / "http.sqlite", max_bytes=2500)
+    for i in range(5):
+        cache.store(f"https://example.com/{i}", {"Cache-Control": "max-age=60"}, b"x" * 1000)
+        cache.lookup("https://example.com/0")
+    assert cache.stats.bytes <= 2500 and cache.stats.evictions == 3
+    assert cache.lookup("https://example.com/0") is not None and cache.lookup("https://example.com/3") is None
+
+
+def test_http_cache_counts_hits_from_many_threads(tmp_path):
+    cache = HTTPCache(tmp_path / "http.sqlite")
+    cache.store("https://example.com/", {"Cache-Control": "max-age=60"}, b"x" * 10)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: cache.fetch("https://example.com/", send=None), range(800)))
+    assert (cache.stats.hits, cache.stats.bytes_saved) == (800, 8000)
+
+
+def test_crawler_limits_per_host_dedupes_and_resumes(tmp_path):
+    with serve(PageHandler) as server:
+        port = server.server_address[1]
+        server.pages = {f"/job/{i}": {"body": f"<p>job {i}</p>".encode(), "delay": 0.05} for i in range(6)}
+        hosts = [f"http://127.0.0.1:{port}", f"http://localhost:{port}"]
+        urls = [f"{host}/job/{i}" for host in hosts for i in range(6)]
+        urls += [f"{hosts[0]}/job/0?utm_source=feed#apply", f"{hosts[1].upper()}/job/1", f"{hosts[0]}/job/missing"]
+
+        crawler = Crawler(tmp_path, concurrency=4, per_host=2, min_delay=0)
+        assert [crawler.add(u, priority=1 if "missing" in u else 0) for u in urls].count(False) == 2
+        results = crawler.run()
+
+        assert len(results) == 13 and len(server.requests) == 13
+        assert max(server.max_in_flight_by_host.values()) == 2 and server.max_in_flight > 2
+        assert all(r.html_path and r.html_path.read_bytes() == f"<p>job {r.url[-1]}</p>".encode() for r in results[:12])
+        assert results[12].html_path is None
+
+        # A second run finds finished pages in the state file and only retries the failure
+        server.pages["/job/missing"] = {"body": b"<p>back</p>"}
+        again = download_pages(urls, tmp_path, concurrency=4)
+        assert len(server.requests) == 14
+        assert [r.html_path for r in again[:12]] == [r.html_path for r in results[:12]]
+        assert again[12].html_path.read_bytes() == b"<p>back</p>"
+
+
+def test_canonical_url_drops_tracking_and_fragments():
+    assert canonical_url("HTTPS://Jobs.Lever.co:443/acme/123?lever-source=x&b=2&a=1#top") == "https://jobs.lever.co/acme/123?a=1&b=2"
+    assert canonical_url("http://example.com") == "http://example.com/"
+
+
+def test_fetches_reuse_connections_and_decompress_while_streaming():
+    text = "".join(f"<p>Responsibilities {i}: build pipelines</p>" for i in range(5000)).encode()
+    pool = ConnectionPool()
+    with serve(PageHandler) as server:
+        server.pages = {
+            "/gzip": {"body": text, "compress": "gzip"},
+            "/deflate": {"body": text, "compress": "deflate"},
+            "/raw": {"body": text, "compress": "raw-deflate"},
+            "/moved": {"body": b"", "status": 301, "headers": {"Location": "/gzip"}},
+        }
+        for path in ("/gzip", "/deflate", "/raw", "/moved", "/gzip"):
+            with open_page(f"{server.base}{path}", pool=pool, chunk_size=4096) as page:
+                assert page.read() == text
+        with open_page(f"{server.base}/moved", pool=pool, max_bytes=10_000, chunk_size=1024) as page:
+            assert len(page.read()) == 10_000 and page.stopped == "max_bytes"
+        assert page.final_url == f"{server.base}/gzip"
+        # the capped read leaves a half-read body, so its connection is not reused
+        with open_page(f"{server.base}/raw", pool=pool) as page:
+            assert page.text() == text.decode()
+
+    assert server.connections == 2
+    assert pool.stats.opened == 2 and pool.stats.reused == 7
+
+
+def test_file_urls_and_proxied_hosts_fall_back_to_urllib(tmp_path, monkeypatch):
+    page = tmp_path / "job.html"
+    page.write_bytes("<p>Zürich</p>".encode("utf-8"))
+    assert get_html(page.as_uri()) == "<p>Zürich</p>"
+
+    for name in ("no_proxy", "NO_PROXY", "HTTP_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    with serve(PageHandler) as proxy:
+        proxy.pages = {"http://jobs.example.invalid/1": {"body": b"<p>via proxy</p>", "compress": "gzip"}}
+        monkeypatch.setenv("http_proxy", proxy.base)
+        assert get_html("http://jobs.example.invalid/1") == "<p>via proxy</p>"
+    assert proxy.requests == ["http://jobs.example.invalid/1"]
+
+
+def test_url_scanner_finds_every_platform_url_in_one_pass():
+    html = (
+        '<a href="https://jobs.lever.co/acme/123?x=1&amp;y=2">Apply</a> see HTTPS://boards.greenhouse.io/acme/jobs/9. '
+        '<script>{"url":"https:\\/\\/jobs.ashbyhq.com\\/acme\\/456"}</script>'
+        "<img src='//job-boards.greenhouse.io/logo.png'> https://notgreenhouse.io/a https://lever.com/x"
+    )
+    found = scan_urls(html, ["greenhouse.io", "lever.co", "jobs.lever.co", "ashbyhq.com"])
+
+    assert [m.url for m in found["greenhouse.io"]] == ["HTTPS://boards.greenhouse.io/acme/jobs/9", "https://job-boards.greenhouse.io/logo.png"]
+    assert found["lever.co"] == found["jobs.lever.co"] == [URLMatch("https://jobs.lever.co/acme/123?x=1&y=2", 9, 51)]
+    assert html[9:51] == "https://jobs.lever.co/acme/123?x=1&amp;y=2"
+    assert [m.url for m in found["ashbyhq.com"]] == ["https://jobs.ashbyhq.com/acme/456"]
+    assert scan_urls(html)["jobs.lever.co"][0].url.endswith("/acme/123?x=1&y=2")
+    assert find_url_with_domain(html, "ashbyhq.com") == "https://jobs.ashbyhq.com/acme/456"
+    assert find_url_with_domain(html, "workable.com") is None
+
+
+def test_submit_hints_from_text_or_bytes():
+    html = (
+        '<script>{"sourceFormDefinitionId": "0123-4567-89ab-cdef", "recaptchaPublicSiteKey": "6Lc-Key"}</script>'
+        'src="https://jobs.ashbyprd.com/x" fetch("/api/non-user-graphql?op=ApiJobBoard") '
+        '<a HREF="/acme/Apply?src=Board">Apply</a> "/API/v1/jobs"'
+    )
+    hints = parse_submit_hints_from_html(html, base_url="https://acme.com/careers")
+
+    assert hints == {
+        "apply_page": "https://acme.com/careers",
+        "platform": "ashbyhq",
+        "form_id": "0123-4567-89ab-cdef",
+        "recaptcha_site_key": "6Lc-Key",
+        "api_hints": ["/API/v1/jobs", "/Apply?src=Board", "/api/non-user-graphql?op=ApiJobBoard"],
+        "apply_link": "/acme/Apply?src=Board",
+    }
+    assert parse_submit_hints_from_html(html.encode(), base_url="https://acme.com/careers") == hints
+    assert parse_submit_hints_from_html("<p>Lever</p>", "https://jobs.lever.co/a")["platform"] == "lever"
+    assert detect_platform("", b"<div id='grnhse_app'>") == "greenhouse"
+
+
+def test_ready_selector_adds_platform_hints():
+    assert ready_selector("https://example.com/careers/1") == FORM_CONTROLS
+    greenhouse = ready_selector("https://boards.greenhouse.io/acme/jobs/1")
+    assert "iframe#grnhse_iframe" in greenhouse and greenhouse.endswith(FORM_CONTROLS)
+    assert (load_state("ready"), load_state("load")) == ("domcontentloaded", "load")
+
+
+class ScriptedPage:
+    """Stands in for a Playwright page whose evaluate() raises each error in turn, then succeeds."""
+
+    url = "https://example.com/careers/1"
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.evaluations = 0
+
+    def evaluate(self, script, arg):
+        self.evaluations += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"ready": True, "controls": 2}
+
+    def wait_for_load_state(self, state, timeout):
+        pass
+
+
+def test_ready_wait_retries_navigations_and_raises_script_errors():
+    page = ScriptedPage(Exception("Execution context was destroyed, most likely because of a navigation"))
+    readiness = wait_until_ready(page, timeout_ms=1_000)
+    assert (readiness.ready, readiness.controls, page.evaluations) == (True, 2, 2)
+
+    page = ScriptedPage(Exception("SyntaxError: Failed to execute 'querySelector' on 'Document': '[' is not a valid selector"))
+    with pytest.raises(Exception, match="not a valid selector"):
+        wait_until_ready(page, timeout_ms=1_000, selector="[")
+    assert page.evaluations == 1
@@ -0,0 +1,500 @@
+from __future__ import annotations
+
+import asyncio
+import http.client
+import json
+import ssl
+import threading
+import time
+import urllib.parse
+import weakref
+import zlib
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+
+Origin = Tuple[str, str, int]
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], body: bytes) -> None:
+        super().__init__(f"HTTP {status} {reason}: {body[:200].decode('utf-8', 'replace')}")
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+
+@dataclass
+class Timing:
+    """Seconds spent connecting (0 on a reused connection), until response headers, and in total."""
+    connect: float = 0.0
+    ttfb: float = 0.0
+    total: float = 0.0
+    reused: bool = False
+
+
+@dataclass
+class PoolStats:
+    opened: int = 0
+    reused: int = 0
+    evicted: int = 0
+
+
+@dataclass
+class Response:
+    status: int
+    reason: str
+    headers: Dict[str, str]
+    body: bytes = b""
+    timing: Timing = field(default_factory=Timing)
+
+    def json(self) -> Dict:
+        return json.loads(self.body.decode("utf-8"))
+
+    def raise_for_status(self) -> "Response":
+        if self.status >= 400:
+            raise HTTPStatusError(self.status, self.reason, self.headers, self.body)
+        return self
+
+
+def split_url(url: str) -> Tuple[Origin, str]:
+    parts = urllib.parse.urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    return (parts.scheme, parts.hostname or "", port), path
+
+
+def host_header(origin: Origin) -> str:
+    scheme, host, port = origin
+    return host if port == (443 if scheme == "https" else 80) else f"{host}:{port}"
+
+
+def has_body(status: int) -> bool:
+    return not (100 <= status < 200 or status in (204, 304))
+
+
+def reusable(status: int, headers: Dict[str, str]) -> bool:
+    """Whether the connection can carry another request once this response's body is consumed."""
+    framed = not has_body(status) or "content-length" in headers or "chunked" in headers.get("transfer-encoding", "").lower()
+    return framed and headers.get("connection", "").lower() != "close"
+
+
+def encode_request(method: str, origin: Origin, path: str, headers: Dict[str, str], body: bytes) -> bytes:
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host_header(origin)}"]
+    lines += [f"{k}: {v}" for k, v in headers.items() if k.lower() not in ("host", "content-length", "connection")]
+    lines += [f"Content-Length: {len(body)}", "Connection: keep-alive", "", ""]
+    return "\r\n".join(lines).encode("latin-1") + body
+
+
+def header_dict(items) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    for key, value in items:
+        key = key.strip().lower()
+        headers[key] = f"{headers[key]}, {value.strip()}" if key in headers else value.strip()
+    return headers
+
+
+class Decompressor:
+    """Streaming decoder for a Content-Encoding of gzip, deflate or identity.
+
+    "deflate" is tried as zlib-wrapped first and falls back to raw deflate, which
+    some servers send instead.
+    """
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding.strip().lower()
+        if self.encoding in ("gzip", "x-gzip"):
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == "deflate":
+            self._obj = zlib.decompressobj(zlib.MAX_WBITS)
+        elif self.encoding in ("", "identity"):
+            self._obj = None
+        else:
+            raise ValueError(f"unsupported Content-Encoding: {encoding}")
+        self._started = False
+
+    @property
+    def unconsumed_tail(self) -> bytes:
+        return self._obj.unconsumed_tail if self._obj is not None else b""
+
+    def decompress(self, data: bytes, max_length: int = 0) -> bytes:
+        if self._obj is None:
+            return data
+        try:
+            out = self._obj.decompress(data, max_length)
+        except zlib.error:
+            if self.encoding != "deflate" or self._started:
+                raise
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            out = self._obj.decompress(data, max_length)
+        self._started = True
+        return out
+
+    def flush(self) -> bytes:
+        return self._obj.flush() if self._obj is not None else b""
+
+
+class EmptyResponse(ConnectionError):
+    pass
+
+
+class IncompleteBody(ConnectionError):
+    """The connection closed before the end of the response body."""
+
+
+# ---------- blocking transport ----------
+
+@dataclass
+class _Connection:
+    conn: http.client.HTTPConnection
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """Thread-safe keep-alive pool of http.client connections, keyed by origin.
+
+    Up to `max_idle` idle connections are kept per origin and closed once idle
+    for longer than `idle_timeout` seconds. Each connection is used by one thread
+    at a time; only checkout/checkin take the lock.
+
+    A request is sent again, once and on a fresh connection, only when a reused
+    connection fails before any of the response arrives (the server closed it while
+    idle). Later failures are raised, so a POST the server has started answering is
+    never repeated; a server that takes the request and then resets the connection
+    without replying can still receive it twice.
+    """
+
+    def __init__(self, *, max_idle: int = 8, idle_timeout: float = 30.0, timeout: float = 60.0) -> None:
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.stats = PoolStats()
+        self._idle: Dict[Origin, List[_Connection]] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, origin: Origin, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = origin
+        conn = (
+            http.client.HTTPSConnection(host, port, timeout=timeout, context=ssl.create_default_context())
+            if scheme == "https"
+            else http.client.HTTPConnection(host, port, timeout=timeout)
+        )
+        conn.connect()
+        return conn
+
+    def _checkout(self, origin: Origin) -> Optional[http.client.HTTPConnection]:
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(origin, [])
+            while idle:
+                entry = idle.pop()
+                if now - entry.last_used < self.idle_timeout:
+                    self.stats.reused += 1
+                    return entry.conn
+                self.stats.evicted += 1
+                entry.conn.close()
+        return None
+
+    def _checkin(self, origin: Origin, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self.max_idle:
+                idle.append(_Connection(conn))
+                return
+        conn.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+        timeout: Optional[float] = None,
+    ) -> Response:
+        with self.open(method, url, headers=headers, body=body, timeout=timeout) as stream:
+            data = stream.read()
+        return Response(stream.status, stream.reason, stream.headers, data, stream.timing)
+
+    def open(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+        timeout: Optional[float] = None,
+    ) -> "StreamingResponse":
+        """Send a request and return as soon as the response headers arrive.
+
+        The body is read from the returned StreamingResponse; closing it hands the
+        connection back to the pool if the body was fully consumed.
+        """
+        origin, path = split_url(url)
+        timeout = timeout or self.timeout
+        started = time.perf_counter()
+        # A pooled connection may have been closed by the server while idle; resend once on a fresh one
+        for attempt in range(2):
+            conn = self._checkout(origin) if attempt == 0 else None
+            timing = Timing(reused=conn is not None)
+            if conn is None:
+                conn = self._connect(origin, timeout)
+                timing.connect = time.perf_counter() - started
+                with self._lock:
+                    self.stats.opened += 1
+            try:
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                conn.request(method, path, body=body or None, headers=headers or {})
+                resp = conn.getresponse()
+            except ConnectionError:
+                # Reset or closed before a status line (RemoteDisconnected included); a
+                # malformed status line means the server answered, so it is not retried
+                conn.close()
+                if timing.reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            timing.ttfb = time.perf_counter() - started
+            return StreamingResponse(self, origin, conn, resp, timing, started)
+        raise ConnectionError(f"could not reach {host_header(origin)}")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for entries in idle.values():
+            for entry in entries:
+                entry.conn.close()
+
+
+class StreamingResponse:
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        origin: Origin,
+        conn: http.client.HTTPConnection,
+        resp: http.client.HTTPResponse,
+        timing: Timing,
+        started: float,
+    ) -> None:
+        self.pool = pool
+        self.origin = origin
+        self.conn = conn
+        self.resp = resp
+        self.timing = timing
+        self.started = started
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = header_dict(resp.getheaders())
+
+    def __enter__(self) -> "StreamingResponse":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self.resp.read(amt)
+
+    def read1(self, amt: int = 65536) -> bytes:
+        return self.resp.read1(amt)
+
+    def readline(self) -> bytes:
+        return self.resp.readline()
+
+    def raise_for_status(self) -> "StreamingResponse":
+        if self.status >= 400:
+            body = self.read()
+            self.close()
+            raise HTTPStatusError(self.status, self.reason, self.headers, body)
+        return self
+
+    def close(self) -> None:
+        if self.conn is None:
+            return
+        self.timing.total = time.perf_counter() - self.started
+        conn, self.conn = self.conn, None
+        if not self.resp.isclosed() and self.resp.length == 0:
+            # read1() stops at Content-Length without marking the response done
+            self.resp.close()
+        if self.resp.will_close or not self.resp.isclosed():
+            conn.close()
+        else:
+            self.pool._checkin(self.origin, conn)
+
+
+# ---------- asyncio transport ----------
+
+@dataclass
+class _AsyncConnection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    last_used: float = field(default_factory=time.monotonic)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+@dataclass
+class _LoopState:
+    in_flight: asyncio.Semaphore
+    idle: Dict[Origin, List[_AsyncConnection]] = field(default_factory=dict)
+
+
+class AsyncConnectionPool:
+    """Keep-alive HTTP/1.1 client on asyncio streams.
+
+    Idle connections are kept per origin (up to `max_idle` each, evicted after
+    `idle_timeout` seconds) and at most `max_in_flight` requests run at once. State
+    is tracked per event loop, since asyncio streams cannot cross loops. Requests are
+    resent under the same rule as ConnectionPool: once, and only if a reused
+    connection failed before the response's status line.
+    """
+
+    def __init__(self, *, max_in_flight: int = 32, max_idle: int = 8, idle_timeout: float = 30.0, timeout: float = 60.0) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.stats = PoolStats()
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        if (state := self._states.get(loop)) is None:
+            state = self._states[loop] = _LoopState(asyncio.Semaphore(self.max_in_flight))
+        return state
+
+    async def _connect(self, origin: Origin) -> _AsyncConnection:
+        scheme, host, port = origin
+        ctx = ssl.create_default_context() if scheme == "https" else None
+        reader, writer = await asyncio.open_connection(host, port, ssl=ctx, server_hostname=host if ctx else None)
+        return _AsyncConnection(reader, writer)
+
+    def _checkout(self, state: _LoopState, origin: Origin) -> Optional[_AsyncConnection]:
+        idle = state.idle.get(origin, [])
+        now = time.monotonic()
+        while idle:
+            conn = idle.pop()
+            if now - conn.last_used < self.idle_timeout and not conn.reader.at_eof():
+                self.stats.reused += 1
+                return conn
+            self.stats.evicted += 1
+            conn.close()
+        return None
+
+    def _checkin(self, state: _LoopState, origin: Origin, conn: _AsyncConnection) -> None:
+        idle = state.idle.setdefault(origin, [])
+        if len(idle) >= self.max_idle:
+            conn.close()
+            return
+        conn.last_used = time.monotonic()
+        idle.append(conn)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+        timeout: Optional[float] = None,
+    ) -> Response:
+        origin, path = split_url(url)
+        state = self._state()
+        raw = encode_request(method, origin, path, headers or {}, body)
+        async with state.in_flight:
+            return await asyncio.wait_for(self._exchange(state, origin, raw), timeout or self.timeout)
+
+    async def _exchange(self, state: _LoopState, origin: Origin, raw: bytes) -> Response:
+        started = time.perf_counter()
+        # A pooled connection may have been closed by the server while idle; resend once on a fresh one
+        for attempt in range(2):
+            conn = self._checkout(state, origin) if attempt == 0 else None
+            timing = Timing(reused=conn is not None)
+            if conn is None:
+                conn = await self._connect(origin)
+                timing.connect = time.perf_counter() - started
+                self.stats.opened += 1
+            try:
+                conn.writer.write(raw)
+                await conn.writer.drain()
+                status, reason, headers = await read_head(conn.reader)
+            except ConnectionError:
+                conn.close()
+                if timing.reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            # The server has answered: from here on a failure is raised, never resent
+            try:
+                timing.ttfb = time.perf_counter() - started
+                body = b"".join([chunk async for chunk in iter_body(conn.reader, status, headers)])
+                timing.total = time.perf_counter() - started
+            except BaseException:
+                conn.close()
+                raise
+            if reusable(status, headers):
+                self._checkin(state, origin, conn)
+            else:
+                conn.close()
+            return Response(status, reason, headers, body, timing)
+        raise ConnectionError(f"could not reach {host_header(origin)}")
+
+    async def aclose(self) -> None:
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        for conns in (state.idle.values() if state else []):
+            for conn in conns:
+                conn.close()
+
+
+async def read_head(reader: asyncio.StreamReader) -> Tuple[int, str, Dict[str, str]]:
+    line = await reader.readline()
+    if not line:
+        raise EmptyResponse("connection closed before response")
+    _, status, *reason = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+    lines = []
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        lines.append(line.decode("latin-1").partition(":")[::2])
+    return int(status), (reason[0] if reason else ""), header_dict(lines)
+
+
+async def read_line(reader: asyncio.StreamReader) -> bytes:
+    # readline() returns what is left (often b"") at EOF instead of raising
+    line = await reader.readline()
+    if not line.endswith(b"\n"):
+        raise IncompleteBody("connection closed mid-body")
+    return line
+
+
+async def read_exactly(reader: asyncio.StreamReader, size: int) -> bytes:
+    try:
+        return await reader.readexactly(size)
+    except asyncio.IncompleteReadError as exc:
+        raise IncompleteBody(f"connection closed mid-body ({len(exc.partial)} of {size} bytes)") from exc
+
+
+async def iter_body(reader: asyncio.StreamReader, status: int, headers: Dict[str, str], chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    """The body in chunks; a connection closed before its end raises IncompleteBody (a ConnectionError)."""
+    if not has_body(status):
+        return
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while (size := int((await read_line(reader)).split(b";")[0].strip() or b"0", 16)):
+            yield await read_exactly(reader, size)
+            await read_line(reader)
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            chunk = await read_exactly(reader, min(chunk_size, remaining))
+            remaining -= len(chunk)
+            yield chunk
+    else:
+        while chunk := await reader.read(chunk_size):
+            yield chunk
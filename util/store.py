@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Sequence
+
+
+class LRUStore:
+    """One sqlite table with byte accounting and least-recently-used eviction.
+
+    The table is keyed by `key` and must have `size` (bytes) and `accessed` (epoch
+    seconds) columns. Totals are written to `stats.entries`/`stats.bytes` and
+    evicted rows counted in `stats.evictions`; callers hold `lock` around their
+    own statements and around evict().
+    """
+
+    def __init__(self, path: Path | str, table: str, key: str, columns: str, stats: Any, *, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self.key = key
+        self.stats = stats
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+        self.db.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)")
+        self.refresh_totals()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        return self.db.execute(sql, params)
+
+    def refresh_totals(self) -> None:
+        entries, size = self.db.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        self.stats.entries, self.stats.bytes = entries, size
+
+    def evict(self) -> None:
+        self.refresh_totals()
+        while self.stats.bytes > self.max_bytes and self.stats.entries > 1:
+            # Drop the least recently used tenth (at least one row) per round
+            batch = max(1, self.stats.entries // 10)
+            self.stats.evictions += self.db.execute(
+                f"DELETE FROM {self.table} WHERE {self.key} IN "
+                f"(SELECT {self.key} FROM {self.table} ORDER BY accessed LIMIT ?)",
+                (batch,),
+            ).rowcount
+            self.refresh_totals()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.db.execute(f"DELETE FROM {self.table}")
+            self.refresh_totals()
+
+    def close(self) -> None:
+        self.db.close()